@@ -0,0 +1,375 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import zipfile
+from contextlib import contextmanager
+
+from .utils import print_debug_info, get_cache_dir, get_plugin_setting
+
+
+def sha256_file(path: str, block_size: int=1 << 20)->str:
+    """
+    Calcule l'empreinte SHA-256 d'un fichier, lu par blocs.
+
+    :param:
+    path (str): chemin du fichier
+    block_size (int): taille des blocs lus (1 Mo par défaut)
+
+    :return:
+    str: empreinte hexadécimale
+    """
+
+    empreinte = hashlib.sha256()
+    with open(path, "rb") as file:
+        for bloc in iter(lambda: file.read(block_size), b""):
+            empreinte.update(bloc)
+
+    return empreinte.hexdigest()
+
+
+def verify_archive(path: str, version: int, block_size: int=1 << 20)->None:
+    """
+    Vérifie une archive de TAXREF avant son tri : archive ZIP lisible, contenant TAXREFv{version}.txt,
+    dont le contenu décompressé correspond au CRC enregistré dans l'archive.
+
+    :param:
+    path (str): chemin de l'archive
+    version (int): version de TAXREF attendue
+    block_size (int): taille des blocs décompressés (1 Mo par défaut)
+
+    :raise:
+    ValueError: si l'archive est illisible, incomplète ou corrompue
+    """
+
+    member_name = ArchiveCacheManager.get_member_name(version)
+
+    if not zipfile.is_zipfile(path):
+        raise ValueError(f"{path} n'est pas une archive ZIP")
+
+    try:
+        with zipfile.ZipFile(path) as zip_file:
+            if member_name not in zip_file.namelist():
+                raise ValueError(f"{path} ne contient pas {member_name}")
+            # Le CRC du membre est vérifié par zipfile à la fin de la lecture
+            with zip_file.open(member_name) as member:
+                while member.read(block_size):
+                    pass
+    except (zipfile.BadZipFile, EOFError, OSError) as error:
+        raise ValueError(f"Archive {path} corrompue : {error}") from error
+
+def find_local_archive(path: str, version: int, debug: int=0)->str:
+    """
+    Cherche une archive valide de TAXREF pour une version, à partir d'une archive ZIP
+    ou d'un dossier d'archives téléchargées au préalable (par exemple sur un partage réseau).
+    Dans un dossier, les archives dont le nom contient le numéro de version sont essayées en premier,
+    et seules celles qui contiennent TAXREFv{version}.txt sont vérifiées.
+
+    :param:
+    path (str): chemin d'une archive ZIP ou d'un dossier d'archives
+    version (int): version de TAXREF
+    debug (int): niveau de debug
+
+    :return:
+    str: chemin de l'archive vérifiée, ou None si aucune ne convient
+    """
+
+    if os.path.isdir(path):
+        candidates = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                      if name.lower().endswith(".zip")]
+        candidates.sort(key=lambda candidate: str(version) not in os.path.basename(candidate))
+    elif os.path.isfile(path):
+        candidates = [path]
+    else:
+        print_debug_info(debug, 0, f"Archive locale de TAXREF introuvable : {path}")
+        return None
+
+    member_name = ArchiveCacheManager.get_member_name(version)
+    for candidate in candidates:
+        try:
+            with zipfile.ZipFile(candidate) as zip_file:
+                if member_name not in zip_file.namelist():
+                    continue
+        except (zipfile.BadZipFile, OSError):
+            continue
+
+        try:
+            verify_archive(candidate, version)
+        except ValueError as error:
+            print_debug_info(debug, 0, str(error))
+            continue
+
+        print_debug_info(debug, 1, f"Archive locale de TAXREF v{version} : {candidate}")
+        return candidate
+
+    print_debug_info(debug, 0, f"Aucune archive valide de TAXREF v{version} dans {path}")
+    return None
+
+class ArchiveCacheManager():
+    """
+    Cache des archives ZIP de TAXREF partagé par tous les projets QGIS de la machine.
+
+    Chaque version est enregistrée sous TAXREFv{version}.zip dans le dossier de cache ;
+    le fichier index.json garde pour chaque version sa taille, son empreinte SHA-256, sa date de modification
+    à la dernière vérification de l'empreinte, le code d'archive du MNHN (cdDocArchive) dont elle a été
+    téléchargée et sa date de dernière utilisation. Quand la taille totale dépasse le budget,
+    les archives les moins récemment utilisées sont supprimées.
+    Une archive dont la taille, l'empreinte ou le contenu ne correspond plus est retirée du cache.
+    """
+
+    index_name = "index.json"
+    lock_name = "index.lock"
+    # Délai après lequel un verrou abandonné (processus interrompu) est ignoré, en secondes
+    lock_timeout = 60
+    # Écart minimal (s) entre la date de modification d'une archive et sa dernière vérification
+    # pour que la taille et la date suffisent à la reconnaître (voir get_archive)
+    marge_date = 2
+
+    def __init__(self, cache_dir: str=None, max_size: int=None, verify: bool=None, debug: int=0):
+        """
+        Initialisation d'une instance de ArchiveCacheManager
+
+        :param:
+        cache_dir (str): dossier du cache (par défaut, sous-dossier "archives" du cache du plugin)
+        max_size (int): budget du cache en octets (par défaut, réglage "archive_cache_max_mb", 1024 Mo)
+        verify (bool): recalculer l'empreinte SHA-256 à chaque lecture (par défaut, réglage "archive_cache_verify", False)
+        debug (int): niveau de debug
+        """
+
+        self.cache_dir = cache_dir if cache_dir is not None else get_cache_dir("archives")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        if max_size is None:
+            max_size = get_plugin_setting("archive_cache_max_mb", 1024, int) * 1024 * 1024
+        self.max_size = max_size
+        if verify is None:
+            verify = get_plugin_setting("archive_cache_verify", False, bool)
+        self.verify = verify
+        self.debug = debug
+
+        self.index_path = os.path.join(self.cache_dir, self.index_name)
+        self.lock_path = os.path.join(self.cache_dir, self.lock_name)
+
+    @staticmethod
+    def get_member_name(version: int)->str:
+        """
+        Renvoie le nom du fichier TAXREF attendu dans l'archive d'une version.
+        """
+
+        return f"TAXREFv{version}.txt"
+
+    def get_archive_path(self, version: int)->str:
+        """
+        Renvoie le chemin de l'archive d'une version dans le cache (qu'elle y soit ou non).
+        """
+
+        return os.path.join(self.cache_dir, f"TAXREFv{version}.zip")
+
+    @contextmanager
+    def _lock(self):
+        """
+        Verrou inter-processus sur l'index, par création exclusive d'un fichier de verrou.
+        """
+
+        debut = time.time()
+        while True:
+            try:
+                descripteur = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(descripteur)
+                break
+            except FileExistsError:
+                # Verrou abandonné par un processus interrompu
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > self.lock_timeout:
+                        os.remove(self.lock_path)
+                        continue
+                except OSError:
+                    continue
+                if time.time() - debut > self.lock_timeout:
+                    raise TimeoutError(f"Le cache des archives est verrouillé : {self.lock_path}")
+                time.sleep(0.1)
+
+        try:
+            yield
+        finally:
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+
+    def _read_index(self)->dict:
+        """
+        Lit l'index du cache ; un index absent ou illisible est considéré comme vide.
+        """
+
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                index = json.load(file)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: dict)->None:
+        """
+        Écrit l'index du cache de façon atomique (fichier temporaire puis renommage).
+        """
+
+        temp_path = self.index_path + ".part"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(index, file, indent=2)
+        os.replace(temp_path, self.index_path)
+
+    def _remove_entry(self, index: dict, version: int)->None:
+        """
+        Retire une version de l'index et supprime son archive.
+        """
+
+        index.pop(str(version), None)
+        try:
+            os.remove(self.get_archive_path(version))
+        except OSError:
+            pass
+
+    def is_valid_archive(self, path: str, version: int)->bool:
+        """
+        Vérifie qu'un fichier est une archive ZIP lisible contenant le fichier TAXREF de la version.
+        """
+
+        if not zipfile.is_zipfile(path):
+            return False
+        try:
+            with zipfile.ZipFile(path) as zip_file:
+                return self.get_member_name(version) in zip_file.namelist()
+        except zipfile.BadZipFile:
+            return False
+
+    def get_archive(self, version: int, cd_doc: str=None, verify: bool=None)->str:
+        """
+        Renvoie le chemin de l'archive d'une version si elle est en cache et intacte.
+        Une archive dont la taille, l'empreinte ou le contenu ne correspond plus à l'index est supprimée.
+        L'empreinte SHA-256 n'est recalculée que si la taille ou la date de modification de l'archive
+        a changé depuis sa dernière vérification, ou si la vérification est demandée.
+
+        :param:
+        version (int): version de TAXREF
+        cd_doc (str): code d'archive du MNHN attendu ; une archive téléchargée depuis un autre code
+            (archive republiée pour la même version) n'est pas renvoyée
+        verify (bool): recalculer l'empreinte dans tous les cas (par défaut, `self.verify`)
+
+        :return:
+        str: chemin de l'archive, ou None si elle n'est pas (ou plus) en cache
+        """
+
+        with self._lock():
+            index = self._read_index()
+            entry = index.get(str(version))
+            if entry is None:
+                return None
+            if cd_doc is not None and entry.get("cd_doc") not in (None, str(cd_doc)):
+                print_debug_info(self.debug, 1, f"Archive TAXREF v{version} du cache issue d'un autre document "
+                                                f"({entry.get('cd_doc')} au lieu de {cd_doc})")
+                return None
+
+            path = self.get_archive_path(version)
+            valid = os.path.isfile(path) and os.path.getsize(path) == entry.get("size")
+
+            if valid:
+                mtime = os.stat(path).st_mtime_ns
+                # Même taille et même date qu'à la dernière vérification : l'archive n'a pas changé.
+                # Une date trop proche de cette vérification n'est pas fiable (une écriture dans
+                # la même unité de temps du système de fichiers ne la modifierait pas) : l'empreinte est recalculée.
+                inchangee = (entry.get("mtime") == mtime
+                             and mtime < (entry.get("verified", 0) - self.marge_date) * 1e9)
+                if verify or (verify is None and self.verify) or not inchangee:
+                    valid = sha256_file(path) == entry.get("sha256")
+                    if valid:
+                        entry["mtime"] = mtime
+                        entry["verified"] = time.time()
+                valid = valid and self.is_valid_archive(path, version)
+
+            if not valid:
+                print_debug_info(self.debug, 0, f"Archive TAXREF v{version} du cache corrompue : elle est supprimée.")
+                self._remove_entry(index, version)
+                self._write_index(index)
+                return None
+
+            # Mise à jour de la date de dernière utilisation (LRU)
+            entry["last_used"] = time.time()
+            self._write_index(index)
+
+        print_debug_info(self.debug, 1, f"Archive TAXREF v{version} trouvée dans le cache : {path}")
+        return path
+
+    def add_archive(self, version: int, path: str, sha256: str=None, cd_doc: str=None)->str:
+        """
+        Déplace une archive téléchargée dans le cache, puis applique le budget de taille.
+
+        :param:
+        version (int): version de TAXREF
+        path (str): chemin de l'archive téléchargée (le fichier est déplacé)
+        sha256 (str): empreinte de l'archive si elle est déjà connue (calculée pendant le téléchargement)
+        cd_doc (str): code d'archive du MNHN dont l'archive a été téléchargée
+
+        :return:
+        str: chemin de l'archive dans le cache
+
+        :raise:
+        ValueError: si le fichier n'est pas une archive de TAXREF pour cette version
+        """
+
+        if not self.is_valid_archive(path, version):
+            raise ValueError(f"{path} n'est pas une archive ZIP contenant {self.get_member_name(version)}")
+
+        if sha256 is None:
+            sha256 = sha256_file(path)
+        size = os.path.getsize(path)
+        archive_path = self.get_archive_path(version)
+
+        with self._lock():
+            # Copie sous un nom temporaire puis renommage : une archive incomplète n'est jamais indexée
+            temp_path = archive_path + ".part"
+            shutil.move(path, temp_path)
+            os.replace(temp_path, archive_path)
+
+            index = self._read_index()
+            now = time.time()
+            index[str(version)] = {"file": os.path.basename(archive_path),
+                                   "size": size,
+                                   "sha256": sha256,
+                                   "mtime": os.stat(archive_path).st_mtime_ns,
+                                   "verified": now,
+                                   "cd_doc": str(cd_doc) if cd_doc is not None else None,
+                                   "added": now,
+                                   "last_used": now}
+            self._evict(index, keep=version)
+            self._write_index(index)
+
+        print_debug_info(self.debug, 1, f"Archive TAXREF v{version} ajoutée au cache : {archive_path}")
+        return archive_path
+
+    def _evict(self, index: dict, keep: int=None)->None:
+        """
+        Supprime les archives les moins récemment utilisées jusqu'à respecter le budget.
+        L'archive `keep` (qui vient d'être ajoutée) n'est jamais supprimée.
+        """
+
+        total_size = sum(entry.get("size", 0) for entry in index.values())
+        for version, entry in sorted(index.items(), key=lambda item: item[1].get("last_used", 0)):
+            if total_size <= self.max_size:
+                break
+            if version == str(keep):
+                continue
+            print_debug_info(self.debug, 1, f"Archive TAXREF v{version} retirée du cache (budget de {self.max_size} octets)")
+            total_size -= entry.get("size", 0)
+            self._remove_entry(index, version)
+
+    def remove_archive(self, version: int)->None:
+        """
+        Retire l'archive d'une version du cache.
+        """
+
+        with self._lock():
+            index = self._read_index()
+            self._remove_entry(index, version)
+            self._write_index(index)
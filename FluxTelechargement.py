@@ -0,0 +1,453 @@
+import io
+import zlib
+import struct
+import zipfile
+import threading
+from contextlib import contextmanager
+
+from .utils import print_debug_info
+
+# En-tête local d'un membre d'archive ZIP (voir zipfile)
+SIGNATURE_EN_TETE_LOCAL = b"PK\x03\x04"
+FORMAT_EN_TETE_LOCAL = "<4s5H3L2H"
+TAILLE_EN_TETE_LOCAL = struct.calcsize(FORMAT_EN_TETE_LOCAL)
+# Signature facultative du descripteur de données qui suit un membre (bit 3 des drapeaux)
+SIGNATURE_DESCRIPTEUR = b"PK\x07\x08"
+
+# Drapeaux et méthodes de compression des membres
+DRAPEAU_CHIFFRE = 0x1
+DRAPEAU_DESCRIPTEUR = 0x8
+DRAPEAU_UTF8 = 0x800
+METHODES_FLUX = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+
+# Taille des lectures dans le fichier en cours de téléchargement
+TAILLE_LECTURE = 1 << 20
+
+
+class FluxNonSupporte(Exception):
+    """
+    L'archive ne peut pas être lue pendant son téléchargement (disposition des membres,
+    chiffrement, méthode de compression, ou archive déjà complète) : le tri lit l'archive une fois téléchargée.
+    """
+
+
+class FluxTelechargement():
+    """
+    Archive de TAXREF en cours de téléchargement, lue par le tri pendant son écriture.
+
+    Le thread de téléchargement écrit dans un fichier temporaire et signale chaque morceau
+    vidé sur le disque (`ajouter`) ; le thread de tri relit ce fichier au fil de l'eau (`lire`).
+    Une fois le téléchargement vérifié, le thread de téléchargement attend que le tri ait libéré
+    le fichier (`attendre_liberation`) avant de le déplacer, puis publie le chemin définitif
+    de l'archive (`publier`), que le tri attend pour revenir à la lecture séquentielle ou supprimer l'archive.
+    """
+
+    def __init__(self, debug: int=0):
+        """
+        Initialisation d'une instance de FluxTelechargement
+
+        :param:
+        debug (int): niveau de debug
+        """
+
+        self.debug = debug
+        self._condition = threading.Condition()
+
+        # Fichier temporaire en cours d'écriture et nombre d'octets déjà sur le disque
+        self.path = None
+        self.disponible = 0
+        # Téléchargement terminé (avec l'erreur éventuelle)
+        self.termine = False
+        self.erreur = None
+        # Fichier relâché par le tri
+        self.libere = False
+        # Chemin définitif de l'archive, une fois publiée
+        self.archive = None
+        self.publie = False
+
+    # Côté téléchargement
+
+    def commencer(self, path: str)->None:
+        """
+        Signale la création du fichier temporaire dans lequel l'archive est écrite.
+        """
+
+        with self._condition:
+            self.path = path
+            self._condition.notify_all()
+
+    def ajouter(self, taille: int)->None:
+        """
+        Signale `taille` octets de plus écrits et vidés sur le disque.
+        """
+
+        with self._condition:
+            self.disponible += taille
+            self._condition.notify_all()
+
+    def terminer(self, erreur: Exception=None)->None:
+        """
+        Signale la fin du téléchargement, réussi ou non.
+        """
+
+        with self._condition:
+            self.termine = True
+            self.erreur = erreur
+            self._condition.notify_all()
+
+    def attendre_liberation(self, timeout: float=None)->bool:
+        """
+        Attend que le tri ait relâché le fichier (il ne peut être déplacé ou supprimé avant sous Windows).
+
+        :param:
+        timeout (float): attente maximale en secondes (None : jusqu'à la libération)
+
+        :return:
+        bool: True si le fichier a été relâché
+        """
+
+        with self._condition:
+            return self._condition.wait_for(lambda: self.libere, timeout)
+
+    def publier(self, archive: str=None, erreur: Exception=None)->None:
+        """
+        Publie le chemin définitif de l'archive (fichier temporaire, cache des archives ou archive
+        déjà en cache), ou l'erreur du téléchargement.
+        """
+
+        with self._condition:
+            self.archive = archive
+            self.termine = True
+            if erreur is not None:
+                self.erreur = erreur
+            self.publie = True
+            self._condition.notify_all()
+
+    # Côté tri
+
+    def _verifier(self)->None:
+        """
+        Lève l'erreur du téléchargement, s'il a échoué.
+        """
+
+        if self.erreur is not None:
+            raise IOError(f"Téléchargement de TAXREF interrompu : {self.erreur}") from self.erreur
+
+    def ouvrir(self):
+        """
+        Ouvre en lecture binaire le fichier en cours de téléchargement, dès qu'il est créé.
+
+        :return:
+        io.BufferedReader: le fichier ouvert, ou None si l'archive a été publiée sans être téléchargée
+        (archive déjà en cache)
+
+        :raise:
+        IOError: si le téléchargement a échoué
+        """
+
+        with self._condition:
+            while self.path is None and not self.termine:
+                self._condition.wait()
+            self._verifier()
+            if self.path is None:
+                return None
+            return open(self.path, "rb")
+
+    def lire(self, file: io.BufferedReader, taille: int=TAILLE_LECTURE)->bytes:
+        """
+        Lit au plus `taille` octets à la position courante du fichier, en attendant
+        qu'ils soient téléchargés.
+
+        :return:
+        bytes: les octets lus, vide une fois tout le fichier lu
+
+        :raise:
+        IOError: si le téléchargement a échoué
+        """
+
+        position = file.tell()
+        with self._condition:
+            while self.disponible <= position and not self.termine:
+                self._condition.wait()
+            self._verifier()
+            taille = min(taille, self.disponible - position)
+
+        return file.read(taille) if taille > 0 else b""
+
+    def liberer(self)->None:
+        """
+        Signale que le tri a relâché le fichier.
+        """
+
+        with self._condition:
+            self.libere = True
+            self._condition.notify_all()
+
+    def attendre_archive(self)->str:
+        """
+        Attend la publication de l'archive.
+
+        :return:
+        str: chemin définitif de l'archive
+
+        :raise:
+        IOError: si le téléchargement a échoué
+        """
+
+        with self._condition:
+            while not self.publie:
+                self._condition.wait()
+            self._verifier()
+            return self.archive
+
+
+class MembreZipFlux(io.RawIOBase):
+    """
+    Membre d'une archive ZIP décompressé au fil de son téléchargement.
+
+    Les en-têtes locaux sont lus dans l'ordre du fichier : le membre demandé doit être stocké
+    ou compressé en deflate, et les membres qui le précèdent doivent indiquer leur taille compressée.
+    Le CRC et la taille du membre sont vérifiés à la fin de sa lecture, puis le fichier est relâché.
+    """
+
+    def __init__(self, flux: FluxTelechargement, member_name: str, debug: int=0):
+        """
+        Initialisation d'une instance de MembreZipFlux
+
+        :param:
+        flux (FluxTelechargement): archive en cours de téléchargement
+        member_name (str): nom du membre à lire
+        debug (int): niveau de debug
+
+        :raise:
+        FluxNonSupporte: si le membre ne peut pas être lu pendant le téléchargement
+        IOError: si le téléchargement a échoué
+        """
+
+        super().__init__()
+        self.flux = flux
+        self.member_name = member_name
+        self.debug = debug
+
+        # Octets décompressés renvoyés, taille attendue (0 : inconnue) et CRC calculé
+        self.position = 0
+        self.taille = 0
+        self.crc = 0
+        self.fin = False
+        self._reste = b""
+        self._entree = b""
+
+        self.file = flux.ouvrir()
+        if self.file is None:
+            raise FluxNonSupporte("archive déjà téléchargée")
+        try:
+            self._chercher_membre()
+        except BaseException:
+            self._relacher()
+            raise
+
+    def _lire_exactement(self, taille: int)->bytes:
+        """
+        Lit exactement `taille` octets, en commençant par ceux déjà lus et non consommés.
+        """
+
+        donnees = self._entree[:taille]
+        self._entree = self._entree[taille:]
+        while len(donnees) < taille:
+            morceau = self.flux.lire(self.file, max(TAILLE_LECTURE, taille - len(donnees)))
+            if not morceau:
+                raise zipfile.BadZipFile(f"Fin inattendue de l'archive dans {self.member_name}")
+            donnees += morceau
+        self._entree = donnees[taille:] + self._entree
+        return donnees[:taille]
+
+    def _chercher_membre(self)->None:
+        """
+        Parcourt les en-têtes locaux jusqu'au membre demandé.
+        """
+
+        while True:
+            en_tete = self._lire_exactement(TAILLE_EN_TETE_LOCAL)
+            (signature, _, drapeaux, methode, _, _,
+             crc, taille_compressee, taille, longueur_nom, longueur_extra) = struct.unpack(FORMAT_EN_TETE_LOCAL, en_tete)
+            if signature != SIGNATURE_EN_TETE_LOCAL:
+                raise FluxNonSupporte(f"{self.member_name} absent des membres lisibles en flux")
+
+            nom = self._lire_exactement(longueur_nom).decode("utf-8" if drapeaux & DRAPEAU_UTF8 else "cp437")
+            extra = self._lire_exactement(longueur_extra)
+            taille_compressee, taille = self._tailles_zip64(extra, taille_compressee, taille)
+
+            if drapeaux & DRAPEAU_CHIFFRE:
+                raise FluxNonSupporte(f"membre {nom} chiffré")
+
+            if nom == self.member_name:
+                if methode not in METHODES_FLUX:
+                    raise FluxNonSupporte(f"méthode de compression {methode} de {nom}")
+                self.methode = methode
+                self.descripteur = bool(drapeaux & DRAPEAU_DESCRIPTEUR)
+                if self.descripteur and methode == zipfile.ZIP_STORED:
+                    raise FluxNonSupporte(f"taille de {nom} inconnue avant sa lecture")
+                self.crc_attendu = None if self.descripteur else crc
+                self.taille = 0 if self.descripteur else taille
+                self.restant = taille_compressee
+                self.decompresseur = zlib.decompressobj(-15) if methode == zipfile.ZIP_DEFLATED else None
+                print_debug_info(self.debug, 1, f"Lecture de {nom} pendant le téléchargement")
+                return
+
+            # Membre précédent : il est sauté, ce qui demande sa taille compressée
+            if drapeaux & DRAPEAU_DESCRIPTEUR and taille_compressee == 0:
+                raise FluxNonSupporte(f"taille du membre {nom} inconnue avant sa lecture")
+            while taille_compressee:
+                taille_compressee -= len(self._lire_exactement(min(taille_compressee, TAILLE_LECTURE)))
+
+    @staticmethod
+    def _tailles_zip64(extra: bytes, taille_compressee: int, taille: int)->tuple:
+        """
+        Renvoie les tailles (compressée, décompressée) en tenant compte du champ extra Zip64.
+        """
+
+        while len(extra) >= 4:
+            identifiant, longueur = struct.unpack("<2H", extra[:4])
+            if identifiant == 0x0001:
+                valeurs = list(struct.unpack(f"<{longueur // 8}Q", extra[4:4 + longueur - longueur % 8]))
+                if taille == 0xFFFFFFFF and valeurs:
+                    taille = valeurs.pop(0)
+                if taille_compressee == 0xFFFFFFFF and valeurs:
+                    taille_compressee = valeurs.pop(0)
+                break
+            extra = extra[4 + longueur:]
+
+        return taille_compressee, taille
+
+    def _lire_entree(self)->bytes:
+        """
+        Renvoie les prochains octets compressés du membre.
+        """
+
+        if self._entree:
+            donnees, self._entree = self._entree, b""
+        else:
+            donnees = self.flux.lire(self.file)
+        if not donnees:
+            raise zipfile.BadZipFile(f"Fin inattendue de l'archive dans {self.member_name}")
+        return donnees
+
+    def _decompresser(self)->bytes:
+        """
+        Décompresse le morceau suivant du membre.
+        """
+
+        if self.decompresseur is None:
+            # Membre stocké : sa taille est connue
+            if self.restant == 0:
+                self._terminer()
+                return b""
+            donnees = self._lire_entree()
+            self._entree, donnees = donnees[self.restant:], donnees[:self.restant]
+            self.restant -= len(donnees)
+            if self.restant == 0:
+                self._terminer()
+            return donnees
+
+        donnees = self.decompresseur.decompress(self._lire_entree())
+        if self.decompresseur.eof:
+            self._entree = self.decompresseur.unused_data
+            self._terminer()
+        return donnees
+
+    def _terminer(self)->None:
+        """
+        Vérifie le CRC et la taille du membre lu, puis relâche le fichier.
+        """
+
+        self.fin = True
+        if self.descripteur:
+            # Le CRC suit les données, avec ou sans signature
+            crc = self._lire_exactement(4)
+            if crc == SIGNATURE_DESCRIPTEUR:
+                crc = self._lire_exactement(4)
+            self.crc_attendu = struct.unpack("<L", crc)[0]
+        self._relacher()
+
+    def _relacher(self)->None:
+        """
+        Ferme le fichier en cours de téléchargement et le signale au téléchargement.
+        """
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.flux.liberer()
+
+    def readable(self)->bool:
+        return True
+
+    def tell(self)->int:
+        return self.position
+
+    def readinto(self, buffer)->int:
+        while not self._reste and not self.fin:
+            self._reste = self._decompresser()
+            self.crc = zlib.crc32(self._reste, self.crc)
+            if self.fin:
+                self._verifier_membre(self.position + len(self._reste))
+
+        taille = min(len(buffer), len(self._reste))
+        buffer[:taille] = self._reste[:taille]
+        self._reste = self._reste[taille:]
+        self.position += taille
+        return taille
+
+    def _verifier_membre(self, taille: int)->None:
+        """
+        Compare le CRC et la taille calculés à ceux de l'archive.
+
+        :raise:
+        zipfile.BadZipFile: si le membre est corrompu
+        """
+
+        if self.crc != self.crc_attendu or (self.taille and taille != self.taille):
+            raise zipfile.BadZipFile(f"CRC ou taille de {self.member_name} incorrect dans l'archive téléchargée")
+
+    def close(self)->None:
+        if not self.closed:
+            self._relacher()
+        super().close()
+
+
+@contextmanager
+def ouvrir_fichier_flux(flux: FluxTelechargement, version: int, debug: int=0):
+    """
+    Ouvre en lecture texte le fichier TAXREFv{version}.txt de l'archive en cours de téléchargement.
+    Le fichier téléchargé est relâché en sortie, y compris en cas d'erreur.
+
+    :param:
+    flux (FluxTelechargement): archive en cours de téléchargement
+    version (int): version de TAXREF
+    debug (int): niveau de debug
+
+    :yield:
+    io.TextIOBase: le fichier TAXREF ouvert en lecture (UTF-8) ; `file.buffer.raw` est le MembreZipFlux
+
+    :raise:
+    FluxNonSupporte: si l'archive ne peut pas être lue pendant son téléchargement
+    """
+
+    try:
+        membre = MembreZipFlux(flux, f"TAXREFv{version}.txt", debug=debug)
+        with io.TextIOWrapper(io.BufferedReader(membre, TAILLE_LECTURE), encoding="utf-8") as file:
+            yield file
+    finally:
+        flux.liberer()
+
+def get_position_flux(file: io.TextIOBase):
+    """
+    Renvoie une fonction donnant (octets décompressés, taille du membre) du fichier ouvert par `ouvrir_fichier_flux`.
+    """
+
+    membre = file.buffer.raw
+
+    def position()->tuple:
+        return membre.position, membre.taille
+
+    return position
@@ -1,13 +1,12 @@
 import os
-import json
 import pandas as pd
 import geopandas as gpd
 import numpy as np
 
-from urllib.request import urlopen
+from .HttpSession import get_json_cached
 from .utils import (print_debug_info, get_file_save_path,
                     list_layers_from_gpkg, list_layers_from_qgis, 
-                    load_layer_as_dataframe)
+                    load_layer_as_dataframe, get_layer_versions)
 from .taxongroupe import TaxonGroupe
 
 
@@ -28,6 +27,8 @@ class VersionManager():
         self.debug = debug
         # Version qui sera associée aux données de Statuts.gpkg
         self.data_version = -1
+        # Version de la couche Liste de chaque taxon (-1 si la couche ou la colonne VERSION manque)
+        self.taxon_versions = {}
         # Dernière version sur l'API TAXREF
         self.current_version = -1
 
@@ -39,12 +40,15 @@ class VersionManager():
         Récupère la version minimale d'un ensemble de fichiers de données géospatiales pour différentes catégories de taxons.
 
         Cette fonction parcourt une liste de catégories de taxons et vérifie pour chaque catégorie si le fichier correspondant
-        existe dans le répertoire spécifié. Si un fichier est trouvé, la version minimale est extraite de la colonne "VERSION".
-        Si le fichier est absent ou si la colonne "VERSION" est manquante, une valeur de -1 est ajoutée.
+        existe dans le répertoire spécifié. La version de chaque couche est lue dans la table Versions
+        (voir save_layer_version) ; pour une couche écrite avant cette table, la version minimale est extraite
+        de la colonne "VERSION". Si le fichier est absent ou si la colonne "VERSION" est manquante, une valeur de -1 est ajoutée.
+        La version de chaque taxon est gardée dans `taxon_versions`.
         """
         
         # Liste pour stocker les versions extraites
         all_versions = []
+        self.taxon_versions = {taxon.title: -1 for taxon in self.taxons}
 
         # Définir le chemin du fichier en fonction du titre du taxon
         file_path = get_file_save_path(self.path)
@@ -52,12 +56,17 @@ class VersionManager():
         if os.path.isfile(file_path) :
             available_layers = list_layers_from_qgis(file_path)
             print_debug_info(self.debug, 1, f"Les couches sont : {available_layers}")
+            # Version de chaque couche, enregistrée une seule fois par couche
+            layer_versions = get_layer_versions(file_path)
 
             # Parcours de chaque catégorie de taxon
             for taxon in self.taxons:
                 layer_name = f"Liste {taxon.title}"
                 
-                if layer_name in available_layers: 
+                if layer_name in available_layers and layer_name in layer_versions:
+                    all_versions.append(layer_versions[layer_name])
+                    self.taxon_versions[taxon.title] = int(all_versions[-1])
+                elif layer_name in available_layers: 
                     data = load_layer_as_dataframe(file_path, layer_name=layer_name)
                     # Ajouter la version minimale ou -1 si la colonne "VERSION" est absente
                     if "VERSION" in data.columns and not data["VERSION"].empty:
@@ -72,6 +81,7 @@ class VersionManager():
                         all_versions.append(version_series.min() if not version_series.empty else -1)
                     else:
                         all_versions.append(-1)
+                    self.taxon_versions[taxon.title] = int(all_versions[-1])
             
         # Retourner la version minimale parmi toutes celles extraites
         if all_versions != []:
@@ -88,9 +98,8 @@ class VersionManager():
         """
 
         # Effectue une requête HTTP vers l'API pour obtenir les métadonnées de la version courante
-        response = urlopen(self.url)
-        # Lit et décode la réponse JSON
-        data_json = json.loads(response.read()) # Lire les données JSON
+        # (toujours envoyée, même sans validateurs, pour voir une nouvelle version dès sa publication)
+        data_json = get_json_cached(self.url, ttl=0)
 
         # Extrait l'identifiant de la version actuelle depuis le champ "id"
         self.current_version = data_json["id"]
@@ -109,6 +118,33 @@ class VersionManager():
 
         return self.data_version == self.current_version
 
+    def is_stale(self, taxon: TaxonGroupe)->bool:
+        """
+        Indique si la couche Liste d'un taxon n'est pas à la dernière version de TAXREF
+        (version différente, plus ancienne ou plus récente, colonne VERSION absente ou couche absente).
+
+        :param:
+        taxon (TaxonGroupe): taxon à vérifier
+
+        :return:
+        bool : True si la couche du taxon est à mettre à jour
+        """
+
+        return self.taxon_versions.get(taxon.title, -1) != self.current_version
+
+    def get_stale_taxons(self)->list[TaxonGroupe]:
+        """
+        Renvoie les taxons dont la couche Liste n'est pas à la dernière version de TAXREF.
+
+        :return:
+        list[TaxonGroupe] : taxons à mettre à jour, dans l'ordre de `taxons`
+        """
+
+        stale_taxons = [taxon for taxon in self.taxons if self.is_stale(taxon)]
+        print_debug_info(self.debug, 0, f"Taxons à mettre à jour : {[taxon.title for taxon in stale_taxons]}")
+
+        return stale_taxons
+
     def set_taxons(self, taxons: list[TaxonGroupe]):
         self.taxons = taxons
         return
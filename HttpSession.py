@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .utils import get_plugin_setting, get_cache_dir
+
+# Délais par défaut de connexion et de lecture des requêtes (s), modifiables par le réglage "http_timeout"
+DELAI_CONNEXION = 15
+DELAI_LECTURE = 60
+# Nombre maximal de connexions ouvertes par hôte (réglage "http_connections")
+CONNEXIONS_PAR_HOTE = 8
+# Nouvelles tentatives automatiques des requêtes GET après une erreur de connexion ou une réponse 502, 503 ou 504
+TENTATIVES = 3
+# Durée de validité (s) d'une réponse en cache dont le serveur n'a fourni ni ETag ni Last-Modified
+# (réglage "http_cache_ttl") ; courte, pour qu'une nouvelle publication soit vue rapidement
+DUREE_CACHE = 5 * 60
+
+# Session partagée par tous les threads du plugin
+_session = None
+_verrou = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    Adaptateur HTTP qui applique un délai par défaut aux requêtes qui n'en précisent pas.
+    """
+
+    def __init__(self, timeout=None, **kwargs):
+        """
+        Initialisation d'une instance de TimeoutHTTPAdapter
+
+        :param:
+        timeout (float|tuple): délai par défaut, ou (connexion, lecture), en secondes
+        kwargs: paramètres de HTTPAdapter (taille des pools, nouvelles tentatives)
+        """
+
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session()->requests.Session:
+    """
+    Crée une session HTTP avec connexions persistantes (keep-alive, TLS réutilisé),
+    délais par défaut, nombre de connexions limité par hôte et nouvelles tentatives.
+
+    :return:
+    requests.Session: la session
+    """
+
+    delai_lecture = get_plugin_setting("http_timeout", DELAI_LECTURE, int)
+    connexions = max(1, get_plugin_setting("http_connections", CONNEXIONS_PAR_HOTE, int))
+
+    # Au-delà de `connexions` requêtes simultanées vers un hôte, les suivantes attendent (pool_block)
+    adapter = TimeoutHTTPAdapter(timeout=(DELAI_CONNEXION, delai_lecture),
+                                 pool_connections=4,
+                                 pool_maxsize=connexions,
+                                 pool_block=True,
+                                 max_retries=Retry(total=TENTATIVES,
+                                                   backoff_factor=1,
+                                                   status_forcelist=(502, 503, 504),
+                                                   allowed_methods=("GET", "HEAD"),
+                                                   raise_on_status=False))
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = f"AutoUpdateTAXREF {session.headers.get('User-Agent', '')}".strip()
+
+    return session
+
+def get_session()->requests.Session:
+    """
+    Renvoie la session HTTP partagée, créée au premier appel.
+    """
+
+    global _session
+    with _verrou:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+def close_session()->None:
+    """
+    Ferme les connexions de la session partagée (une nouvelle session est créée à l'appel suivant).
+    """
+
+    global _session
+    with _verrou:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def http_get(url: str, **kwargs)->requests.Response:
+    """
+    Envoie une requête GET avec la session partagée.
+
+    :param:
+    url (str): adresse demandée
+    kwargs: paramètres de requests.Session.get (headers, stream, timeout...)
+
+    :return:
+    requests.Response: la réponse
+    """
+
+    return get_session().get(url, **kwargs)
+
+def get_json(url: str, **kwargs):
+    """
+    Envoie une requête GET avec la session partagée et renvoie le JSON de la réponse.
+
+    :raise:
+    requests.HTTPError: si le serveur renvoie une erreur
+    """
+
+    response = http_get(url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+def get_cache_path(url: str)->str:
+    """
+    Renvoie le chemin du fichier de cache d'une réponse JSON, nommé d'après l'empreinte de son URL.
+    """
+
+    return os.path.join(get_cache_dir("http"), hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+def read_cache_entry(path: str)->dict:
+    """
+    Lit une réponse en cache ; une entrée absente ou illisible est ignorée (None).
+    """
+
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            entry = json.load(file)
+        return entry if isinstance(entry, dict) and "data" in entry else None
+    except (OSError, ValueError):
+        return None
+
+def write_cache_entry(path: str, entry: dict)->None:
+    """
+    Écrit une réponse en cache de façon atomique (fichier temporaire puis renommage).
+    """
+
+    temp_path = f"{path}.{threading.get_ident()}.part"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(temp_path, path)
+    except OSError:
+        # Le cache n'est qu'une optimisation : la réponse reste utilisable
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+def get_json_cached(url: str, ttl: int=None, **kwargs):
+    """
+    Renvoie le JSON d'une réponse en ne le retéléchargeant que s'il a changé.
+    La réponse en cache est toujours revalidée : ses validateurs (ETag, Last-Modified) sont envoyés
+    dans If-None-Match et If-Modified-Since, et une réponse 304 est servie depuis le cache local.
+    Si le serveur n'a fourni aucun validateur, la réponse en cache est réutilisée sans
+    requête pendant `ttl` secondes (0 : jamais).
+    Le réglage "http_cache" (booléen) permet de désactiver ce cache.
+
+    :param:
+    url (str): adresse demandée
+    ttl (int): durée de validité sans validateurs (s), par défaut le réglage "http_cache_ttl"
+    kwargs: paramètres de requests.Session.get
+
+    :return:
+    données JSON de la réponse
+
+    :raise:
+    requests.HTTPError: si le serveur renvoie une erreur
+    """
+
+    if not get_plugin_setting("http_cache", True, bool):
+        return get_json(url, **kwargs)
+
+    if ttl is None:
+        ttl = get_plugin_setting("http_cache_ttl", DUREE_CACHE, int)
+
+    path = get_cache_path(url)
+    entry = read_cache_entry(path)
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if not (entry.get("etag") or entry.get("last_modified")) and time.time() - entry.get("checked", 0) < ttl:
+            return entry["data"]
+
+    response = http_get(url, headers=headers, **kwargs)
+
+    if response.status_code == 304 and entry is not None:
+        # Contenu inchangé : seules la date de vérification et les validateurs renvoyés sont mis à jour
+        entry["checked"] = time.time()
+        entry["etag"] = response.headers.get("ETag", entry.get("etag"))
+        entry["last_modified"] = response.headers.get("Last-Modified", entry.get("last_modified"))
+        write_cache_entry(path, entry)
+        return entry["data"]
+
+    response.raise_for_status()
+    data = response.json()
+
+    write_cache_entry(path, {"url": url,
+                             "etag": response.headers.get("ETag"),
+                             "last_modified": response.headers.get("Last-Modified"),
+                             "checked": time.time(),
+                             "data": data})
+
+    return data
@@ -8,14 +8,18 @@ from PyQt5.QtCore import Qt, QThread, pyqtSignal
 
 # Fonctions pratiques
 from .utils import (print_debug_info,
-                    list_layers_from_gpkg)
+                    list_layers_from_gpkg,
+                    get_plugin_setting)
 
 # Models
 from .taxongroupe import (TAXONS,
                           get_taxon_titles, get_taxon_from_titles)
 from .statustype import (STATUS_TYPES, get_status_types_from_ids)
 from .UpdateSearchStatus import SourcesManager
+from .UpdateTAXREF import taxref_en_cache, COLONNES_SYNONYMES
 from .GetVersions import VersionManager
+from .ArchiveCache import ArchiveCacheManager
+from .FluxTelechargement import FluxTelechargement
 
 from .AutoUpdateTAXREF_dialog import AutoUpdateTAXREFDialog
 
@@ -62,9 +66,34 @@ class UpdateController(QThread):
         self.new_version = False
         # Attribut indiquant des nouvelles sources pour les statuts
         self.new_status = False
+        # Attribut indiquant un simple ajout de taxons (même version) : la couche Sources n'est pas réécrite
+        self.only_new_taxons = False
         
         self.local_status_types = STATUS_TYPES
         self.synonyme = False
+        # Tables Synonymes (CD_NOM → CD_REF) enregistrées à côté des couches Liste
+        self.synonym_table = get_plugin_setting("synonym_table", False, bool)
+        # Moteur de lecture de TAXREF ("pandas", "pyarrow" ou "auto")
+        self.engine = get_plugin_setting("engine", "auto")
+        # Nombre de processus de travail pour le tri de TAXREF (0 : aucun) et taille de leur file
+        self.processes = get_plugin_setting("processes", 0, int)
+        self.queue_depth = get_plugin_setting("queue_depth", 0, int) or None
+        # Budget mémoire du tri de TAXREF, en Mo (0 : pas de budget)
+        self.memory_budget = get_plugin_setting("memory_budget_mb", 0, int) * 1024 * 1024 or None
+        # Cache Parquet de TAXREF, partagé entre les projets et les exécutions
+        self.cache = get_plugin_setting("cache_taxref", True, bool)
+        # Cache des archives de TAXREF partagé par tous les projets de la machine
+        self.archive_cache = ArchiveCacheManager(debug=self.debug) if get_plugin_setting("archive_cache", True, bool) else None
+        # Archive ZIP ou dossier d'archives de TAXREF téléchargées au préalable (vide : téléchargement)
+        self.local_archive = get_plugin_setting("local_archive", "")
+        # Vrai si l'archive triée est une archive locale, qui ne doit pas être supprimée
+        self.local_archive_used = False
+        # Tri de TAXREF pendant son téléchargement (repli sur le tri après téléchargement si l'archive ne s'y prête pas)
+        self.pipeline = get_plugin_setting("pipeline", True, bool)
+        # Archive en cours de téléchargement partagée avec le tri (None : tri après le téléchargement)
+        self.flux = None
+        # Nombre de plages d'octets de l'archive téléchargées en parallèle (1 : un seul flux)
+        self.download_segments = get_plugin_setting("download_segments", 1, int)
 
         # Chemin des fichiers Donnees.gpkg et Statuts.gpkg
         self.data_path = os.path.join(self.project_path, "Donnees.gpkg")
@@ -75,6 +104,8 @@ class UpdateController(QThread):
             # Récupère les taxons d'intérêt
             local_taxon_titles = get_taxon_titles(self.data_path)
             self.local_taxons = get_taxon_from_titles(local_taxon_titles)
+            # Taxons dont les couches seront mises à jour (tous, sauf ajout de nouveaux taxons)
+            self.update_taxons = self.local_taxons
             
             # Instancie le manager des sources
             self.source_model = SourcesManager(self.data_path, debug=self.debug)
@@ -93,6 +124,7 @@ class UpdateController(QThread):
         # Si au moins un des deux fichiers gpkg n'existe pas
         else :
             self.local_taxons = TAXONS
+            self.update_taxons = self.local_taxons
             self.version_model = VersionManager(self.project_path, TAXONS, debug=self.debug)
             self.source_model = SourcesManager(self.data_path, debug=self.debug)
 
@@ -225,15 +257,20 @@ class UpdateController(QThread):
         print_debug_info(self.debug, 1, f"taxon_liste_status : {taxon_liste_status}")
         print_debug_info(self.debug, 1, f"local_status_status: {taxon_status_status}")
 
-        # Check si les taxons de Donnees.gpkg sont les mêmes que dans Statuts.gpkg
-        cond_liste_status = all(taxon in taxon_liste_status for taxon in local_taxon_titles)
-        cond_status_status = all(taxon in taxon_status_status for taxon in local_taxon_titles)
-        cond_status = cond_liste_status & cond_status_status
+        # Taxons de Donnees.gpkg dont la couche Liste ou Statuts manque dans Statuts.gpkg
+        missing_taxons = [taxon for taxon in self.local_taxons
+                          if taxon.title not in taxon_liste_status or taxon.title not in taxon_status_status]
+        print_debug_info(self.debug, 1, f"taxons sans couches : {[taxon.title for taxon in missing_taxons]}")
 
         # Vérification si une mise à jour de la version est nécessaire
-        if (not self.version_model.issame_versions()) or not cond_status:
+        if not self.version_model.issame_versions():
             # Met le booléen pour la nouvelle version de taxref en True
             self.new_version = True
+            self.only_new_taxons = False
+            # Seuls les taxons en retard sur la dernière version (ou sans couches) sont mis à jour
+            stale_taxons = self.version_model.get_stale_taxons()
+            self.update_taxons = [taxon for taxon in self.local_taxons
+                                  if taxon in stale_taxons or taxon in missing_taxons]
             # Applique cette modification a source_model (pour la sauvegarde des sources)
             self.source_model.set_new_version(self.new_version)
             # Demande à l'utilisateur.rice s'il ou elle veux faire une sauvegarde
@@ -241,6 +278,16 @@ class UpdateController(QThread):
             if self.do_update:
                 # Demande à l'utilisateur.rice s'il ou elle veux cauver en CSV et où
                 self.ask_save_excel()
+        elif missing_taxons:
+            # Même version : seules les couches des nouveaux taxons sont créées,
+            # TAXREF étant relu depuis le cache et les autres taxons n'étant pas touchés
+            self.new_version = True
+            self.only_new_taxons = True
+            self.update_taxons = missing_taxons
+            print_debug_info(self.debug, 0, f"Ajout des taxons {[taxon.title for taxon in missing_taxons]} sans mise à jour des autres.")
+            self.ask_update_taxref()
+            if self.do_update:
+                self.ask_save_excel()
         else:
             # Vérification s'il existe de nouvelles sources nécessitant une mise à jour des statuts
             self.source_model.check_update_status()
@@ -289,9 +336,11 @@ class UpdateController(QThread):
             # Attribut les valeurs en fonction de la màj demandée
             self.new_version = True if self.dlg.radio_taxref_all.isChecked() else False
             self.new_status = True if self.dlg.radio_status_only.isChecked() else False
+            self.only_new_taxons = False
 
             # Change les taxons et status d'intérêts
             self.local_taxons = get_taxon_from_titles(list(self.dlg.selected_taxons))
+            self.update_taxons = self.local_taxons
             self.local_status_types = get_status_types_from_ids(list(self.dlg.selected_statuses))
 
             print_debug_info(self.debug, 0, f"Accepted : \nTAXREF : {self.new_version} \nStatus : {self.new_status}, {[status.type_id for status in self.local_status_types]}")
@@ -309,7 +358,34 @@ class UpdateController(QThread):
     def _start_get_url(self):
         """
         Démarre le thread permettant de récupérer l'URL de téléchargement.
+        Si cette version de TAXREF est déjà en cache, le téléchargement est sauté ; avec le réglage
+        "local_archive" ou le cache des archives, la recherche d'URL est sautée et l'archive locale
+        ou en cache est vérifiée par le thread de téléchargement.
         """
+
+        # Pas de tri pendant le téléchargement tant qu'aucun téléchargement n'est lancé
+        self.flux = None
+        self.local_archive_used = False
+
+        # Un cache sans les colonnes des tables Synonymes demandées est refait : l'archive est alors nécessaire
+        colonnes_cache = COLONNES_SYNONYMES if self.synonym_table else None
+        if self.cache and taxref_en_cache(self.version_model.current_version, colonnes_cache):
+            print_debug_info(self.debug, 0, f"TAXREF v{self.version_model.current_version} est en cache : pas de téléchargement.")
+            self.download_window.initialize_global_bar()
+            # Les étapes de recherche d'URL et de téléchargement sont comptées comme faites
+            self.global_progress.emit()
+            self._on_download_complete(None)
+            return
+
+        # Archive locale ou déjà téléchargée par un autre projet : sans recherche d'URL, elle est cherchée
+        # et vérifiée une seule fois par le thread de téléchargement (décompression de TAXREF, empreinte
+        # de l'archive : l'interface serait figée), qui ne télécharge que si aucune ne convient
+        if self.local_archive or self.archive_cache is not None:
+            self.file_url = None
+            self.download_window.initialize_global_bar()
+            self.global_progress.emit()
+            self._start_download_taxref()
+            return
         
         # Instanciation du Thread
         self.get_url_thread = GetURLThread(self.version_model.current_version)
@@ -341,19 +417,46 @@ class UpdateController(QThread):
         Démarre le thread de téléchargement du fichier TAXREF.
         """
 
+        # Archive triée pendant son téléchargement (pas avec une archive locale, qui ne doit pas être supprimée
+        # par le tri : on ne sait qu'après sa vérification si elle est utilisée)
+        self.flux = FluxTelechargement(debug=self.debug) if self.pipeline and not self.local_archive else None
+
         # Instanciation du thread de téléchargement de TAXREF
-        self.download_taxref_thread = DownloadTaxrefThread(self.file_url)
+        self.download_taxref_thread = DownloadTaxrefThread(self.file_url,
+                                                           version=self.version_model.current_version,
+                                                           archive_cache=self.archive_cache,
+                                                           flux=self.flux,
+                                                           segments=self.download_segments,
+                                                           local_archive=self.local_archive or None,
+                                                           debug=self.debug)
         # Connection des signaux pour la barre de progression
         self.download_taxref_thread.progress.connect(self.download_window._step_increment_step)
+        self.download_taxref_thread.message.connect(self.download_window.update_step_progress_label)
+        # Archive locale utilisée : elle sera conservée après le tri
+        self.download_taxref_thread.local_archive_found.connect(self._on_local_archive_found)
         # Connecte à l'étape suivante
         self.download_taxref_thread.finished.connect(self._on_download_complete)
-        # Connecte en cas d'annulation
-        self.cancel_requested.connect(self.download_taxref_thread.terminate)
+        # Connecte en cas d'annulation : le thread s'arrête au morceau suivant et garde le fichier partiel pour la reprise
+        self.cancel_requested.connect(self.download_taxref_thread.requestInterruption)
         # Met a jour le label de la barre de progression
         self.download_window.update_step_progress_label("Téléchargement de TAXREF en cours...")
         # Lance de thread
         self.download_taxref_thread.start()
 
+        # Le tri démarre en même temps et lit l'archive au fil du téléchargement
+        if self.flux is not None:
+            self.temp_file_path = None
+            self._start_save_taxref()
+
+    def _on_local_archive_found(self, local_archive: str):
+        """
+        Callback appelé lorsque le thread de téléchargement utilise une archive locale (émis avant 'finished').
+
+        :param local_archive: Chemin de l'archive locale vérifiée.
+        """
+
+        self.local_archive_used = True
+
     def _on_download_complete(self, temp_file_path: str):
         """
         Callback appelé lorsque le téléchargement est terminé.
@@ -365,6 +468,10 @@ class UpdateController(QThread):
         self.temp_file_path = temp_file_path
         # Emet un signal de progression globale
         self.global_progress.emit()
+        # Tri déjà en cours pendant le téléchargement : la barre passe à sa progression
+        if self.flux is not None:
+            self._show_save_progress()
+            return
         # Va à l'étape suivante
         self._start_save_taxref()
 
@@ -377,17 +484,41 @@ class UpdateController(QThread):
         self.save_taxref_thread = SaveTaxrefThread(
             self.temp_file_path,
             self.version_model.current_version,
-            self.local_taxons,
+            self.update_taxons,
             self.project_path,
-            self.synonyme)
+            self.synonyme,
+            engine=self.engine,
+            processes=self.processes,
+            queue_depth=self.queue_depth,
+            cache=self.cache,
+            delete_archive=self.archive_cache is None and not self.local_archive_used,
+            synonym_table=self.synonym_table,
+            memory_budget=self.memory_budget,
+            flux=self.flux)
         
         # Connecte la fin du thread à l'étape suivante
         self.save_taxref_thread.finished.connect(self._on_taxref_saved)
         # Connecte en cas d'annulation
-        self.cancel_requested.connect(self.save_taxref_thread.terminate)
+        # (arrêt coopératif : le tri relâche l'archive en cours de téléchargement et supprime ses fichiers temporaires)
+        self.cancel_requested.connect(self.save_taxref_thread.requestInterruption)
+        # Pendant le téléchargement, la barre de progression reste celle du téléchargement
+        if self.flux is None:
+            self._show_save_progress()
         # Lance le thread
         self.save_taxref_thread.start()
 
+    def _show_save_progress(self):
+        """
+        Affiche la progression du tri de TAXREF dans la barre de l'étape.
+        """
+
+        # Connection des signaux pour la barre de progression
+        self.save_taxref_thread.progress.connect(self.download_window._step_increment_step)
+        self.save_taxref_thread.message.connect(self.download_window.update_step_progress_label)
+        # Remet à zéro la barre de progression de l'étape
+        self.download_window._step_increment_step(0)
+        self.download_window.update_step_progress_label("Tri de TAXREF en cours...")
+
     def _on_taxref_saved(self):
         """
         Callback appelé lorsque l'enregistrement des données TAXREF est terminé.
@@ -406,7 +537,7 @@ class UpdateController(QThread):
         # Instanciation du thread 
         self.get_status_thread = GetStatusThread(
             self.project_path,
-            self.local_taxons,
+            self.update_taxons,
             self.local_status_types,
             self.save_excel,
             self.excel_folder,
@@ -435,8 +566,10 @@ class UpdateController(QThread):
 
         print_debug_info(self.debug, -1, "In start save sources")
 
-        # Lance la sauvegarde des sources
-        self.source_model.save_new_sources()
+        # Lance la sauvegarde des sources (sauf pour un simple ajout de taxons : les sources
+        # ne changent pas et les statuts des autres taxons n'ont pas été mis à jour)
+        if not self.only_new_taxons:
+            self.source_model.save_new_sources()
 
         # Emet un signal de fin des mise à jour
         self.last_save_finished.emit()
@@ -1,10 +1,10 @@
 import os
-import requests
 import pandas as pd
 
 from .utils import (print_debug_info, save_dataframe, save_to_gpkg_via_qgs,
                     list_layers_from_gpkg, list_layers_from_qgis, load_layer_as_dataframe,
                     save_decorator, parse_layer_to_dataframe, load_layer)
+from .HttpSession import get_json
 
 from datetime import date
 
@@ -83,8 +83,7 @@ class SourcesManager():
         url = f"https://taxref.mnhn.fr/api/sources/findByTerm/{year}"
 
         # Envoi de la requête GET à l'API et récupération des données JSON
-        response = requests.get(url)
-        data_json = response.json()
+        data_json = get_json(url)
 
         # Extraire et normaliser les données des sources bibliographiques
         sources_list = data_json.get('_embedded', {}).get('bibliography', [])
@@ -3,7 +3,6 @@ import geopandas as gpd
 import re
 
 import os
-import requests
 from typing import List, Tuple, Dict
 
 from .utils import (print_debug_info, get_file_save_path,
@@ -14,6 +13,7 @@ from .utils import (print_debug_info, get_file_save_path,
                     time_decorator, save_dataframe,
                     load_layer_as_dataframe, list_layers_from_gpkg, list_layers_from_qgis)"""
 from .taxongroupe import (TaxonGroupe, OISEAUX)
+from .HttpSession import get_json, get_json_cached
 from .statustype import (StatusType, STATUS_TYPES,
                           LUTTE_CONTRE_ESPECES, 
                           LISTE_ROUGE_NATIONALE, LISTE_ROUGE_REGIONALE,
@@ -531,8 +531,7 @@ def get_all_status_type()->list:
     
     url = "https://taxref.mnhn.fr/api/status/types"
 
-    response = requests.get(url)
-    data_json = response.json()
+    data_json = get_json_cached(url)
 
     status_list = data_json['_embedded']['statusTypes']
     df_page = pd.json_normalize(status_list, sep='_')
@@ -591,9 +590,8 @@ def download_status(status: StatusType,
         
         print_debug_info(debug, 1, f"Pour {status.type_id}, début du téléchargement page {i}")
 
-        # Requête HTTP
-        response = requests.get(url)
-        data_json = response.json()
+        # Requête HTTP (connexion réutilisée d'une page à l'autre)
+        data_json = get_json(url)
 
         print_debug_info(debug, 1, f"Pour {status.type_id}, fin du téléchargement page {i}")
 
@@ -1,16 +1,42 @@
+import numpy as np
 import pandas as pd 
 import geopandas as gpd
 
+import io
 import os
-from urllib.request import urlopen, urlretrieve
-from urllib.error import URLError, HTTPError
+import sys
+import time
+import shutil
+import tempfile
+import multiprocessing
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, closing, ExitStack
 from typing import List
 
-import json
 import zipfile
+import requests
 
-from .utils import print_debug_info, get_file_save_path, save_dataframe, save_to_gpkg_via_qgs
-from .taxongroupe import TaxonGroupe, AMPHIBIENS, REPTILES, OISEAUX, MAMMIFERES
+# Moteur CSV multithread et cache Parquet optionnels
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as pa_ds
+    import pyarrow.parquet as pa_pq
+except ImportError:
+    pa = None
+    pa_csv = None
+    pa_ds = None
+    pa_pq = None
+
+from .utils import (print_debug_info, get_file_save_path, get_cache_dir,
+                    save_diff_to_gpkg_via_qgs, create_attribute_index)
+from .HttpSession import http_get, get_json_cached
+from .FluxTelechargement import FluxNonSupporte, ouvrir_fichier_flux, get_position_flux
+from .taxongroupe import TaxonGroupe, ClassificateurTaxons, AMPHIBIENS, REPTILES, OISEAUX, MAMMIFERES
+
+# Adresse de téléchargement des archives de TAXREF, suivie du code d'archive (cdDocArchive)
+URL_TELECHARGEMENT = "https://inpn.mnhn.fr/docs-web/docs/download/"
 
 # Générer l'URL de téléchargement pour une version donnée
 def get_download_url(version):
@@ -37,9 +63,8 @@ def get_download_url(version):
     # Lien pour obtenir la liste de toutes les versions de TAXREF
     link_allVersions = "https://taxref.mnhn.fr/taxref-web/versions/listAllVersions"
 
-    # Récupérer les données depuis le lien
-    response = urlopen(link_allVersions)
-    data_json = json.loads(response.read())
+    # Récupérer les données depuis le lien (toujours revalidées : la liste change à chaque publication)
+    data_json = get_json_cached(link_allVersions, ttl=0)
 
     try :
         # Extraire le code d'archive pour la version demandée
@@ -48,31 +73,95 @@ def get_download_url(version):
         raise ValueError(f"Version {version} non trouvée dans la liste des versions disponibles.")
     
     # Générer l'URL de téléchargement à partir du code d'archive
-    link_download = "https://inpn.mnhn.fr/docs-web/docs/download/"+str(cdDocArchive)
+    link_download = URL_TELECHARGEMENT+str(cdDocArchive)
 
     return link_download
 
+def get_cd_doc_archive(link_download: str)->str:
+    """
+    Renvoie le code d'archive (cdDocArchive) d'une URL construite par `get_download_url`,
+    ou None pour une autre URL.
+    """
+
+    if not link_download.startswith(URL_TELECHARGEMENT):
+        return None
+
+    return link_download[len(URL_TELECHARGEMENT):].strip("/") or None
+
 # Télécharger le fichier ZIP à partir de l'URL donnée
 def download_zip(link_download: str, save_path: str)-> None:
 
     try:
         print(f"Téléchargement depuis {link_download} ...")
-        urlretrieve(link_download, save_path)
+        with http_get(link_download, stream=True) as response:
+            response.raise_for_status()
+            with open(save_path, "wb") as file:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    file.write(chunk)
         print(f"Fichier téléchargé et sauvegardé à {save_path}")
-    except HTTPError as e:
-        print(f"Erreur HTTP: {e.code} - {e.reason}")
-    except URLError as e:
-        print(f"Erreur de connexion: {e.reason}")
+    except requests.HTTPError as e:
+        print(f"Erreur HTTP: {e.response.status_code} - {e.response.reason}")
+    except requests.RequestException as e:
+        print(f"Erreur de connexion: {e}")
     except Exception as e:
         print(f"Une erreur est survenue: {str(e)}")
 
     return
 
+# Colonnes de TAXREF inutiles dans les couches Liste
+COLONNES_A_SUPPRIMER = [
+    'REGNE', 'PHYLUM', 'CLASSE','ORDRE',
+    'SOUS_FAMILLE', 'TRIBU', 'GROUP1_INPN',
+    'GROUP2_INPN', 'GROUP3_INPN', 'CD_TAXSUP',
+    'CD_SUP', 'CD_BA', 'URL_INPN', 'RANG',
+    'LB_NOM', 'LB_AUTEUR', 'NOM_COMPLET',
+    'NOM_COMPLET_HTML', 'NOM_VERN_ENG',
+    'HABITAT', 'FR', 'GF', 'MAR', 'GUA',
+    'SM', 'SB', 'SPM', 'MAY', 'EPA', 'REU',
+    'SA', 'TA', 'TAAF', 'PF', 'NC', 'WF',
+    'CLI', 'URL']
+
+# Colonnes de TAXREF à faible cardinalité, lues sous forme catégorielle (codes entiers + dictionnaire)
+COLONNES_CATEGORIELLES = [
+    'REGNE', 'GROUP1_INPN', 'GROUP2_INPN', 'GROUP3_INPN',
+    'ORDRE', 'FAMILLE', 'FR', 'RANG']
+
+# Colonnes de TAXREF utilisées par les filtres des taxons (conservées dans le cache)
+COLONNES_FILTRE = [
+    'REGNE', 'GROUP1_INPN', 'GROUP2_INPN', 'GROUP3_INPN',
+    'ORDRE', 'FAMILLE', 'FR', 'CD_NOM', 'CD_REF']
+
+# Colonnes des tables Synonymes (correspondance CD_NOM → CD_REF)
+COLONNES_SYNONYMES = ['CD_NOM', 'CD_REF', 'LB_NOM']
+
+# Budget mémoire : part réservée aux morceaux lus et en cours de tri,
+# le reste allant aux lignes triées en attente d'enregistrement
+PART_BUDGET_MORCEAUX = 0.25
+# Nombre de lignes du premier morceau, qui sert à mesurer la taille d'une ligne
+LIGNES_SONDE = 10000
+# Nombre minimal de lignes par morceau, quel que soit le budget
+LIGNES_MIN = 1000
+
+# Valeurs lues comme manquantes (valeurs par défaut de pd.read_csv, reprises pour pyarrow)
+VALEURS_MANQUANTES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null']
+
+# Moteurs de lecture de TAXREF
+ENGINE_PANDAS = "pandas"
+ENGINE_PYARROW = "pyarrow"
+ENGINE_AUTO = "auto"
+# Moteur retenu pour "auto" : pyarrow n'a pas été plus rapide que pandas
+# sur la lecture et le tri complets (scripts/benchmark_taxref_engines.py)
+ENGINE_DEFAUT = ENGINE_PANDAS
+
 # Supprimer certaines colonnes inutiles du DataFrame
 def tri_colonnes(df:pd.DataFrame, version:int)->pd.DataFrame:
     """
     Filtre les colonnes d'un DataFrame en supprimant certaines colonnes inutiles
     et ajoute une colonne 'VERSION' avec la valeur spécifiée.
+    Les colonnes à supprimer qui n'ont pas été lues (projection à la lecture) sont ignorées.
 
     Args:
         df (pd.DataFrame): Le DataFrame contenant les données à filtrer.
@@ -82,31 +171,89 @@ def tri_colonnes(df:pd.DataFrame, version:int)->pd.DataFrame:
         pd.DataFrame: Un DataFrame avec les colonnes inutiles supprimées et la colonne 'VERSION' ajoutée.
     """
     
-    # Liste des colonnes à supprimer du DataFrame
-    colonnes_a_supprimer = [
-        'REGNE', 'PHYLUM', 'CLASSE','ORDRE',
-        'SOUS_FAMILLE', 'TRIBU', 'GROUP1_INPN',
-        'GROUP2_INPN', 'GROUP3_INPN', 'CD_TAXSUP',
-        'CD_SUP', 'CD_BA', 'URL_INPN', 'RANG',
-        'LB_NOM', 'LB_AUTEUR', 'NOM_COMPLET',
-        'NOM_COMPLET_HTML', 'NOM_VERN_ENG',
-        'HABITAT', 'FR', 'GF', 'MAR', 'GUA',
-        'SM', 'SB', 'SPM', 'MAY', 'EPA', 'REU',
-        'SA', 'TA', 'TAAF', 'PF', 'NC', 'WF',
-        'CLI', 'URL']
-    
-    # Suppression des colonnes spécifiéesr
-    df = df.drop(columns=colonnes_a_supprimer)
+    # Suppression des colonnes spécifiées
+    df = df.drop(columns=COLONNES_A_SUPPRIMER, errors='ignore')
     # Ajout de la colonne 'VERSION' avec la valeur donnée
     df['VERSION'] = version
 
     return df
 
+# Sélectionner les colonnes à lire dans TAXREF
+def get_colonnes_utiles(taxons: List[TaxonGroupe], synonyme: bool=False, synonym_table: bool=False):
+    """
+    Construit le sélecteur de colonnes à passer à `pd.read_csv(usecols=...)` :
+    les colonnes conservées dans les couches Liste et celles utilisées par `TaxonGroupe.filtre_df`.
+
+    Args:
+        taxons (list): Liste d'objets TaxonGroupe à filtrer.
+        synonyme (bool, optional): Si True, les synonymes sont inclus. Par défaut, False.
+        synonym_table (bool, optional): Si True, ajoute les colonnes des tables Synonymes. Par défaut, False.
+
+    Returns:
+        Callable[[str], bool]: Fonction renvoyant True pour chaque colonne à lire.
+    """
+
+    # Colonnes nécessaires aux filtres des taxons
+    colonnes_filtre = {colonne for taxon in taxons for colonne in taxon.colonnes_filtre(synonyme=synonyme)}
+    if synonym_table:
+        colonnes_filtre.update(COLONNES_SYNONYMES)
+
+    return lambda colonne: (colonne not in COLONNES_A_SUPPRIMER) or (colonne in colonnes_filtre)
+
+# Types des colonnes à la lecture de TAXREF
+def get_types_colonnes()->defaultdict:
+    """
+    Construit le dictionnaire de types à passer à `pd.read_csv(dtype=...)` :
+    les colonnes de `COLONNES_CATEGORIELLES` sont encodées en catégories, les autres restent des chaînes.
+
+    Returns:
+        defaultdict: Types des colonnes, `str` par défaut.
+    """
+
+    return defaultdict(lambda: str, {colonne: 'category' for colonne in COLONNES_CATEGORIELLES})
+
+# Concaténer des morceaux en conservant l'encodage catégoriel
+def concat_categoriel(frames: List[pd.DataFrame])->pd.DataFrame:
+    """
+    Concatène des DataFrames dont certaines colonnes sont catégorielles.
+    Les catégories de chaque colonne sont d'abord unifiées (et triées) entre les morceaux,
+    sinon `pd.concat` reconvertirait ces colonnes en chaînes de caractères.
+    Les catégories absentes des lignes retenues sont ensuite retirées.
+
+    Args:
+        frames (list): Les DataFrames à concaténer (mêmes colonnes).
+
+    Returns:
+        pd.DataFrame: Le DataFrame concaténé, avec un index réinitialisé.
+    """
+
+    colonnes_categorielles = [colonne for colonne in frames[0].columns
+                              if isinstance(frames[0][colonne].dtype, pd.CategoricalDtype)]
+
+    for colonne in colonnes_categorielles:
+        # Union triée des catégories rencontrées dans tous les morceaux
+        # (un morceau sans aucune valeur n'a pas de catégories, et leur type peut différer)
+        series = [frame[colonne] for frame in frames if len(frame[colonne].cat.categories)]
+        if not series:
+            continue
+        categories = pd.api.types.union_categoricals(
+            series, sort_categories=True, ignore_order=True).categories
+        frames = [frame.assign(**{colonne: frame[colonne].cat.set_categories(categories)}) for frame in frames]
+
+    df = pd.concat(frames, ignore_index=True)
+
+    # Ne garder que les catégories effectivement présentes dans les lignes retenues
+    for colonne in colonnes_categorielles:
+        df[colonne] = df[colonne].cat.remove_unused_categories()
+
+    return df
+
 # Supprimer les espèces sans nom vernaculaire et les noms vernaculaires doubles 
 def supprime_nom_vernaculaire(df:pd.DataFrame, taxon:TaxonGroupe)->pd.DataFrame:
     """
     Supprime les lignes avec des valeurs manquantes dans la colonne 'NOM_VERN' pour certaines couches,
     puis groupe les données par 'NOM_VERN' et conserve uniquement la ligne avec le nom valide le plus court.
+    En cas d'égalité, la première ligne du groupe est conservée ; les lignes sont triées par 'NOM_VERN'.
 
     Args:
         df (pd.DataFrame): Le DataFrame contenant les données à nettoyer.
@@ -122,11 +269,13 @@ def supprime_nom_vernaculaire(df:pd.DataFrame, taxon:TaxonGroupe)->pd.DataFrame:
     # Vérifier si la couche est dans la liste des couches définies
     if taxon in taxons_specifiques:
         # Supprimer les lignes où la colonne 'NOM_VERN' a des valeurs manquantes
-        df.dropna(subset=["NOM_VERN"], inplace=True)
-        # Grouper par 'NOM_VERN' et appliquer la logique pour sélectionner la ligne avec le nom valide le plus court
+        df = df.dropna(subset=["NOM_VERN"])
+        # Longueur des noms valides, calculée une seule fois pour tout le DataFrame
+        longueurs = df["NOM_VALIDE"].str.len()
+        # Pour chaque 'NOM_VERN' (dans l'ordre trié), étiquette de la première ligne au nom valide le plus court
+        index_retenus = longueurs.groupby(df["NOM_VERN"], sort=True).idxmin()
         df_cleaned = (
-            df.groupby("NOM_VERN", group_keys=False)
-            .apply(lambda row_group: row_group.loc[row_group["NOM_VALIDE"].str.len().idxmin()])
+            df.loc[index_retenus.to_numpy()]
             .reset_index(drop=True))  # Réinitialiser l'index pour éviter les conflits
         
         return df_cleaned
@@ -135,17 +284,1036 @@ def supprime_nom_vernaculaire(df:pd.DataFrame, taxon:TaxonGroupe)->pd.DataFrame:
         # Si la couche ne correspond pas à celles définies, retourner le DataFrame sans modification
         return df
 
+@contextmanager
+def ouvrir_fichier_taxref(temp_zip_path: str,
+                          version: int,
+                          save_path: str,
+                          stream: bool=True):
+    """
+    Ouvre en lecture texte le fichier TAXREFv{version}.txt contenu dans l'archive ZIP.
+
+    En mode flux, le membre de l'archive est décompressé à la volée par `ZipFile.open` :
+    aucune copie décompressée n'est écrite sur le disque. Sinon, le fichier est extrait
+    dans `save_path` puis supprimé à la fermeture, y compris en cas d'erreur.
+
+    Args:
+        temp_zip_path (str): Le chemin d'accès au fichier ZIP.
+        version (int): La version de la base de données TAXREF.
+        save_path (str): Le dossier d'extraction (utilisé uniquement si `stream` est False).
+        stream (bool, optional): Si True, lit le membre directement depuis l'archive. Par défaut, True.
+
+    Yields:
+        io.TextIOBase: Le fichier TAXREF ouvert en lecture (UTF-8).
+
+    Raises:
+        FileNotFoundError: Si le fichier TAXREFv{version}.txt n'est pas trouvé dans l'archive ZIP.
+    """
+
+    # Nom du fichier à ouvrir dans l'archive
+    file_to_open = f"TAXREFv{version}.txt"
+
+    with zipfile.ZipFile(temp_zip_path) as zip_file :
+
+        if file_to_open not in zip_file.namelist():
+            raise FileNotFoundError(f"Le fichier {file_to_open} n'a pas été trouvé dans l'archive ZIP.")
+
+        if stream:
+            # Décompression à la volée du membre de l'archive
+            with zip_file.open(file_to_open) as binary_file:
+                with io.TextIOWrapper(binary_file, encoding='utf-8') as file:
+                    yield file
+            return
+
+        # Extraire le fichier ZIP dans le répertoire de sauvegarde
+        zip_file.extract(file_to_open, save_path)
+
+    extracted_file_path = os.path.join(save_path, file_to_open)
+    try:
+        with open(extracted_file_path, 'r', encoding='utf-8') as file:
+            yield file
+    finally:
+        # Supprimer le fichier extrait, même si la lecture a échoué
+        os.remove(extracted_file_path)
+
+def get_position_fichier(file: io.TextIOBase, temp_zip_path: str, version: int):
+    """
+    Renvoie une fonction donnant (octets consommés, taille) du fichier TAXREF ouvert par `ouvrir_fichier_taxref`.
+    La position est celle du flux binaire sous-jacent (membre décompressé de l'archive ou fichier extrait),
+    la taille est celle du membre dans l'archive.
+    """
+
+    with zipfile.ZipFile(temp_zip_path) as zip_file:
+        taille = zip_file.getinfo(f"TAXREFv{version}.txt").file_size
+
+    def position()->tuple:
+        try:
+            return file.buffer.tell(), taille
+        except (OSError, ValueError):
+            # Flux fermé ou non positionnable : progression inconnue
+            return 0, 0
+
+    return position
+
+def get_engine(engine: str=ENGINE_AUTO, debug: int=0)->str:
+    """
+    Choisit le moteur de lecture de TAXREF effectivement utilisé.
+    "auto" désigne le moteur par défaut (`ENGINE_DEFAUT`, pandas). pyarrow n'est retenu
+    que s'il est demandé et installé ; sinon la lecture par morceaux de pandas est utilisée.
+
+    Args:
+        engine (str, optional): "pandas", "pyarrow" ou "auto". Par défaut, "auto".
+        debug (int, optional): Niveau de débogage. Par défaut, 0.
+
+    Returns:
+        str: "pandas" ou "pyarrow".
+
+    Raises:
+        ValueError: Si le moteur demandé n'est pas reconnu.
+    """
+
+    if engine not in (ENGINE_PANDAS, ENGINE_PYARROW, ENGINE_AUTO):
+        raise ValueError(f"Moteur de lecture inconnu : {engine}. Valeurs possibles : {ENGINE_PANDAS}, {ENGINE_PYARROW}, {ENGINE_AUTO}")
+
+    if engine == ENGINE_AUTO:
+        engine = ENGINE_DEFAUT
+
+    if engine == ENGINE_PANDAS:
+        return ENGINE_PANDAS
+
+    if pa_csv is None:
+        if engine == ENGINE_PYARROW:
+            print_debug_info(debug, 0, "pyarrow n'est pas installé : lecture de TAXREF avec pandas.")
+        return ENGINE_PANDAS
+
+    return ENGINE_PYARROW
+
+def get_lecteur_taxref(engine: str=ENGINE_AUTO, debug: int=0):
+    """
+    Renvoie la fonction de lecture du fichier TAXREF correspondant au moteur demandé
+    (`lire_taxref_pyarrow` ou `lire_taxref_pandas`).
+    """
+
+    engine = get_engine(engine, debug=debug)
+    print_debug_info(debug, 1, f"Lecture de TAXREF avec le moteur {engine}")
+
+    return lire_taxref_pyarrow if engine == ENGINE_PYARROW else lire_taxref_pandas
+
+def get_budget_morceau(memory_budget: int=None, processes: int=0, queue_depth: int=None)->int:
+    """
+    Répartit la part du budget mémoire réservée aux morceaux entre les morceaux présents en même temps :
+    celui en cours de lecture et ceux en file dans les processus de travail.
+
+    Args:
+        memory_budget (int, optional): Budget mémoire total en octets (None : pas de budget).
+        processes (int, optional): Nombre de processus de travail. Par défaut, 0.
+        queue_depth (int, optional): Nombre maximal de morceaux en file. Par défaut, deux fois `processes`.
+
+    Returns:
+        int: Taille visée d'un morceau en octets, ou None sans budget.
+    """
+
+    if not memory_budget:
+        return None
+
+    en_file = (queue_depth or 2 * processes) if processes > 1 else 0
+
+    return int(memory_budget * PART_BUDGET_MORCEAUX / (1 + en_file))
+
+def get_chunksize(budget_morceau: int, octets_par_ligne: float, chunksize: int=50000)->int:
+    """
+    Calcule le nombre de lignes du prochain morceau à partir de la taille mesurée d'une ligne.
+
+    Args:
+        budget_morceau (int): Taille visée d'un morceau en octets (None : `chunksize`).
+        octets_par_ligne (float): Taille mesurée d'une ligne en mémoire.
+        chunksize (int, optional): Nombre de lignes sans budget. Par défaut, 50 000.
+
+    Returns:
+        int: Le nombre de lignes, au moins `LIGNES_MIN`.
+    """
+
+    if not budget_morceau or not octets_par_ligne:
+        return chunksize
+
+    return max(LIGNES_MIN, int(budget_morceau / octets_par_ligne))
+
+def regrouper_batches(batches, budget_morceau: int):
+    """
+    Regroupe des lots pyarrow en morceaux pandas d'environ `budget_morceau` octets,
+    mesurés sur les lots eux-mêmes.
+
+    Args:
+        batches (Iterable[pa.RecordBatch]): Les lots lus.
+        budget_morceau (int): Taille visée d'un morceau en octets.
+
+    Yields:
+        pd.DataFrame: Les morceaux successifs.
+    """
+
+    lots = []
+    taille = 0
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        lots.append(batch)
+        taille += batch.nbytes
+        if taille >= budget_morceau:
+            yield pa.Table.from_batches(lots).to_pandas()
+            lots = []
+            taille = 0
+
+    if lots:
+        yield pa.Table.from_batches(lots).to_pandas()
+
+def lire_taxref_pandas(file: io.TextIOBase,
+                       taxons: List[TaxonGroupe],
+                       synonyme: bool=False,
+                       synonym_table: bool=False,
+                       chunksize: int=50000,
+                       budget_morceau: int=None):
+    """
+    Lit le fichier TAXREF par morceaux avec le lecteur C de pandas.
+    Avec un budget, la taille de chaque morceau est recalculée à partir de la taille
+    des lignes mesurée sur le morceau précédent (le premier, de `LIGNES_SONDE` lignes, sert de mesure).
+
+    Args:
+        file (io.TextIOBase): Le fichier TAXREF ouvert en lecture texte.
+        taxons (list): Liste d'objets TaxonGroupe (pour la sélection des colonnes).
+        synonyme (bool, optional): Si True, les synonymes sont inclus. Par défaut, False.
+        synonym_table (bool, optional): Si True, lit aussi les colonnes des tables Synonymes. Par défaut, False.
+        chunksize (int, optional): Nombre de lignes par morceau. Par défaut, 50 000.
+        budget_morceau (int, optional): Taille visée d'un morceau en mémoire, en octets.
+            Par défaut, None (morceaux de `chunksize` lignes).
+
+    Yields:
+        pd.DataFrame: Les morceaux successifs du fichier.
+    """
+
+    # Seules les colonnes utiles aux filtres et aux couches Liste sont lues,
+    # les colonnes à faible cardinalité sont encodées en catégories dès la lecture
+    options = dict(delimiter='\t', dtype=get_types_colonnes(),
+                   usecols=get_colonnes_utiles(taxons, synonyme=synonyme, synonym_table=synonym_table))
+
+    if not budget_morceau:
+        for chunk in pd.read_csv(file, chunksize=chunksize, **options):
+            yield chunk
+        return
+
+    with pd.read_csv(file, iterator=True, **options) as reader:
+        nombre_lignes = min(chunksize, LIGNES_SONDE)
+        while True:
+            try:
+                chunk = reader.get_chunk(nombre_lignes)
+            except StopIteration:
+                return
+            yield chunk
+            if len(chunk):
+                octets_par_ligne = chunk.memory_usage(deep=True).sum() / len(chunk)
+                nombre_lignes = get_chunksize(budget_morceau, octets_par_ligne, chunksize)
+
+def lire_taxref_pyarrow(file: io.TextIOBase,
+                        taxons: List[TaxonGroupe],
+                        synonyme: bool=False,
+                        synonym_table: bool=False,
+                        chunksize: int=50000,
+                        budget_morceau: int=None):
+    """
+    Lit le fichier TAXREF avec le lecteur CSV colonnaire et multithread de pyarrow,
+    puis le restitue en morceaux pandas identiques à ceux de `lire_taxref_pandas`.
+    Avec un budget, le fichier est lu en flux plutôt qu'en entier, et les lots sont regroupés
+    en morceaux d'environ `budget_morceau` octets.
+
+    Args:
+        file (io.TextIOBase): Le fichier TAXREF ouvert en lecture texte.
+        taxons (list): Liste d'objets TaxonGroupe (pour la sélection des colonnes).
+        synonyme (bool, optional): Si True, les synonymes sont inclus. Par défaut, False.
+        synonym_table (bool, optional): Si True, lit aussi les colonnes des tables Synonymes. Par défaut, False.
+        chunksize (int, optional): Nombre de lignes par morceau. Par défaut, 50 000.
+        budget_morceau (int, optional): Taille visée d'un morceau en mémoire, en octets.
+            Par défaut, None (fichier lu en entier, puis morceaux de `chunksize` lignes).
+
+    Yields:
+        pd.DataFrame: Les morceaux successifs du fichier.
+    """
+
+    # pyarrow lit le flux binaire sous-jacent ; l'en-tête est lu à part pour projeter les colonnes
+    binary_file = file.buffer
+    noms_colonnes = binary_file.readline().decode('utf-8').rstrip('\r\n').split('\t')
+
+    selecteur = get_colonnes_utiles(taxons, synonyme=synonyme, synonym_table=synonym_table)
+    colonnes = [colonne for colonne in noms_colonnes if selecteur(colonne)]
+
+    parse_options = pa_csv.ParseOptions(delimiter='\t')
+    convert_options = pa_csv.ConvertOptions(column_types=get_types_pyarrow(colonnes),
+                                            include_columns=colonnes,
+                                            null_values=VALEURS_MANQUANTES,
+                                            strings_can_be_null=True)
+
+    if budget_morceau:
+        # Lecture en flux par blocs, au plus de la taille d'un morceau
+        block_size = max(1 << 20, min(16 << 20, budget_morceau))
+        reader = pa_csv.open_csv(
+            binary_file,
+            read_options=pa_csv.ReadOptions(column_names=noms_colonnes, use_threads=True, block_size=block_size),
+            parse_options=parse_options,
+            convert_options=convert_options)
+        yield from regrouper_batches(reader, budget_morceau)
+        return
+
+    table = pa_csv.read_csv(
+        binary_file,
+        read_options=pa_csv.ReadOptions(column_names=noms_colonnes, use_threads=True),
+        parse_options=parse_options,
+        convert_options=convert_options)
+
+    for batch in table.to_batches(max_chunksize=chunksize):
+        yield batch.to_pandas()
+
+def get_types_pyarrow(colonnes: List[str])->dict:
+    """
+    Renvoie les types pyarrow des colonnes lues : dictionnaire pour les colonnes catégorielles,
+    texte pour les autres (comme `get_types_colonnes` pour pandas).
+    """
+
+    return {colonne: pa.dictionary(pa.int32(), pa.string()) if colonne in COLONNES_CATEGORIELLES else pa.string()
+            for colonne in colonnes}
+
+def get_chemin_cache_taxref(version: int)->str:
+    """
+    Renvoie le chemin du cache Parquet de TAXREF pour une version donnée.
+
+    Args:
+        version (int): La version de la base de données TAXREF.
+
+    Returns:
+        str: Le chemin du fichier TAXREFv{version}.parquet dans le dossier de cache du plugin.
+    """
+
+    return os.path.join(get_cache_dir("taxref"), f"TAXREFv{version}.parquet")
+
+def taxref_en_cache(version: int, colonnes: List[str]=None)->bool:
+    """
+    Indique si TAXREF est déjà en cache pour cette version (et si pyarrow peut le lire).
+
+    Args:
+        version (int): La version de la base de données TAXREF.
+        colonnes (list, optional): Colonnes que le cache doit contenir. Un cache écrit avant l'ajout
+            de l'une d'elles (par exemple LB_NOM pour les tables Synonymes) est considéré comme absent,
+            pour que l'archive soit téléchargée et le cache refait. Par défaut, None.
+
+    Returns:
+        bool: True si le cache existe et contient toutes les colonnes demandées.
+    """
+
+    chemin_cache = get_chemin_cache_taxref(version)
+    if pa_ds is None or not os.path.isfile(chemin_cache):
+        return False
+
+    return not colonnes or set(colonnes).issubset(pa_pq.read_schema(chemin_cache).names)
+
+def ecrire_cache_taxref(file: io.TextIOBase,
+                        chemin_cache: str,
+                        block_size: int=16 << 20,
+                        suivi=None)->None:
+    """
+    Lit tout le fichier TAXREF en flux et l'enregistre au format Parquet compressé.
+    Seules les colonnes utiles aux couches Liste et Synonymes et aux filtres des taxons sont conservées ;
+    toutes les lignes le sont, pour servir à n'importe quelle sélection de taxons.
+    Le fichier est écrit sous un nom temporaire puis renommé : un cache interrompu n'est jamais lu.
+
+    Args:
+        file (io.TextIOBase): Le fichier TAXREF ouvert en lecture texte.
+        chemin_cache (str): Le chemin du fichier Parquet à écrire.
+        block_size (int, optional): Taille en octets des blocs lus (et des groupes de lignes écrits).
+            Par défaut, 16 Mo.
+        suivi (SuiviProgression, optional): Compteurs de progression, mis à jour à chaque bloc.
+            Par défaut, None.
+    """
+
+    binary_file = file.buffer
+    noms_colonnes = binary_file.readline().decode('utf-8').rstrip('\r\n').split('\t')
+    colonnes = [colonne for colonne in noms_colonnes
+                if colonne not in COLONNES_A_SUPPRIMER or colonne in COLONNES_FILTRE or colonne in COLONNES_SYNONYMES]
+
+    reader = pa_csv.open_csv(
+        binary_file,
+        read_options=pa_csv.ReadOptions(column_names=noms_colonnes, use_threads=True, block_size=block_size),
+        parse_options=pa_csv.ParseOptions(delimiter='\t'),
+        convert_options=pa_csv.ConvertOptions(column_types=get_types_pyarrow(colonnes),
+                                              include_columns=colonnes,
+                                              null_values=VALEURS_MANQUANTES,
+                                              strings_can_be_null=True))
+
+    chemin_temporaire = chemin_cache + ".part"
+    try:
+        with pa_pq.ParquetWriter(chemin_temporaire, reader.schema, compression="zstd") as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                if suivi is not None:
+                    suivi.lignes_lues += batch.num_rows
+                    suivi.emettre()
+        os.replace(chemin_temporaire, chemin_cache)
+    finally:
+        if os.path.exists(chemin_temporaire):
+            os.remove(chemin_temporaire)
+
+def get_filtre_cache(taxons: List[TaxonGroupe], synonyme: bool=False):
+    """
+    Traduit les critères des taxons en expression de filtre pyarrow, évaluée à la lecture du cache :
+    les groupes de lignes dont les statistiques excluent tous les taxons ne sont pas lus.
+    Le classificateur reste appliqué ensuite ; ce filtre ne sert qu'à limiter la lecture.
+
+    Args:
+        taxons (list): Liste d'objets TaxonGroupe.
+        synonyme (bool, optional): Si True, les synonymes sont inclus. Par défaut, False.
+
+    Returns:
+        pyarrow.compute.Expression: Le filtre des lignes à lire.
+    """
+
+    filtre_taxons = None
+    for taxon in taxons:
+        filtre = pa_ds.field('FR').isin(ClassificateurTaxons.presences)
+        for colonne, valeurs in taxon.criteres().items():
+            if valeurs is not None:
+                filtre &= pa_ds.field(colonne).isin(valeurs)
+        filtre_taxons = filtre if filtre_taxons is None else filtre_taxons | filtre
+
+    if not synonyme:
+        filtre_taxons &= pa_ds.field('CD_NOM') == pa_ds.field('CD_REF')
+
+    return filtre_taxons
+
+def lire_taxref_cache(chemin_cache: str,
+                      taxons: List[TaxonGroupe],
+                      synonyme: bool=False,
+                      synonym_table: bool=False,
+                      chunksize: int=50000,
+                      budget_morceau: int=None):
+    """
+    Lit le cache Parquet de TAXREF en ne chargeant que les colonnes utiles
+    et les lignes susceptibles d'appartenir aux taxons demandés.
+
+    Args:
+        chemin_cache (str): Le chemin du fichier Parquet.
+        taxons (list): Liste d'objets TaxonGroupe.
+        synonyme (bool, optional): Si True, les synonymes sont inclus. Par défaut, False.
+        synonym_table (bool, optional): Si True, lit aussi les synonymes et les colonnes des tables Synonymes.
+            Par défaut, False.
+        chunksize (int, optional): Nombre maximal de lignes par morceau. Par défaut, 50 000.
+        budget_morceau (int, optional): Taille visée d'un morceau en mémoire, en octets : les lots lus
+            (de `LIGNES_SONDE` lignes au plus) sont regroupés jusqu'à cette taille. Par défaut, None.
+
+    Yields:
+        pd.DataFrame: Les morceaux successifs, avec les mêmes colonnes que `lire_taxref_pandas`.
+    """
+
+    dataset = pa_ds.dataset(chemin_cache, format="parquet")
+    selecteur = get_colonnes_utiles(taxons, synonyme=synonyme, synonym_table=synonym_table)
+    colonnes = [colonne for colonne in dataset.schema.names if selecteur(colonne)]
+
+    # Les tables Synonymes ont besoin de toutes les lignes des taxons, synonymes compris
+    filtre = get_filtre_cache(taxons, synonyme=synonyme or synonym_table)
+
+    vide = True
+    if budget_morceau:
+        batches = dataset.to_batches(columns=colonnes, filter=filtre, batch_size=min(chunksize, LIGNES_SONDE))
+        for chunk in regrouper_batches(batches, budget_morceau):
+            vide = False
+            yield chunk
+    else:
+        for batch in dataset.to_batches(columns=colonnes, filter=filtre,
+                                        batch_size=chunksize):
+            if batch.num_rows:
+                vide = False
+                yield batch.to_pandas()
+
+    # Un morceau vide garde les colonnes des couches si aucune ligne n'a été retenue
+    if vide:
+        yield dataset.schema.empty_table().select(colonnes).to_pandas()
+
+def traiter_chunk(chunk: pd.DataFrame,
+                  classificateur: ClassificateurTaxons,
+                  version: int,
+                  synonyme: bool=False,
+                  synonym_table: bool=False)->tuple:
+    """
+    Répartit un morceau de TAXREF entre les taxons et supprime les colonnes inutiles.
+    Fonction de module pour pouvoir être exécutée dans un processus de travail.
+
+    Args:
+        chunk (pd.DataFrame): Le morceau de TAXREF à traiter.
+        classificateur (ClassificateurTaxons): Le classificateur des taxons demandés.
+        version (int): La version de la base de données TAXREF.
+        synonyme (bool, optional): Si True, inclut les synonymes. Par défaut, False.
+        synonym_table (bool, optional): Si True, extrait aussi les lignes des tables Synonymes
+            (tous les noms des taxons, synonymes compris) dans la même passe. Par défaut, False.
+
+    Returns:
+        tuple (dict, dict): Pour chaque titre de taxon, les lignes retenues du morceau
+            pour la couche Liste, et pour la table Synonymes (vide si `synonym_table` est False).
+
+    Raises:
+        TypeError: Si le morceau reçu n'est pas un DataFrame.
+    """
+
+    # Vérifier que chaque morceau est bien un DataFrame
+    if not isinstance(chunk, pd.DataFrame):
+        raise TypeError(f"TriLignes attend un DataFrame, mais a reçu {type(chunk)}")
+
+    listes = {}
+    synonymes = {}
+    for title, taxon_chunk in classificateur.repartir(chunk, synonyme=synonyme or synonym_table).items():
+        if synonym_table:
+            synonymes[title] = taxon_chunk[COLONNES_SYNONYMES]
+            # La couche Liste ne garde les synonymes que si ils sont demandés
+            if not synonyme:
+                taxon_chunk = taxon_chunk[taxon_chunk['CD_NOM'] == taxon_chunk['CD_REF']]
+        listes[title] = tri_colonnes(taxon_chunk, version=version)
+
+    return listes, synonymes
+
+def get_python_executable()->str:
+    """
+    Renvoie l'interpréteur Python à utiliser pour lancer des processus de travail.
+    Dans QGIS, `sys.executable` désigne souvent l'exécutable de QGIS lui-même :
+    l'interpréteur est alors cherché dans `sys.exec_prefix`.
+
+    Returns:
+        str: Le chemin de l'interpréteur, ou None s'il n'a pas été trouvé.
+    """
+
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+
+    noms = ["python.exe", "pythonw.exe"] if os.name == "nt" else ["python3", "python"]
+    for dossier in (sys.exec_prefix, os.path.join(sys.exec_prefix, "bin")):
+        for nom in noms:
+            candidat = os.path.join(dossier, nom)
+            if os.path.isfile(candidat):
+                return candidat
+
+    return None
+
+def traiter_chunks(chunks,
+                   classificateur: ClassificateurTaxons,
+                   version: int,
+                   synonyme: bool=False,
+                   processes: int=0,
+                   queue_depth: int=None,
+                   debug: int=0,
+                   synonym_table: bool=False):
+    """
+    Applique `traiter_chunk` à une suite de morceaux, dans ce processus ou dans un groupe de processus.
+
+    En mode parallèle, les processus sont lancés par "spawn" (jamais par "fork", dangereux
+    dans un processus Qt multithread comme QGIS) avec l'interpréteur de `get_python_executable`.
+    Au plus `queue_depth` morceaux sont en cours de traitement à la fois, ce qui borne la mémoire,
+    et les résultats sont rendus dans l'ordre du fichier.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Les morceaux de TAXREF.
+        classificateur (ClassificateurTaxons): Le classificateur des taxons demandés.
+        version (int): La version de la base de données TAXREF.
+        synonyme (bool, optional): Si True, inclut les synonymes. Par défaut, False.
+        processes (int, optional): Nombre de processus de travail ; 0 ou 1 pour traiter
+            les morceaux dans ce processus. Par défaut, 0.
+        queue_depth (int, optional): Nombre maximal de morceaux en cours de traitement.
+            Par défaut, deux fois le nombre de processus.
+        debug (int, optional): Niveau de débogage. Par défaut, 0.
+        synonym_table (bool, optional): Si True, extrait aussi les tables Synonymes. Par défaut, False.
+
+    Yields:
+        tuple (dict, dict): Pour chaque morceau, les lignes retenues de chaque taxon
+            pour la couche Liste et pour la table Synonymes.
+    """
+
+    python_executable = get_python_executable() if processes > 1 else None
+    if processes > 1 and python_executable is None:
+        print_debug_info(debug, 0, "Interpréteur Python introuvable : traitement de TAXREF sans processus de travail.")
+
+    # Traitement séquentiel
+    if python_executable is None:
+        for chunk in chunks:
+            yield traiter_chunk(chunk, classificateur, version, synonyme=synonyme, synonym_table=synonym_table)
+        return
+
+    queue_depth = queue_depth or 2 * processes
+    print_debug_info(debug, 1, f"Traitement de TAXREF sur {processes} processus ({queue_depth} morceaux en file au plus)")
+
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(python_executable)
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        # File bornée des morceaux en cours, dans l'ordre du fichier
+        en_cours = deque()
+        for chunk in chunks:
+            if len(en_cours) >= queue_depth:
+                yield en_cours.popleft().result()
+            en_cours.append(executor.submit(traiter_chunk, chunk, classificateur, version, synonyme, synonym_table))
+
+        while en_cours:
+            yield en_cours.popleft().result()
+
+def trier_taxref(file: io.TextIOBase,
+                 version: int,
+                 taxons: List[TaxonGroupe],
+                 synonyme: bool=False,
+                 engine: str=ENGINE_PANDAS,
+                 processes: int=0,
+                 queue_depth: int=None,
+                 debug: int=0,
+                 synonym_table: bool=False,
+                 memory_budget: int=None):
+    """
+    Lit le fichier TAXREF une seule fois et répartit ses lignes entre les taxons demandés.
+
+    Args:
+        file (io.TextIOBase): Le fichier TAXREF ouvert en lecture texte.
+        version (int): La version de la base de données TAXREF.
+        taxons (list): Liste d'objets TaxonGroupe.
+        synonyme (bool, optional): Si True, inclut les synonymes dans les résultats. Par défaut, False.
+        engine (str, optional): Moteur de lecture, "pandas", "pyarrow" ou "auto". Par défaut, "pandas".
+        processes (int, optional): Nombre de processus de travail pour le tri des morceaux
+            (0 ou 1 : pas de processus de travail). Par défaut, 0.
+        queue_depth (int, optional): Nombre maximal de morceaux envoyés aux processus
+            et non encore récupérés. Par défaut, deux fois `processes`.
+        debug (int, optional): Niveau de débogage. Par défaut, 0.
+        synonym_table (bool, optional): Si True, construit aussi les tables Synonymes. Par défaut, False.
+        memory_budget (int, optional): Budget mémoire du tri en octets (voir `iter_couches_taxref`).
+            Par défaut, None.
+
+    Returns:
+        dict: Pour chaque titre de taxon, le DataFrame prêt à être enregistré dans la couche Liste.
+            Si `synonym_table` est True, un tuple (dict des couches Liste, dict des tables Synonymes).
+
+    Raises:
+        TypeError: Si le type de données reçu dans un chunk n'est pas un DataFrame.
+    """
+
+    lire_taxref = get_lecteur_taxref(engine, debug=debug)
+
+    chunks = lire_taxref(file, taxons, synonyme=synonyme, synonym_table=synonym_table,
+                         budget_morceau=get_budget_morceau(memory_budget, processes, queue_depth))
+    return trier_chunks(chunks, version, taxons, synonyme=synonyme,
+                        processes=processes, queue_depth=queue_depth, debug=debug,
+                        synonym_table=synonym_table, memory_budget=memory_budget)
+
+class TamponResultats():
+    """
+    Lignes triées en attente d'assemblage, rangées par couche.
+
+    Sans budget, les morceaux restent en mémoire jusqu'à l'assemblage de leur couche.
+    Avec un budget, dès que les morceaux en attente le dépassent, ceux de chaque couche
+    sont concaténés et ajoutés à un fichier Parquet temporaire propre à la couche,
+    relu à l'assemblage : la mémoire occupée reste bornée quel que soit le nombre de lignes.
+    """
+
+    def __init__(self, budget: int=None, debug: int=0):
+        """
+        Initialisation d'une instance de TamponResultats
+
+        :param:
+        budget (int): taille maximale en octets des morceaux gardés en mémoire (None : pas de limite)
+        debug (int): niveau de debug
+        """
+
+        if budget and pa_pq is None:
+            print_debug_info(debug, 0, "pyarrow n'est pas installé : les résultats du tri restent en mémoire.")
+            budget = None
+
+        self.budget = budget
+        self.debug = debug
+        self.frames = defaultdict(list)
+        self.taille = 0
+        self.dossier = None
+        self.writers = {}
+        self.chemins = {}
+        self.types = {}
+
+    def ajouter(self, cle: str, frame: pd.DataFrame)->None:
+        """
+        Ajoute un morceau trié à une couche, et déverse les morceaux en attente si le budget est dépassé.
+        """
+
+        self.frames[cle].append(frame)
+        if self.budget:
+            self.taille += int(frame.memory_usage(deep=True).sum())
+            if self.taille > self.budget:
+                self.deverser()
+
+    def deverser(self)->None:
+        """
+        Ajoute les morceaux en attente de chaque couche à son fichier temporaire.
+        Le premier morceau de chaque couche est gardé (vide) pour conserver les colonnes.
+        """
+
+        if self.dossier is None:
+            self.dossier = tempfile.mkdtemp(prefix="AutoUpdateTAXREF_")
+
+        print_debug_info(self.debug, 2, f"Tri de TAXREF : {self.taille} octets déversés sur le disque")
+
+        for cle, frames in self.frames.items():
+            frames_non_vides = [frame for frame in frames if not frame.empty]
+            if not frames_non_vides:
+                continue
+            df = concat_categoriel(frames_non_vides)
+
+            writer = self.writers.get(cle)
+            if writer is None:
+                # Types d'origine, pour les rétablir à la relecture
+                self.types[cle] = df.dtypes
+                self.chemins[cle] = os.path.join(self.dossier, f"couche_{len(self.chemins)}.parquet")
+                table = pa.Table.from_pandas(vers_types_fichier(df), preserve_index=False)
+                writer = self.writers[cle] = pa_pq.ParquetWriter(self.chemins[cle], table.schema)
+            else:
+                table = pa.Table.from_pandas(vers_types_fichier(df), schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+
+            self.frames[cle] = [frames[0].iloc[:0]]
+
+        self.taille = 0
+
+    def extraire(self, cle: str)->pd.DataFrame:
+        """
+        Assemble et retire une couche : lignes déversées sur le disque puis lignes en mémoire,
+        dans l'ordre du fichier, avec les catégories unifiées.
+        """
+
+        frames = self.frames.pop(cle, [])
+        writer = self.writers.pop(cle, None)
+        if writer is not None:
+            writer.close()
+            chemin = self.chemins.pop(cle)
+            deverses = pa_pq.read_table(chemin).to_pandas(ignore_metadata=True)
+            os.remove(chemin)
+            frames = [depuis_types_fichier(deverses, self.types.pop(cle))] + frames
+
+        frames_non_vides = [frame for frame in frames if not frame.empty]
+
+        return concat_categoriel(frames_non_vides if frames_non_vides else frames[:1])
+
+    def fermer(self)->None:
+        """
+        Ferme et supprime les fichiers temporaires restants.
+        """
+
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+        self.frames.clear()
+        if self.dossier is not None:
+            shutil.rmtree(self.dossier, ignore_errors=True)
+            self.dossier = None
+
+def vers_types_fichier(df: pd.DataFrame)->pd.DataFrame:
+    """
+    Convertit les colonnes textuelles et catégorielles en chaînes pour l'écriture en Parquet :
+    le schéma du fichier reste le même d'un morceau à l'autre, même pour une colonne vide.
+    """
+
+    return df.astype({colonne: "string" for colonne in df.columns
+                      if not pd.api.types.is_numeric_dtype(df[colonne].dtype)})
+
+def depuis_types_fichier(df: pd.DataFrame, types: pd.Series)->pd.DataFrame:
+    """
+    Rétablit les types d'origine des colonnes relues (inverse de `vers_types_fichier`).
+    """
+
+    for colonne, dtype in types.items():
+        serie = df[colonne]
+        cible = dtype.categories.dtype if isinstance(dtype, pd.CategoricalDtype) else dtype
+        if cible == object:
+            serie = serie.astype(object).where(serie.notna(), np.nan)
+        else:
+            serie = serie.astype(cible)
+        df[colonne] = serie.astype("category") if isinstance(dtype, pd.CategoricalDtype) else serie
+
+    return df
+
+class SuiviProgression():
+    """
+    Compteurs de progression du tri de TAXREF : octets consommés dans le fichier lu,
+    lignes lues, lignes retenues par taxon, couches et lignes écrites, durée de chaque étape.
+
+    Les compteurs sont transmis à un rappel `rappel(pourcentage, message)` au plus une fois
+    toutes les `intervalle` secondes, pour ne pas ralentir la boucle de lecture.
+    À chaque mise à jour, la fonction `interruption` est consultée : si elle renvoie True,
+    le tri s'arrête sur une InterruptedError (annulation demandée par l'utilisateur.rice).
+    La lecture compte pour `part_lecture` du pourcentage, l'enregistrement des couches pour le reste.
+    """
+
+    part_lecture = 0.8
+
+    def __init__(self, rappel=None, intervalle: float=0.25, debug: int=0, interruption=None):
+        """
+        Initialisation d'une instance de SuiviProgression
+
+        :param:
+        rappel (callable): fonction appelée avec (pourcentage, message), ou None
+        intervalle (float): délai minimal entre deux appels du rappel, en secondes
+        debug (int): niveau de debug
+        interruption (callable): fonction renvoyant True si le tri doit s'arrêter, ou None
+        """
+
+        self.rappel = rappel
+        self.interruption = interruption
+        self.intervalle = intervalle
+        self.debug = debug
+
+        # Fonction renvoyant (octets consommés, octets à lire) du fichier en cours de lecture
+        self.position = None
+        self.fraction_lecture = 0.0
+        self.lignes_lues = 0
+        self.lignes_par_taxon = defaultdict(int)
+        self.couches_total = 0
+        self.couches_ecrites = 0
+        self.lignes_ecrites = 0
+
+        self.etape = ""
+        self.debut_etape = time.monotonic()
+        self.durees = {}
+        self.dernier_appel = 0.0
+
+    def commencer(self, etape: str, position=None)->None:
+        """
+        Commence une étape (lecture, mise en cache, enregistrement d'une couche...) et mesure la précédente.
+        """
+
+        self.terminer()
+        self.etape = etape
+        self.debut_etape = time.monotonic()
+        # Les lignes lues sont comptées par étape (mise en cache, puis lecture du cache)
+        self.lignes_lues = 0
+        if position is not None:
+            self.position = position
+        self.emettre(force=True)
+
+    def terminer(self)->None:
+        """
+        Termine l'étape en cours et enregistre sa durée.
+        """
+
+        if self.etape:
+            duree = time.monotonic() - self.debut_etape
+            self.durees[self.etape] = self.durees.get(self.etape, 0.0) + duree
+            print_debug_info(self.debug, 1, f"{self.etape} : {duree:.1f} s")
+        self.etape = ""
+
+    def compter(self, chunks):
+        """
+        Enveloppe une suite de morceaux lus pour compter leurs lignes.
+        """
+
+        for chunk in chunks:
+            self.lignes_lues += len(chunk)
+            self.emettre()
+            yield chunk
+
+    def router(self, chunk_frames: dict)->None:
+        """
+        Compte les lignes d'un morceau retenues pour chaque taxon.
+        """
+
+        for title, taxon_chunk in chunk_frames.items():
+            self.lignes_par_taxon[title] += len(taxon_chunk)
+        self.emettre()
+
+    def lecture_terminee(self)->None:
+        """
+        Marque la fin de la lecture (y compris depuis le cache, dont la position n'est pas suivie).
+        """
+
+        self.position = None
+        self.fraction_lecture = 1.0
+
+    def ecrire(self, nombre_lignes: int)->None:
+        """
+        Compte une couche enregistrée.
+        """
+
+        self.couches_ecrites += 1
+        self.lignes_ecrites += nombre_lignes
+        self.emettre(force=True)
+
+    def get_pourcentage(self)->int:
+        """
+        Renvoie la progression totale en pourcentage.
+        """
+
+        if self.position is not None:
+            octets_lus, octets_total = self.position()
+            if octets_total:
+                self.fraction_lecture = max(self.fraction_lecture, min(1.0, octets_lus / octets_total))
+
+        fraction_ecriture = self.couches_ecrites / self.couches_total if self.couches_total else 0.0
+
+        return int(100 * (self.part_lecture * self.fraction_lecture + (1 - self.part_lecture) * fraction_ecriture))
+
+    def get_message(self)->str:
+        """
+        Renvoie le texte décrivant l'étape en cours et ses compteurs.
+        """
+
+        lignes_retenues = sum(self.lignes_par_taxon.values())
+        if self.couches_ecrites or self.etape.startswith("Enregistrement"):
+            return (f"{self.etape} ({self.couches_ecrites}/{self.couches_total} couches, "
+                    f"{self.lignes_ecrites} lignes écrites)")
+
+        return f"{self.etape} ({self.lignes_lues} lignes lues, {lignes_retenues} retenues)"
+
+    def emettre(self, force: bool=False)->None:
+        """
+        Transmet la progression au rappel, au plus une fois par intervalle sauf si `force` est True.
+
+        :raise:
+        InterruptedError: si l'arrêt du tri a été demandé
+        """
+
+        if self.interruption is not None and self.interruption():
+            raise InterruptedError("Tri de TAXREF annulé")
+
+        if self.rappel is None:
+            return
+
+        maintenant = time.monotonic()
+        if not force and maintenant - self.dernier_appel < self.intervalle:
+            return
+        self.dernier_appel = maintenant
+
+        self.rappel(self.get_pourcentage(), self.get_message())
+
+def iter_couches_taxref(chunks,
+                        version: int,
+                        taxons: List[TaxonGroupe],
+                        synonyme: bool=False,
+                        processes: int=0,
+                        queue_depth: int=None,
+                        debug: int=0,
+                        synonym_table: bool=False,
+                        memory_budget: int=None,
+                        suivi: SuiviProgression=None):
+    """
+    Répartit les morceaux de TAXREF entre les taxons demandés, puis rend les couches une à une,
+    pour qu'elles soient enregistrées au fur et à mesure : une seule couche assemblée est en mémoire à la fois.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Les morceaux lus depuis le fichier ou le cache de TAXREF.
+        version (int): La version de la base de données TAXREF.
+        taxons (list): Liste d'objets TaxonGroupe.
+        synonyme (bool, optional): Si True, inclut les synonymes dans les résultats. Par défaut, False.
+        processes (int, optional): Nombre de processus de travail pour le tri des morceaux. Par défaut, 0.
+        queue_depth (int, optional): Nombre maximal de morceaux en attente dans les processus.
+        debug (int, optional): Niveau de débogage. Par défaut, 0.
+        synonym_table (bool, optional): Si True, construit aussi les tables Synonymes
+            (CD_NOM, CD_REF, LB_NOM, une ligne par CD_NOM). Par défaut, False.
+        memory_budget (int, optional): Budget mémoire du tri en octets : au-delà de la part réservée
+            aux morceaux, les lignes triées en attente sont déversées sur le disque (voir `TamponResultats`).
+            Par défaut, None (tout reste en mémoire).
+        suivi (SuiviProgression, optional): Compteurs de progression, mis à jour à chaque morceau.
+            Par défaut, None.
+
+    Yields:
+        tuple (TaxonGroupe, pd.DataFrame, pd.DataFrame): Le taxon, sa couche Liste,
+            et sa table Synonymes (None si `synonym_table` est False).
+    """
+
+    budget_resultats = int(memory_budget * (1 - PART_BUDGET_MORCEAUX)) if memory_budget else None
+    tampon = TamponResultats(budget_resultats, debug=debug)
+
+    # Critères de tous les taxons compilés en un seul classificateur
+    classificateur = ClassificateurTaxons(taxons)
+
+    if suivi is not None:
+        chunks = suivi.compter(chunks)
+
+    try:
+        # Traitement par morceaux pour éviter les problèmes de mémoire,
+        # chaque morceau étant réparti entre les taxons demandés en une seule passe
+        for chunk_frames, chunk_synonymes in traiter_chunks(chunks, classificateur, version, synonyme=synonyme,
+                                                            processes=processes, queue_depth=queue_depth, debug=debug,
+                                                            synonym_table=synonym_table):
+            for title, taxon_chunk in chunk_frames.items():
+                tampon.ajouter(f"Liste {title}", taxon_chunk)
+            for title, taxon_chunk in chunk_synonymes.items():
+                tampon.ajouter(f"Synonymes {title}", taxon_chunk)
+            if suivi is not None:
+                suivi.router(chunk_frames)
+
+        if suivi is not None:
+            suivi.lecture_terminee()
+
+        for taxon in taxons:
+            # Combiner les morceaux filtrés en un seul DataFrame,
+            # puis supprimer les noms vernaculaires doubles ou vides pour certains taxons
+            df_liste = supprime_nom_vernaculaire(df=tampon.extraire(f"Liste {taxon.title}"), taxon=taxon)
+
+            df_synonymes = None
+            if synonym_table:
+                df_synonymes = (tampon.extraire(f"Synonymes {taxon.title}")
+                                .drop_duplicates(subset="CD_NOM")
+                                .reset_index(drop=True))
+
+            yield taxon, df_liste, df_synonymes
+    finally:
+        tampon.fermer()
+
+def trier_chunks(chunks,
+                 version: int,
+                 taxons: List[TaxonGroupe],
+                 synonyme: bool=False,
+                 processes: int=0,
+                 queue_depth: int=None,
+                 debug: int=0,
+                 synonym_table: bool=False,
+                 memory_budget: int=None):
+    """
+    Répartit les morceaux de TAXREF entre les taxons demandés et assemble toutes les couches Liste
+    (voir `iter_couches_taxref` pour les paramètres).
+
+    Returns:
+        dict: Pour chaque titre de taxon, le DataFrame prêt à être enregistré dans la couche Liste.
+            Si `synonym_table` est True, un tuple (dict des couches Liste, dict des tables Synonymes).
+    """
+
+    resultats = {}
+    synonymes = {}
+    for taxon, df_liste, df_synonymes in iter_couches_taxref(chunks, version, taxons, synonyme=synonyme,
+                                                             processes=processes, queue_depth=queue_depth,
+                                                             debug=debug, synonym_table=synonym_table,
+                                                             memory_budget=memory_budget):
+        resultats[taxon.title] = df_liste
+        synonymes[taxon.title] = df_synonymes
+
+    if not synonym_table:
+        return resultats
+
+    return resultats, synonymes
+
 def tri_taxon_taxref(temp_zip_path:str,
                         version:int,
                         taxons: List[TaxonGroupe],
                         save_path:str,
                         synonyme:bool=False,
-                        debug: int=0):
+                        debug: int=0,
+                        stream: bool=True,
+                        engine: str=ENGINE_PANDAS,
+                        processes: int=0,
+                        queue_depth: int=None,
+                        cache: bool=True,
+                        delete_archive: bool=True,
+                        synonym_table: bool=False,
+                        memory_budget: int=None,
+                        progress_callback=None,
+                        flux=None,
+                        interruption=None):
     
     """
     Cette fonction est appelée lorsque le téléchargement du fichier ZIP est terminé.
     Elle extrait le fichier contenant les données taxonomiques, filtre et traite les données,
     puis les enregistre sous forme de fichiers GeoPackage.
+    Le fichier n'est lu qu'une seule fois : chaque morceau est réparti entre tous les taxons demandés.
+    Par défaut, il est décompressé en flux depuis l'archive, sans copie sur le disque.
 
     Args:
         temp_zip_path (str): Le chemin d'accès au fichier ZIP temporaire téléchargé.
@@ -154,69 +1322,152 @@ def tri_taxon_taxref(temp_zip_path:str,
         save_path (str): Le chemin où enregistrer les fichiers extraits et traités.
         synonyme (bool, optional): Si True, inclut les synonymes dans les résultats. Par défaut, False.
         debug (int, optional): Niveau de débogage pour afficher des informations supplémentaires. Par défaut, 0.
+        stream (bool, optional): Si True, lit le fichier directement depuis l'archive ZIP.
+            Si False, l'extrait d'abord dans `save_path`. Par défaut, True.
+        engine (str, optional): Moteur de lecture, "pandas", "pyarrow" (multithread, si installé)
+            ou "auto". Par défaut, "pandas".
+        processes (int, optional): Nombre de processus de travail pour le tri des morceaux
+            (0 ou 1 : pas de processus de travail). Par défaut, 0.
+        queue_depth (int, optional): Nombre maximal de morceaux en attente dans les processus.
+            Par défaut, deux fois `processes`.
+        cache (bool, optional): Si True et si pyarrow est installé, TAXREF est d'abord enregistré
+            en Parquet dans le cache du plugin, puis lu depuis ce cache ; les exécutions suivantes
+            pour la même version lisent directement le cache (l'archive peut alors être None).
+            Par défaut, True.
+        delete_archive (bool, optional): Si True, l'archive ZIP est supprimée après le tri.
+            Mettre à False pour une archive du cache partagé. Par défaut, True.
+        synonym_table (bool, optional): Si True, enregistre aussi pour chaque taxon une table
+            `Synonymes {taxon}` (CD_NOM, CD_REF, LB_NOM) indexée sur CD_NOM, construite dans la même
+            lecture de TAXREF ; la couche Liste ne reçoit alors les synonymes que si `synonyme` est True.
+            Par défaut, False.
+        memory_budget (int, optional): Budget mémoire du tri en octets. La taille des morceaux lus
+            est calculée à partir de la taille mesurée des lignes, les lignes triées au-delà du budget
+            sont déversées sur le disque, et chaque couche est enregistrée dès qu'elle est assemblée.
+            Par défaut, None (morceaux de taille fixe, tout reste en mémoire).
+        progress_callback (callable, optional): Fonction appelée avec (pourcentage, message) pendant
+            la lecture (octets consommés, lignes lues et retenues) et l'enregistrement des couches
+            (couches et lignes écrites), au plus quatre fois par seconde (voir `SuiviProgression`).
+            Par défaut, None.
+        flux (FluxTelechargement, optional): Archive en cours de téléchargement. Le fichier TAXREF est
+            alors décompressé et trié pendant le téléchargement (`temp_zip_path` est ignoré) ; si la
+            disposition de l'archive ne le permet pas, le tri attend la fin du téléchargement et lit
+            l'archive publiée. Par défaut, None.
+        interruption (callable, optional): Fonction consultée à chaque mise à jour de la progression ;
+            si elle renvoie True, le tri s'arrête (fichiers temporaires supprimés, archive en cours
+            de téléchargement relâchée) sur une InterruptedError. Par défaut, None.
+
+    Returns:
+        dict: Pour chaque titre de taxon, le nombre de lignes ajoutées, modifiées, supprimées
+            et inchangées dans la couche Liste (voir `save_diff_to_gpkg_via_qgs`).
 
     Raises:
         FileNotFoundError: Si le fichier TAXREFv{version}.txt n'est pas trouvé dans l'archive ZIP.
         TypeError: Si le type de données reçu dans un chunk n'est pas un DataFrame.
+        InterruptedError: Si `interruption` a demandé l'arrêt du tri.
     """
     
     # Si le mode debug est activé, afficher l'heure de début du processus
     print_debug_info(debug, 1, f"Start {tri_taxon_taxref.__name__}")
 
+    print_debug_info(debug, 1, f"Étape de lecture et de tri des couches {[taxon.title for taxon in taxons]}")
 
-    # Nom du fichier à ouvrir après extraction
-    file_to_open = f"TAXREFv{version}.txt"
+    # Compteurs de progression, transmis à l'appelant
+    suivi = SuiviProgression(progress_callback, debug=debug, interruption=interruption)
+    suivi.couches_total = len(taxons)
 
-    # Ouvrir et extraire l'archive ZIP
-    with zipfile.ZipFile(temp_zip_path) as zip_file :
-        
-        if file_to_open not in zip_file.namelist():
-            raise FileNotFoundError(f"Le fichier {file_to_open} n'a pas été trouvé dans l'archive ZIP.")
-        
-        # Extraire le fichier ZIP dans le répertoire de sauvegarde
-        zip_file.extract(file_to_open, save_path)
-        
-    extracted_file_path = os.path.join(save_path, file_to_open)
+    chemin_cache = get_chemin_cache_taxref(version) if cache and pa_ds is not None else None
 
-    # Traitement de chaque couche de taxons  
-    for taxon in taxons:
-    
-        print_debug_info(debug, 1, f"Étape de lecture et de tri de la couche {taxon.title}")
-        
-        # Lire le fichier extrait par morceaux (chunks)
-        with open(extracted_file_path, 'r', encoding='utf-8') as file:
-            # Lire directement le fichier dans un DataFrame pandas en flux
-            df = pd.read_csv(file, delimiter='\t', dtype=str, chunksize=50000)  # Chunksize : 50,000 lignes
-            
-            # Traitement par morceaux pour éviter les problèmes de mémoire
-            filtered_frames = []
-            for chunk in df:
+    # Un cache écrit avant les tables Synonymes n'a pas la colonne LB_NOM : il est refait à partir
+    # de l'archive (que l'appelant fournit, `taxref_en_cache` ayant signalé le cache comme absent)
+    if (chemin_cache is not None and synonym_table and os.path.isfile(chemin_cache)
+            and not taxref_en_cache(version, COLONNES_SYNONYMES)):
+        if temp_zip_path is None and flux is None:
+            raise FileNotFoundError(f"Le cache de TAXREF v{version} doit être refait pour les tables Synonymes, "
+                                    f"mais aucune archive n'a été fournie")
+        os.remove(chemin_cache)
+
+    # Taille visée des morceaux lus, selon le budget mémoire
+    budget_morceau = get_budget_morceau(memory_budget, processes, queue_depth)
+
+    # Nombre de lignes ajoutées, modifiées, supprimées et inchangées par couche
+    comptes = {}
+
+    with ExitStack() as fichiers:
+        # Fichier TAXREF ouvert, lu une seule fois (mise en cache ou tri)
+        file = position = None
+
+        if flux is not None:
+            # Archive lue pendant son téléchargement, ou à défaut une fois publiée
+            try:
+                file = fichiers.enter_context(ouvrir_fichier_flux(flux, version, debug=debug))
+                position = get_position_flux(file)
+            except FluxNonSupporte as erreur:
+                print_debug_info(debug, 0, f"Tri de TAXREF pendant le téléchargement impossible ({erreur}) : "
+                                           f"le tri commence à la fin du téléchargement.")
+                temp_zip_path = flux.attendre_archive()
+                flux = None
 
-                # Vérifier que chaque morceau est bien un DataFrame
-                if not isinstance(chunk, pd.DataFrame):
-                    raise TypeError(f"TriLignes attend un DataFrame, mais a reçu {type(chunk)}")
+        # Fichier lu en entier (mise en cache ou lecture sans cache), depuis l'archive ou après extraction
+        if file is None and not (chemin_cache is not None and os.path.isfile(chemin_cache)):
+            file = fichiers.enter_context(ouvrir_fichier_taxref(temp_zip_path, version, save_path, stream=stream))
+            position = get_position_fichier(file, temp_zip_path, version)
 
-                # Appliquer les fonctions de filtrage sur les données 
-                filtered_chunk = tri_colonnes(taxon.filtre_df(chunk, synonyme=synonyme), version=version)
+        # Mettre TAXREF en cache pour cette version s'il n'y est pas encore
+        if chemin_cache is not None and not os.path.isfile(chemin_cache):
+            print_debug_info(debug, 1, f"Mise en cache de TAXREF v{version} dans {chemin_cache}")
+            suivi.commencer("Mise en cache de TAXREF", position=position)
+            ecrire_cache_taxref(file, chemin_cache, suivi=suivi)
 
-                filtered_frames.append(filtered_chunk)
+        if chemin_cache is not None:
+            # Lire uniquement les lignes et colonnes utiles depuis le cache
+            print_debug_info(debug, 1, f"Lecture de TAXREF v{version} depuis le cache")
+            suivi.commencer("Lecture de TAXREF depuis le cache")
+            chunks = lire_taxref_cache(chemin_cache, taxons, synonyme=synonyme, synonym_table=synonym_table,
+                                       budget_morceau=budget_morceau)
+        else:
+            # Lire le fichier TAXREF, depuis l'archive (éventuellement en cours de téléchargement) ou après extraction
+            suivi.commencer("Lecture de TAXREF", position=position)
+            lire_taxref = get_lecteur_taxref(engine, debug=debug)
+            chunks = lire_taxref(file, taxons, synonyme=synonyme, synonym_table=synonym_table,
+                                 budget_morceau=budget_morceau)
 
-            # Combiner les morceaux filtrés en un seul DataFrame
-            filtered_frames = [df for df in filtered_frames if not df.empty]
-            df_filtre = pd.concat(filtered_frames, ignore_index=True)
+        # Chaque couche est enregistrée dès qu'elle est assemblée, avant l'assemblage de la suivante
+        # (le générateur est fermé en sortie, ce qui supprime les fichiers temporaires même en cas d'erreur)
+        couches = fichiers.enter_context(closing(iter_couches_taxref(
+            chunks, version, taxons, synonyme=synonyme, processes=processes, queue_depth=queue_depth,
+            debug=debug, synonym_table=synonym_table, memory_budget=memory_budget, suivi=suivi)))
+        for taxon, df_liste, df_synonymes in couches:
 
-            # Supprimer les noms vernaculaires doubles ou vides pour certains taxons
-            df_filtre_nom_vern = supprime_nom_vernaculaire(df=df_filtre, taxon=taxon)
+            print_debug_info(debug, 1, f"Étape de sauvegarde de la couche {taxon.title}")
+            suivi.commencer(f"Enregistrement de la couche {taxon.title}")
 
             # Définir le CRS (bien que ce ne soit pas nécessaire pour les couches non-géométriques)
             file_save_path = get_file_save_path(save_path, taxon.title)
 
-            # Enregistrer dans un GeoPackage
-            save_to_gpkg_via_qgs(df_filtre_nom_vern, file_save_path, f"Liste {taxon.title}")
+            # Enregistrer dans un GeoPackage, en n'écrivant que les différences avec la couche existante
+            # (les colonnes de statuts déjà fusionnées dans la couche Liste sont conservées)
+            comptes[taxon.title] = save_diff_to_gpkg_via_qgs(df_liste, file_save_path,
+                                                             f"Liste {taxon.title}", key="CD_NOM", debug=debug)
 
-    
-    # Supprimer les fichiers temporaire ZIP
-    os.remove(temp_zip_path)
-    os.remove(extracted_file_path)
+            if df_synonymes is not None:
+                # Table de correspondance CD_NOM → CD_REF, indexée pour les jointures des couches d'observations
+                layer_name = f"Synonymes {taxon.title}"
+                save_diff_to_gpkg_via_qgs(df_synonymes, file_save_path, layer_name,
+                                          key="CD_NOM", version_column=None, debug=debug)
+                create_attribute_index(file_save_path, layer_name, "CD_NOM", debug=debug)
+
+            suivi.ecrire(len(df_liste))
+            del df_liste, df_synonymes
+
+    suivi.terminer()
+
+    # Archive lue pendant son téléchargement : chemin définitif, une fois le fichier relâché
+    if flux is not None:
+        temp_zip_path = flux.attendre_archive()
+
+    # Supprimer le fichier temporaire ZIP (absent si TAXREF a été lu depuis le cache,
+    # conservé s'il appartient au cache des archives)
+    if delete_archive and temp_zip_path is not None:
+        os.remove(temp_zip_path)
 
-    return
\ No newline at end of file
+    return comptes
@@ -1,6 +1,10 @@
 import os
+import json
+import time
+import threading
+import hashlib
+import zipfile
 import requests
-import tempfile
 from functools import reduce
 from typing import List
 
@@ -9,13 +13,27 @@ import geopandas as gpd
 
 from PyQt5.QtCore import QThread, pyqtSignal
 
-from .UpdateTAXREF import get_download_url, tri_taxon_taxref
+from .UpdateTAXREF import get_download_url, get_cd_doc_archive, tri_taxon_taxref, ENGINE_PANDAS
+from .ArchiveCache import ArchiveCacheManager, find_local_archive
+from .FluxTelechargement import FluxTelechargement
+from .HttpSession import http_get
 from .UpdateStatus import run_download_status
 from .UpdateSaveStatus import save_global_status
-from .utils import print_debug_info
+from .utils import print_debug_info, get_cache_dir
 from .taxongroupe import TaxonGroupe
 from .statustype import StatusType, STATUS_TYPES
 
+# Téléchargement de TAXREF : nombre de reprises après une coupure, délai de base entre deux reprises (s)
+# (les délais de connexion et de lecture sont ceux de la session partagée, voir HttpSession)
+TENTATIVES_TELECHARGEMENT = 5
+DELAI_REPRISE = 5
+# Taille minimale d'un segment du téléchargement parallèle (octets)
+TAILLE_MIN_SEGMENT = 1 << 20
+# Taille des morceaux lus dans les réponses (octets)
+TAILLE_MORCEAU_TELECHARGEMENT = 1 << 20
+# Délai minimal entre deux messages de progression du téléchargement (s)
+INTERVALLE_PROGRESSION = 0.5
+
 class GetURLThread(QThread):
     """
     Classe qui récupère l'URL de téléchargement d'une version spécifique en arrière-plan.
@@ -56,25 +74,66 @@ class DownloadTaxrefThread(QThread):
     Classe qui gère le téléchargement d'un fichier à partir d'une URL en arrière-plan.
 
     Attributs :
-        progress (pyqtSignal): Signal émis pour transmettre la progression du téléchargement.
+        progress (pyqtSignal): Signal émis pour transmettre la progression du téléchargement
+            (uniquement quand le pourcentage entier change).
+        message (pyqtSignal): Signal émis avec les octets reçus et le débit, au plus toutes les
+            `INTERVALLE_PROGRESSION` secondes (seule progression si la taille n'est pas annoncée).
         finished (pyqtSignal): Signal émis une fois que le téléchargement est terminé.
-        url (str): URL du fichier à télécharger.
+        local_archive_found (pyqtSignal): Signal émis avant 'finished' quand une archive locale valide
+            est utilisée à la place du téléchargement.
+        url (str): URL du fichier à télécharger (None : cherchée par le thread si elle est nécessaire).
+        version (int): Version de TAXREF téléchargée.
+        archive_cache (ArchiveCacheManager): Cache partagé où ranger l'archive téléchargée (optionnel).
+        local_archive (str): Archive ZIP ou dossier d'archives téléchargées au préalable (optionnel).
+        flux (FluxTelechargement): Archive lue par le tri pendant son téléchargement (optionnel).
+        segments (int): Nombre de plages d'octets téléchargées en parallèle (1 : un seul flux).
+        debug (int): Niveau de débogage.
+        received_bytes (int): Octets reçus pendant ce téléchargement (sans ceux d'un téléchargement repris).
+        elapsed (float): Durée du téléchargement en secondes.
     """
     
     # Signal pour transmettre la progression
     progress = pyqtSignal(int) 
+    # Signal pour transmettre les octets reçus et le débit
+    message = pyqtSignal(str)
     # Signal pour indiquer la fin du téléchargement
     finished = pyqtSignal(str)  
+    # Signal pour indiquer qu'une archive locale est utilisée (elle ne doit pas être supprimée après le tri)
+    local_archive_found = pyqtSignal(str)
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, version: int=None, archive_cache: ArchiveCacheManager=None,
+                 flux: FluxTelechargement=None, segments: int=1, local_archive: str=None, debug: int=0):
         """
         Initialise le thread de téléchargement avec l'URL du fichier à télécharger.
 
         Args:
-            url (str): L'URL du fichier à télécharger.
+            url (str): L'URL du fichier à télécharger, ou None pour la chercher dans le thread
+                (uniquement si ni une archive locale ni le cache des archives ne conviennent).
+            version (int): Version de TAXREF téléchargée (nécessaire pour le cache).
+            archive_cache (ArchiveCacheManager): Cache partagé où ranger l'archive téléchargée.
+            flux (FluxTelechargement): Archive lue par le tri pendant son téléchargement : chaque morceau
+                écrit lui est signalé, et l'archive n'est déplacée qu'une fois relâchée par le tri.
+            segments (int): Nombre de plages d'octets téléchargées en parallèle, si le serveur accepte
+                les requêtes Range (1 : un seul flux).
+            local_archive (str): Archive ZIP ou dossier d'archives de TAXREF téléchargées au préalable,
+                cherchée et vérifiée avant toute requête (réglage "local_archive").
+            debug (int, optional): Niveau de débogage (par défaut à 0).
         """
         super().__init__()
         self.url = url
+        self.version = version
+        self.archive_cache = archive_cache
+        self.flux = flux
+        self.segments = segments
+        self.local_archive = local_archive
+        self.debug = debug
+
+        # Mesure du débit et limitation des signaux de progression
+        self.received_bytes = 0
+        self.elapsed = 0.0
+        self.start_time = None
+        self.last_percentage = None
+        self.last_message = 0.0
 
     def run(self):
         """
@@ -82,63 +141,638 @@ class DownloadTaxrefThread(QThread):
 
         Cette méthode est exécutée dans un thread séparé. Elle télécharge le fichier par morceaux
         et émet des signaux pour informer de la progression et de la fin du téléchargement.
-        Un fichier temporaire est créé pour stocker les données téléchargées.
+        Les données sont écrites dans un fichier partiel du cache du plugin, gardé après une coupure
+        ou une annulation (`requestInterruption`) et repris au lancement suivant par une requête Range
+        (voir `download`) ; il n'est supprimé que s'il est corrompu.
+        L'empreinte SHA-256 est calculée sur les morceaux au fil du téléchargement, et enregistrée
+        avec la taille dans le cache des archives. Une archive déjà en cache (pour le même code
+        d'archive, cdDocArchive, si l'URL est connue) n'est pas retéléchargée : elle n'est vérifiée
+        qu'une fois, dans ce thread, son empreinte étant longue à calculer.
+        Avec un flux, le tri lit l'archive pendant son écriture : chaque morceau est vidé sur le disque
+        et signalé au flux, le fichier n'est rangé dans le cache qu'une fois relâché par le tri,
+        et le chemin définitif (ou l'erreur) est publié au tri après le signal 'finished'.
+        Une archive locale valide (`local_archive`) est utilisée sans recherche d'URL ni téléchargement :
+        sa vérification décompresse tout le fichier TAXREF, d'où sa place dans ce thread.
+
+        Raises:
+            IOError: Si le fichier reçu est incomplet ou n'est pas une archive ZIP.
         """
-        # Envoi d'une requête GET pour télécharger le fichier
-        response = requests.get(self.url, stream=True)
-        # Récupérer la taille totale du fichier à partir de l'en-tête 'content-length'
-        total_length = int(response.headers.get('content-length', 0))
-        
-        # Vérifier si la requête a été réalisée avec succès
-        response.raise_for_status()
-
-        # Créer un fichier temporaire pour stocker le fichier ZIP téléchargé
-        with tempfile.NamedTemporaryFile(delete=False) as temp_zip:
-            downloaded_size = 0
-            # Télécharger le fichier par morceaux de 4096 octets
-            for data in response.iter_content(chunk_size=4096):
-                # Écrire les données dans le fichier temporaire
-                temp_zip.write(data)
-                # Mettre à jour la taille téléchargée
-                downloaded_size += len(data)
-
-                # Calculer le pourcentage de progression
-                progress_percentage = int(downloaded_size * 100 / total_length)
-                self.progress.emit(progress_percentage)  # Émet le signal de progression
-
-            # Obtenir le chemin du fichier temporaire
-            temp_zip_path = temp_zip.name
+        # Archive téléchargée au préalable, vérifiée avant le tri
+        if self.local_archive:
+            local_archive = find_local_archive(self.local_archive, self.version, debug=self.debug)
+            if local_archive is not None:
+                print_debug_info(self.debug, 0, f"Archive locale de TAXREF v{self.version} utilisée : {local_archive}")
+                self.local_archive_found.emit(local_archive)
+                self.progress.emit(100)
+                self.finished.emit(local_archive)
+                if self.flux is not None:
+                    self.flux.publier(local_archive)
+                return
+
+        # Archive déjà téléchargée (depuis le même document si l'URL est connue)
+        if self.archive_cache is not None:
+            cd_doc = get_cd_doc_archive(self.url) if self.url is not None else None
+            cached_archive = self.archive_cache.get_archive(self.version, cd_doc=cd_doc)
+            if cached_archive is not None:
+                self.progress.emit(100)
+                self.finished.emit(cached_archive)
+                # Le tri en attente lit l'archive du cache
+                if self.flux is not None:
+                    self.flux.publier(cached_archive)
+                return
+
+        # URL cherchée ici quand l'étape GetURLThread a été sautée (archive locale ou cache des archives)
+        if self.url is None:
+            self.url = get_download_url(self.version)
+
+        # Code d'archive du MNHN, qui identifie le fichier publié
+        cd_doc = get_cd_doc_archive(self.url)
+
+        # Fichier partiel persistant, repris par une requête Range après une coupure ou une annulation
+        temp_zip_path = self.get_partial_path(cd_doc)
+        try:
+            self.start_time = time.monotonic()
+            downloaded_size, total_length, empreinte = self.download(temp_zip_path)
+            self.report_progress(downloaded_size, total_length, force=True)
+
+            # Un téléchargement interrompu ou corrompu est détecté avant le tri
+            if (total_length and downloaded_size != total_length) or not zipfile.is_zipfile(temp_zip_path):
+                raise IOError(f"Téléchargement de {self.url} incomplet ou corrompu "
+                              f"({downloaded_size} octets reçus sur {total_length})")
+        except Exception as erreur:
+            # Coupure réseau ou annulation : le fichier partiel est gardé pour la reprise ;
+            # sinon (archive corrompue, ressource modifiée), il est supprimé
+            reprise = isinstance(erreur, (requests.exceptions.RequestException, InterruptedError))
+            if self.flux is not None:
+                # Le tri s'arrête sur l'erreur et relâche le fichier avant sa suppression
+                self.flux.terminer(erreur)
+                self.wait_release()
+            if not reprise:
+                self.remove_partial(temp_zip_path)
+            if self.flux is not None:
+                self.flux.publier(erreur=erreur)
+            if isinstance(erreur, InterruptedError):
+                print_debug_info(self.debug, 0, f"Téléchargement annulé : {os.path.getsize(temp_zip_path)} octets gardés "
+                                       f"pour la reprise dans {temp_zip_path}")
+                return
+            raise
+
+        # Le téléchargement est complet : il n'y a plus rien à reprendre
+        self.remove_partial(temp_zip_path, keep_file=True)
+        # Sans taille annoncée, la barre n'avance qu'à la fin
+        if self.last_percentage != 100:
+            self.progress.emit(100)
+        print_debug_info(self.debug, 0, f"TAXREF téléchargé : {self.received_bytes / 1e6:.1f} Mo reçus "
+                                        f"en {self.elapsed:.1f} s ({self.get_throughput() / 1e6:.2f} Mo/s)")
+
+        if self.flux is not None:
+            # Le fichier n'est déplacé qu'une fois relâché par le tri (impossible autrement sous Windows)
+            self.flux.terminer()
+            if not self.wait_release():
+                # Annulation pendant l'attente : l'archive reste dans le dossier des téléchargements
+                self.flux.publier(erreur=InterruptedError("Téléchargement annulé"))
+                return
+
+        # Ranger l'archive dans le cache partagé pour les autres projets
+        if self.archive_cache is not None:
+            try:
+                temp_zip_path = self.archive_cache.add_archive(self.version, temp_zip_path,
+                                                               sha256=empreinte.hexdigest(), cd_doc=cd_doc)
+            except Exception as erreur:
+                if self.flux is not None:
+                    self.flux.publier(erreur=erreur)
+                raise
 
         # Émettre le signal 'finished' avec le chemin du fichier temporaire
         self.finished.emit(temp_zip_path)  # Émet le signal de fin
+        # Le tri termine avec le chemin définitif de l'archive (après ce signal, pour l'ordre des étapes)
+        if self.flux is not None:
+            self.flux.publier(temp_zip_path)
+
+    def get_partial_path(self, cd_doc: str=None)->str:
+        """
+        Renvoie le chemin du fichier partiel du téléchargement, dans le cache du plugin.
+        Il est nommé d'après le code d'archive (ou l'URL), pour ne reprendre que le même document.
+        """
+
+        identifiant = cd_doc or hashlib.sha1(self.url.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(get_cache_dir("telechargements"), f"TAXREF_v{self.version}_{identifiant}.zip.part")
+
+    @staticmethod
+    def remove_partial(partial_path: str, keep_file: bool=False)->None:
+        """
+        Supprime les validateurs d'un fichier partiel et, sauf si `keep_file` est True, le fichier lui-même.
+        """
+
+        paths = [partial_path + ".json"] if keep_file else [partial_path, partial_path + ".json"]
+        for path in paths:
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def wait_release(self)->bool:
+        """
+        Attend que le tri ait relâché le fichier du flux, sans rester bloqué après une annulation.
+
+        Returns:
+            bool: True si le fichier a été relâché, False si l'annulation a été demandée avant.
+        """
+
+        while not self.flux.attendre_liberation(timeout=INTERVALLE_PROGRESSION):
+            if self.isInterruptionRequested():
+                print_debug_info(self.debug, 0, "Annulation : le fichier n'a pas été relâché par le tri")
+                return False
+        return True
+
+    def wait_retry(self, seconds: float)->None:
+        """
+        Attend avant une nouvelle tentative, en s'arrêtant dès que l'annulation est demandée.
+
+        Raises:
+            InterruptedError: Si l'annulation du téléchargement est demandée.
+        """
+
+        fin = time.monotonic() + seconds
+        while time.monotonic() < fin:
+            if self.isInterruptionRequested():
+                raise InterruptedError("Téléchargement annulé")
+            time.sleep(0.1)
+
+    def download(self, partial_path: str)->tuple:
+        """
+        Télécharge l'archive dans le fichier partiel, en reprenant les octets déjà reçus.
+
+        La reprise envoie `Range: bytes={reçus}-` avec `If-Range` (ETag fort, sinon Last-Modified) :
+        le serveur ne renvoie la suite (206) que si la ressource n'a pas changé, et la renvoie en entier
+        (200) sinon. La réponse 206 est vérifiée (Content-Range, ETag) avant d'être ajoutée au fichier ;
+        une réponse 200 de la même ressource (serveur sans Range) est lue sans les octets déjà reçus.
+        Un nouveau téléchargement est réparti en `segments` plages parallèles si le serveur annonce
+        `Accept-Ranges: bytes` (voir `download_segments`), et repasse à un seul flux si un segment est refusé.
+        Après une coupure, le téléchargement reprend de la même façon, jusqu'à `TENTATIVES_TELECHARGEMENT` fois.
+
+        Args:
+            partial_path (str): Chemin du fichier partiel (ses validateurs sont dans `partial_path + ".json"`).
+
+        Returns:
+            tuple: (octets reçus, taille totale annoncée ou 0, empreinte SHA-256 de tout le fichier)
+
+        Raises:
+            InterruptedError: Si l'annulation du téléchargement est demandée.
+            IOError: Si la ressource change après le début d'une lecture par le tri.
+            requests.exceptions.RequestException: Si la connexion échoue à chaque tentative.
+        """
+
+        # Validateurs du téléchargement précédent de la même URL
+        validateurs = {}
+        if os.path.isfile(partial_path + ".json"):
+            try:
+                with open(partial_path + ".json", "r", encoding="utf-8") as file:
+                    validateurs = json.load(file)
+            except (OSError, ValueError):
+                validateurs = {}
+        if validateurs.get("url") != self.url or not os.path.isfile(partial_path):
+            validateurs = {}
+
+        # Empreinte des octets déjà reçus, complétée au fil du téléchargement
+        empreinte = hashlib.sha256()
+        downloaded_size = 0
+        if validateurs:
+            with open(partial_path, "rb") as file:
+                for bloc in iter(lambda: file.read(1 << 20), b""):
+                    empreinte.update(bloc)
+                    downloaded_size += len(bloc)
+
+        total_length = validateurs.get("total", 0)
+        flux_started = False
+        tentative = 0
+        # Segments parallèles, abandonnés pour la suite du téléchargement si le serveur refuse un Range
+        par_segments = True
+
+        with open(partial_path, "ab") as temp_zip:
+            # Sans validateurs, un ancien fichier partiel n'est pas repris
+            if not validateurs:
+                temp_zip.truncate(0)
+
+            while True:
+                headers = {}
+                if downloaded_size:
+                    headers["Range"] = f"bytes={downloaded_size}-"
+                    etag = validateurs.get("etag")
+                    validateur = etag if etag and not etag.startswith("W/") else validateurs.get("last_modified")
+                    if validateur:
+                        headers["If-Range"] = validateur
+
+                try:
+                    # Envoi d'une requête GET pour télécharger le fichier (ou sa suite)
+                    response = http_get(self.url, stream=True, headers=headers)
+
+                    # Fichier partiel déjà complet
+                    if response.status_code == 416 and downloaded_size and downloaded_size == total_length:
+                        response.close()
+                        break
+
+                    # Vérifier si la requête a été réalisée avec succès
+                    response.raise_for_status()
+
+                    # Octets déjà reçus à sauter au début d'une réponse complète
+                    a_sauter = 0
+                    if downloaded_size and not self.is_valid_range(response, downloaded_size, validateurs):
+                        if response.status_code == 200 and self.is_same_resource(response, validateurs):
+                            # Range ignoré pour la même ressource : la réponse complète est lue sans son début
+                            a_sauter = downloaded_size
+                        elif flux_started:
+                            # Le tri a déjà lu le début de l'ancienne ressource
+                            response.close()
+                            raise IOError(f"L'archive {self.url} a changé pendant son téléchargement")
+                        else:
+                            # Ressource modifiée : le téléchargement recommence au début
+                            print_debug_info(self.debug, 0, f"Reprise impossible de {self.url} : téléchargement depuis le début")
+                            temp_zip.seek(0)
+                            temp_zip.truncate()
+                            empreinte = hashlib.sha256()
+                            downloaded_size = 0
+
+                    # Récupérer la taille totale du fichier à partir de l'en-tête 'content-length'
+                    content_length = int(response.headers.get('content-length', 0))
+                    total_length = downloaded_size - a_sauter + content_length if content_length else 0
+
+                    # Validateurs enregistrés pour une reprise ultérieure
+                    validateurs = {"url": self.url,
+                                   "etag": response.headers.get("ETag"),
+                                   "last_modified": response.headers.get("Last-Modified"),
+                                   "total": total_length}
+                    with open(partial_path + ".json", "w", encoding="utf-8") as file:
+                        json.dump(validateurs, file)
+
+                    # Les octets déjà reçus sont lisibles par le tri
+                    if self.flux is not None and not flux_started:
+                        self.flux.commencer(partial_path)
+                        self.flux.ajouter(downloaded_size)
+                        flux_started = True
+
+                    # Téléchargement en segments parallèles, si le serveur accepte les requêtes Range
+                    segments = self.get_segment_count(response, downloaded_size, total_length) if par_segments else 1
+                    if segments > 1:
+                        temp_zip.flush()
+                        downloaded_size, empreinte, erreur = self.download_segments(response, partial_path, segments,
+                                                                                    total_length, validateurs, empreinte)
+                        if erreur is not None:
+                            raise erreur
+                        if downloaded_size == total_length:
+                            break
+                        # Range refusé pour un segment : la suite est téléchargée d'un seul flux
+                        par_segments = False
+                        print_debug_info(self.debug, 0, f"Téléchargement en segments interrompu à {downloaded_size} octets : "
+                                                        f"suite sans segments")
+                        continue
+
+                    # Télécharger le fichier par grands morceaux, écrits directement dans le fichier partiel
+                    for data in response.iter_content(chunk_size=TAILLE_MORCEAU_TELECHARGEMENT):
+                        if self.isInterruptionRequested():
+                            response.close()
+                            raise InterruptedError("Téléchargement annulé")
+
+                        if a_sauter:
+                            saut = min(a_sauter, len(data))
+                            a_sauter -= saut
+                            data = data[saut:]
+                            if not data:
+                                continue
+
+                        # Écrire les données dans le fichier partiel
+                        temp_zip.write(data)
+                        empreinte.update(data)
+                        # Mettre à jour la taille téléchargée
+                        downloaded_size += len(data)
+                        self.received_bytes += len(data)
+
+                        # Les octets vidés sur le disque sont lisibles par le tri
+                        if self.flux is not None:
+                            temp_zip.flush()
+                            self.flux.ajouter(len(data))
+
+                        # Progression émise seulement si le pourcentage change (ou après un délai)
+                        self.report_progress(downloaded_size, total_length)
+                    break
+
+                except (requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as erreur:
+                    # Coupure : les octets reçus sont gardés et la suite est redemandée
+                    temp_zip.flush()
+                    tentative += 1
+                    if tentative > TENTATIVES_TELECHARGEMENT:
+                        raise
+                    print_debug_info(self.debug, 0, f"Coupure du téléchargement ({erreur}) : reprise à {downloaded_size} octets "
+                                           f"(tentative {tentative}/{TENTATIVES_TELECHARGEMENT})")
+                    self.wait_retry(DELAI_REPRISE * tentative)
+
+        return downloaded_size, total_length, empreinte
+
+    def get_throughput(self)->float:
+        """
+        Renvoie le débit moyen du téléchargement en octets par seconde (octets reçus, hors reprise).
+        """
+
+        if self.start_time is not None:
+            self.elapsed = time.monotonic() - self.start_time
+        return self.received_bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def report_progress(self, downloaded_size: int, total_length: int, force: bool=False)->None:
+        """
+        Émet la progression sans saturer la fenêtre de progression : `progress` seulement quand
+        le pourcentage entier change, `message` (octets reçus, débit) au plus toutes les
+        `INTERVALLE_PROGRESSION` secondes. Sans taille annoncée, seul `message` est émis.
+        """
+
+        if total_length:
+            percentage = min(100, int(downloaded_size * 100 / total_length))
+            if percentage != self.last_percentage:
+                self.last_percentage = percentage
+                self.progress.emit(percentage)
+
+        now = time.monotonic()
+        if force or now - self.last_message >= INTERVALLE_PROGRESSION:
+            self.last_message = now
+            received = f"{downloaded_size / 1e6:.1f} Mo" + (f" / {total_length / 1e6:.1f} Mo" if total_length else "")
+            self.message.emit(f"Téléchargement de TAXREF : {received} ({self.get_throughput() / 1e6:.2f} Mo/s)")
+
+    def get_segment_count(self, response, downloaded_size: int, total_length: int)->int:
+        """
+        Renvoie le nombre de segments à télécharger en parallèle : 1 (un seul flux) pour une reprise,
+        une taille inconnue ou un serveur qui n'annonce pas `Accept-Ranges: bytes`.
+        """
+
+        if self.segments <= 1 or downloaded_size or not total_length:
+            return 1
+        if response.headers.get("Accept-Ranges", "").lower() != "bytes":
+            print_debug_info(self.debug, 0, f"{self.url} n'accepte pas les requêtes Range : téléchargement sans segments")
+            return 1
+
+        return max(1, min(self.segments, total_length // TAILLE_MIN_SEGMENT))
+
+    def download_segments(self, response, partial_path: str, segments: int, total_length: int,
+                          validateurs: dict, empreinte)->tuple:
+        """
+        Télécharge l'archive en `segments` plages d'octets parallèles, écrites à leur place dans le fichier partiel.
+
+        Le premier segment réutilise la réponse déjà ouverte, les autres sont demandés avec Range et If-Range.
+        Le début contigu du fichier est haché, signalé au flux du tri, et seul gardé à la fin :
+        après une erreur ou une annulation, le téléchargement reprend à partir de lui.
+        La progression émise est celle de tous les segments.
+
+        Args:
+            response (requests.Response): Réponse complète (200) déjà ouverte, lue pour le premier segment.
+            partial_path (str): Chemin du fichier partiel (vide).
+            segments (int): Nombre de segments.
+            total_length (int): Taille de l'archive.
+            validateurs (dict): Validateurs de la réponse (ETag, Last-Modified, taille).
+            empreinte (hashlib._Hash): Empreinte à compléter avec le contenu du fichier.
+
+        Returns:
+            tuple: (taille du début contigu téléchargé, empreinte, erreur à lever ou None) ; une taille
+                inférieure à `total_length` sans erreur signifie qu'un segment a été refusé par le serveur
+        """
+
+        taille = -(-total_length // segments)
+        bornes = [(debut, min(debut + taille, total_length) - 1) for debut in range(0, total_length, taille)]
+        recus = [0] * len(bornes)
+        verrou = threading.Lock()
+        arret = threading.Event()
+        erreurs = []
+
+        workers = [threading.Thread(target=self.download_segment,
+                                    args=(partial_path, index, debut, fin, response if index == 0 else None,
+                                          validateurs, recus, verrou, arret, erreurs),
+                                    daemon=True)
+                   for index, (debut, fin) in enumerate(bornes)]
+        for worker in workers:
+            worker.start()
+        print_debug_info(self.debug, 1, f"Téléchargement de {self.url} en {len(bornes)} segments")
+
+        contigu = 0
+        received_before = self.received_bytes
+        with open(partial_path, "rb") as lecteur:
+            while True:
+                en_cours = any(worker.is_alive() for worker in workers)
+                if self.isInterruptionRequested() and not arret.is_set():
+                    erreurs.append(InterruptedError("Téléchargement annulé"))
+                    arret.set()
+
+                with verrou:
+                    recus_segments = list(recus)
+
+                # Fin du début contigu : premier segment incomplet
+                fin_contigu = 0
+                for (debut, fin), recu in zip(bornes, recus_segments):
+                    fin_contigu = debut + recu
+                    if recu < fin - debut + 1:
+                        break
+
+                # Empreinte et flux du tri suivent le début contigu du fichier
+                debut_hachage = contigu
+                lecteur.seek(contigu)
+                while contigu < fin_contigu:
+                    bloc = lecteur.read(min(1 << 20, fin_contigu - contigu))
+                    if not bloc:
+                        break
+                    empreinte.update(bloc)
+                    contigu += len(bloc)
+                if self.flux is not None and contigu > debut_hachage:
+                    self.flux.ajouter(contigu - debut_hachage)
+
+                self.received_bytes = received_before + sum(recus_segments)
+                self.report_progress(sum(recus_segments), total_length)
+
+                if not en_cours:
+                    break
+                time.sleep(0.1)
+
+        # Les octets reçus après le premier trou sont abandonnés : la reprise repart du début contigu
+        with open(partial_path, "r+b") as file:
+            file.truncate(contigu)
+
+        return contigu, empreinte, erreurs[0] if erreurs else None
+
+    def download_segment(self, partial_path: str, index: int, debut: int, fin: int, response,
+                         validateurs: dict, recus: list, verrou, arret, erreurs: list)->None:
+        """
+        Télécharge la plage [debut, fin] de l'archive à sa place dans le fichier partiel (thread d'un segment).
+        Une coupure est reprise à la position atteinte ; une autre erreur, ou un refus de Range,
+        arrête tous les segments.
+
+        Args:
+            partial_path (str): Chemin du fichier partiel.
+            index (int): Numéro du segment, dans `recus`.
+            debut (int): Premier octet du segment.
+            fin (int): Dernier octet du segment (inclus).
+            response (requests.Response): Réponse déjà ouverte à partir de `debut`, ou None.
+            validateurs (dict): Validateurs de la ressource (If-Range, vérification des réponses 206).
+            recus (list): Octets reçus par segment, mis à jour sous `verrou`.
+            verrou (threading.Lock): Verrou de `recus`.
+            arret (threading.Event): Arrêt demandé à tous les segments.
+            erreurs (list): Erreurs à lever par le téléchargement.
+        """
+
+        etag = validateurs.get("etag")
+        validateur = etag if etag and not etag.startswith("W/") else validateurs.get("last_modified")
+        position = debut
+        tentative = 0
+
+        with open(partial_path, "r+b") as file:
+            while position <= fin and not arret.is_set():
+                try:
+                    if response is None:
+                        headers = {"Range": f"bytes={position}-{fin}"}
+                        if validateur:
+                            headers["If-Range"] = validateur
+                        response = http_get(self.url, stream=True, headers=headers)
+                        response.raise_for_status()
+                        if not self.is_valid_range(response, position, validateurs):
+                            # Range refusé ou ressource modifiée : les segments s'arrêtent
+                            response.close()
+                            arret.set()
+                            return
+
+                    file.seek(position)
+                    for data in response.iter_content(chunk_size=TAILLE_MORCEAU_TELECHARGEMENT):
+                        if arret.is_set():
+                            break
+                        data = data[:fin + 1 - position]
+                        file.write(data)
+                        file.flush()
+                        position += len(data)
+                        with verrou:
+                            recus[index] += len(data)
+                        if position > fin:
+                            break
+                    response.close()
+                    response = None
+
+                    # Réponse terminée avant la fin du segment : traitée comme une coupure
+                    if position <= fin and not arret.is_set():
+                        raise requests.exceptions.ChunkedEncodingError(f"Segment {index} incomplet")
+
+                except (requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as erreur:
+                    response = None
+                    tentative += 1
+                    if tentative > TENTATIVES_TELECHARGEMENT:
+                        erreurs.append(erreur)
+                        arret.set()
+                        return
+                    print_debug_info(self.debug, 0, f"Coupure du segment {index} ({erreur}) : reprise à {position} octets "
+                                                    f"(tentative {tentative}/{TENTATIVES_TELECHARGEMENT})")
+                    arret.wait(DELAI_REPRISE * tentative)
+
+                except Exception as erreur:
+                    erreurs.append(erreur)
+                    arret.set()
+                    return
+
+    @staticmethod
+    def is_same_resource(response, validateurs: dict)->bool:
+        """
+        Vérifie qu'une réponse complète (200) porte sur la même ressource que le téléchargement précédent :
+        même ETag fort, ou à défaut même Last-Modified, et même taille.
+        """
+
+        content_length = response.headers.get("content-length")
+        if validateurs.get("total") and content_length and int(content_length) != validateurs["total"]:
+            return False
+
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/") and validateurs.get("etag"):
+            return etag == validateurs["etag"]
+        last_modified = response.headers.get("Last-Modified")
+        return bool(last_modified) and last_modified == validateurs.get("last_modified")
+
+    @staticmethod
+    def is_valid_range(response, start: int, validateurs: dict)->bool:
+        """
+        Vérifie qu'une réponse est bien la suite du fichier partiel : réponse 206 commençant à `start`,
+        pour la même taille totale et le même ETag que le téléchargement précédent.
+        """
+
+        if response.status_code != 206:
+            return False
+
+        # Content-Range: bytes {début}-{fin}/{total}
+        content_range = response.headers.get("Content-Range", "")
+        try:
+            unite, plage = content_range.split(" ", 1)
+            bornes, total = plage.split("/", 1)
+            debut = int(bornes.split("-", 1)[0])
+        except ValueError:
+            return False
+        if unite != "bytes" or debut != start:
+            return False
+        if total != "*" and validateurs.get("total") and int(total) != validateurs["total"]:
+            return False
+
+        etag = response.headers.get("ETag")
+        return not (etag and validateurs.get("etag") and etag != validateurs["etag"])
 
 class SaveTaxrefThread(QThread):
     """
     Une classe QThread pour trier les taxon de TAXREF après leur téléchargement
 
     Attributes:
+        progress (pyqtSignal): Signal émis avec la progression du tri et de l'enregistrement (en %)
+        message (pyqtSignal): Signal émis avec le détail de l'étape en cours (octets, lignes lues et écrites)
         finished (pyqtSignal): Signal emis quand le thread fini son execution
-        temp_zip_path (str): Chemin du fichier ZIP temporaire contenant les données de TAXREF
+        temp_zip_path (str): Chemin du fichier ZIP temporaire contenant les données de TAXREF,
+            ou d'un dossier d'archives téléchargées au préalable (l'archive de la version y est cherchée et vérifiée)
         version (str): Version de TAXREF
         taxons (list): Liste d'objet TaxonGroupe.
         save_path (str): Chemin de sauvegarde des données après les tris.
         synonyme (bool): Pour garder les taxon avec CD_NOM != CD_REF
+        engine (str): Moteur de lecture de TAXREF ("pandas", "pyarrow" ou "auto")
+        processes (int): Nombre de processus de travail pour le tri de TAXREF (0 : aucun)
+        queue_depth (int): Nombre maximal de morceaux de TAXREF en attente dans les processus
+        cache (bool): Pour lire et enregistrer TAXREF dans le cache Parquet du plugin
+        delete_archive (bool): Pour supprimer l'archive après le tri (False si elle est dans le cache partagé)
+        synonym_table (bool): Pour enregistrer aussi les tables Synonymes (CD_NOM, CD_REF, LB_NOM)
+        memory_budget (int): Budget mémoire du tri de TAXREF en octets (None : pas de budget)
+        flux (FluxTelechargement): Archive en cours de téléchargement, triée pendant son écriture
+            (temp_zip_path est alors None)
     """
 
+    # Signaux de progression (limités à quelques émissions par seconde par SuiviProgression)
+    progress = pyqtSignal(int)
+    message = pyqtSignal(str)
     finished = pyqtSignal()
     
     def __init__(self, temp_zip_path, version, 
                  taxons: List[TaxonGroupe],
-                 save_path, synonyme:bool=False):
+                 save_path, synonyme:bool=False,
+                 engine: str=ENGINE_PANDAS,
+                 processes: int=0,
+                 queue_depth: int=None,
+                 cache: bool=True,
+                 delete_archive: bool=True,
+                 synonym_table: bool=False,
+                 memory_budget: int=None,
+                 flux: FluxTelechargement=None):
         """
         Initialise le SaveTaxrefThread avec les paramètres donnés.
 
         Args:
-            temp_zip_path (str): Chemin du fichier ZIP temporaire contenant les données de TAXREF
+            temp_zip_path (str): Chemin du fichier ZIP temporaire contenant les données de TAXREF,
+                ou d'un dossier d'archives téléchargées au préalable
             version (str): Version de TAXREF
             taxons (list): Liste d'objet TaxonGroupe.
             save_path (str): Chemin de sauvegarde des données après les tris.
             synonyme (bool): Pour garder les taxon avec CD_NOM != CD_REF
+            engine (str): Moteur de lecture de TAXREF ("pandas", "pyarrow" ou "auto")
+            processes (int): Nombre de processus de travail pour le tri de TAXREF (0 : aucun)
+            queue_depth (int): Nombre maximal de morceaux de TAXREF en attente dans les processus
+            cache (bool): Pour lire et enregistrer TAXREF dans le cache Parquet du plugin
+            delete_archive (bool): Pour supprimer l'archive après le tri (False si elle est dans le cache partagé)
+            synonym_table (bool): Pour enregistrer aussi les tables Synonymes (CD_NOM, CD_REF, LB_NOM)
+            memory_budget (int): Budget mémoire du tri de TAXREF en octets (None : pas de budget)
+            flux (FluxTelechargement): Archive en cours de téléchargement, triée pendant son écriture
+                (temp_zip_path est alors None)
         """
 
         super().__init__()
@@ -147,6 +781,14 @@ class SaveTaxrefThread(QThread):
         self.taxons = taxons
         self.save_path = save_path
         self.synonyme = synonyme
+        self.engine = engine
+        self.processes = processes
+        self.queue_depth = queue_depth
+        self.cache = cache
+        self.delete_archive = delete_archive
+        self.synonym_table = synonym_table
+        self.memory_budget = memory_budget
+        self.flux = flux
 
     def run(self):
         """
@@ -158,15 +800,51 @@ class SaveTaxrefThread(QThread):
 
         The `finished` signal is emitted once the saving process is complete.
         """
+        # Dossier d'archives locales : l'archive de la version est cherchée et vérifiée avant le tri,
+        # et n'est jamais supprimée
+        temp_zip_path = self.temp_zip_path
+        delete_archive = self.delete_archive
+        if temp_zip_path is not None and os.path.isdir(temp_zip_path):
+            temp_zip_path = find_local_archive(temp_zip_path, self.version)
+            if temp_zip_path is None:
+                raise FileNotFoundError(f"Aucune archive valide de TAXREF v{self.version} dans {self.temp_zip_path}")
+            delete_archive = False
+
         # Process the downloaded data and save it to the specified path
-        tri_taxon_taxref(self.temp_zip_path,
-                         self.version,
-                         self.taxons,
-                         self.save_path,
-                         self.synonyme)
+        try:
+            tri_taxon_taxref(temp_zip_path,
+                             self.version,
+                             self.taxons,
+                             self.save_path,
+                             self.synonyme,
+                             engine=self.engine,
+                             processes=self.processes,
+                             queue_depth=self.queue_depth,
+                             cache=self.cache,
+                             delete_archive=delete_archive,
+                             synonym_table=self.synonym_table,
+                             memory_budget=self.memory_budget,
+                             progress_callback=self.emit_progress,
+                             flux=self.flux,
+                             interruption=self.isInterruptionRequested)
+        except InterruptedError:
+            # Annulation (`requestInterruption`) : le tri s'arrête entre deux morceaux, sans signal de fin
+            return
+        finally:
+            # Le téléchargement en cours ne reste jamais bloqué sur le fichier, même si le tri échoue
+            if self.flux is not None:
+                self.flux.liberer()
         # Emit the 'finished' signal to notify that the process is complete
         self.finished.emit()
 
+    def emit_progress(self, progress: int, message: str):
+        """
+        Transmet la progression du tri de TAXREF à la fenêtre de progression.
+        """
+
+        self.progress.emit(progress)
+        self.message.emit(message)
+
 class GetStatusThread(QThread):
     """
     Thread pour télécharger, fusionner et sauvegarder les statuts régionaux et nationaux.
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Compare les moteurs de lecture de TAXREF ("pandas" et "pyarrow") utilisés par `tri_taxon_taxref`.
+
+Le script doit être lancé avec le Python de QGIS (voir scripts/run-env-linux.sh) :
+
+    python scripts/benchmark_taxref_engines.py TAXREF_v18.zip 18
+    python scripts/benchmark_taxref_engines.py --synthetique 700000
+
+Sans archive, un fichier TAXREF synthétique est généré avec la disposition réelle des colonnes.
+Pour chaque moteur, le script mesure la durée de lecture et de tri de tous les taxons,
+puis vérifie que les DataFrames obtenus sont identiques.
+"""
+
+import argparse
+import importlib
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+import pandas as pd
+
+# Le dossier du plugin est importé comme un paquet
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(PLUGIN_DIR))
+plugin = os.path.basename(PLUGIN_DIR)
+update_taxref = importlib.import_module(f"{plugin}.UpdateTAXREF")
+taxongroupe = importlib.import_module(f"{plugin}.taxongroupe")
+
+# Colonnes d'un fichier TAXREFv{version}.txt, dans l'ordre du fichier
+COLONNES_TAXREF = [
+    'REGNE', 'PHYLUM', 'CLASSE', 'ORDRE', 'FAMILLE', 'SOUS_FAMILLE', 'TRIBU',
+    'GROUP1_INPN', 'GROUP2_INPN', 'GROUP3_INPN', 'CD_NOM', 'CD_TAXSUP', 'CD_SUP',
+    'CD_REF', 'CD_BA', 'RANG', 'LB_NOM', 'LB_AUTEUR', 'NOM_COMPLET', 'NOM_COMPLET_HTML',
+    'NOM_VALIDE', 'NOM_VERN', 'NOM_VERN_ENG', 'HABITAT', 'FR', 'GF', 'MAR', 'GUA',
+    'SM', 'SB', 'SPM', 'MAY', 'EPA', 'REU', 'SA', 'TA', 'TAAF', 'PF', 'NC', 'WF',
+    'CLI', 'URL_INPN', 'URL']
+
+def generer_archive(path: str, version: int, nombre_lignes: int, seed: int=0)->None:
+    """
+    Génère une archive ZIP contenant un fichier TAXREF synthétique.
+    Les groupes, ordres et familles sont tirés des définitions de `taxongroupe.TAXONS`
+    pour que chaque taxon reçoive des lignes.
+    """
+
+    rng = random.Random(seed)
+    taxons = taxongroupe.TAXONS
+    presences = ['P', 'E', 'S', 'C', 'A', 'X', '']
+
+    lignes = ["\t".join(COLONNES_TAXREF)]
+    for i in range(nombre_lignes):
+        taxon = rng.choice(taxons)
+        ligne = dict.fromkeys(COLONNES_TAXREF, "")
+        cd_nom = str(100000 + i)
+        ligne.update({
+            'REGNE': taxon.regne,
+            'GROUP1_INPN': rng.choice(taxon.groupe1),
+            'GROUP2_INPN': rng.choice(taxon.groupe2),
+            'GROUP3_INPN': rng.choice(taxon.groupe3),
+            'ORDRE': rng.choice(taxon.ordre),
+            'FAMILLE': rng.choice(taxon.famille),
+            'CD_NOM': cd_nom,
+            'CD_REF': cd_nom if rng.random() < 0.6 else str(100000 + rng.randrange(i + 1)),
+            'RANG': rng.choice(['ES', 'SSES', 'VAR', 'GN']),
+            'LB_NOM': f"Genus species{i}",
+            'NOM_COMPLET': f"Genus species{i} Auteur, 1900",
+            'NOM_COMPLET_HTML': f"<i>Genus species{i}</i> Auteur, 1900",
+            'NOM_VALIDE': f"Genus species{rng.randrange(nombre_lignes)} Auteur",
+            'NOM_VERN': rng.choice(["", f"Nom vernaculaire {rng.randrange(nombre_lignes // 5 + 1)}"]),
+            'FR': rng.choice(presences),
+            'URL': f"https://inpn.mnhn.fr/espece/cd_nom/{cd_nom}"})
+        lignes.append("\t".join(ligne[colonne] for colonne in COLONNES_TAXREF))
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(f"TAXREFv{version}.txt", "\n".join(lignes) + "\n")
+
+def mesurer(path: str, version: int, engine: str, repetitions: int)->tuple:
+    """
+    Lit et trie l'archive avec un moteur donné et renvoie (meilleure durée, résultats).
+    """
+
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        with update_taxref.ouvrir_fichier_taxref(path, version, tempfile.gettempdir()) as file:
+            resultats = update_taxref.trier_taxref(file, version, taxongroupe.TAXONS, engine=engine)
+        durees.append(time.perf_counter() - debut)
+
+    return min(durees), resultats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("archive", nargs="?", help="Archive ZIP de TAXREF")
+    parser.add_argument("version", nargs="?", type=int, default=18, help="Version de TAXREF de l'archive")
+    parser.add_argument("--synthetique", type=int, default=200000, help="Nombre de lignes du fichier synthétique")
+    parser.add_argument("--repetitions", type=int, default=3, help="Nombre de mesures par moteur")
+    args = parser.parse_args()
+
+    path = args.archive
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "TAXREF_synthetique.zip")
+        print(f"Génération de {args.synthetique} lignes synthétiques dans {path}")
+        generer_archive(path, args.version, args.synthetique)
+
+    if update_taxref.get_engine(update_taxref.ENGINE_PYARROW) != update_taxref.ENGINE_PYARROW:
+        sys.exit("pyarrow n'est pas installé : rien à comparer.")
+
+    duree_pandas, resultats_pandas = mesurer(path, args.version, update_taxref.ENGINE_PANDAS, args.repetitions)
+    duree_pyarrow, resultats_pyarrow = mesurer(path, args.version, update_taxref.ENGINE_PYARROW, args.repetitions)
+
+    print(f"pandas  : {duree_pandas:.2f} s")
+    print(f"pyarrow : {duree_pyarrow:.2f} s (x{duree_pandas / duree_pyarrow:.1f})")
+
+    # Vérifie que les deux moteurs produisent les mêmes couches Liste
+    for title, df_pandas in resultats_pandas.items():
+        pd.testing.assert_frame_equal(df_pandas, resultats_pyarrow[title])
+        print(f"  {title} : {len(df_pandas)} lignes identiques")
+
+if __name__ == "__main__":
+    main()
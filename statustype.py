@@ -1,6 +1,7 @@
-import requests
 import pandas as pd
 
+from .HttpSession import get_json_cached
+
 
 class StatusType():
 
@@ -24,8 +25,7 @@ class StatusType():
     
     def search_in_api(self):
         
-        response = requests.get(self.types_url)
-        data_json = response.json()
+        data_json = get_json_cached(self.types_url)
 
         status_list = data_json['_embedded']['statusTypes']
         df_page = pd.json_normalize(status_list, sep='_')
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from .utils import list_layers_from_gpkg, list_layers_from_qgis, print_debug_info
 #from utils2 import list_layers_from_gpkg, list_layers_from_qgis, print_debug_info
@@ -44,6 +45,52 @@ class TaxonGroupe():
     def is_famille_empty(self):
         return self.famille == [""]
 
+    def colonnes_filtre(self, synonyme: bool=False)->list:
+        """
+        Liste les colonnes de TAXREF nécessaires à `filtre_df` pour ce groupe taxonomique.
+
+        Args:
+            synonyme (bool): Indique si les synonymes sont inclus. Par défaut, False.
+
+        Returns:
+            list: Les noms des colonnes lues par le filtre.
+        """
+
+        # Colonnes toujours utilisées
+        colonnes = ['REGNE', 'GROUP1_INPN', 'FR']
+
+        # Colonnes optionnelles, si le critère est précisé
+        if not self.is_ordre_empty() :
+            colonnes.append('ORDRE')
+        if not self.is_groupe2_empty() :
+            colonnes.append('GROUP2_INPN')
+        if not self.is_groupe3_empty() :
+            colonnes.append('GROUP3_INPN')
+        if not self.is_famille_empty() :
+            colonnes.append('FAMILLE')
+
+        # Validité taxonomique
+        if not synonyme:
+            colonnes += ['CD_NOM', 'CD_REF']
+
+        return colonnes
+
+    def criteres(self)->dict:
+        """
+        Renvoie les critères taxonomiques du groupe, colonne par colonne.
+
+        Returns:
+            dict: Pour chaque colonne de TAXREF, la liste des valeurs acceptées,
+                  ou None si le critère n'est pas précisé (toutes les valeurs sont acceptées).
+        """
+
+        return {'REGNE': [self.regne],
+                'GROUP1_INPN': self.groupe1,
+                'GROUP2_INPN': None if self.is_groupe2_empty() else self.groupe2,
+                'GROUP3_INPN': None if self.is_groupe3_empty() else self.groupe3,
+                'ORDRE': None if self.is_ordre_empty() else self.ordre,
+                'FAMILLE': None if self.is_famille_empty() else self.famille}
+
     def filtre_df(self, df: pd.DataFrame, synonyme: bool=False):
         """
         Filtre les lignes d'un DataFrame en fonction des critères spécifiques
@@ -57,39 +104,137 @@ class TaxonGroupe():
             pd.DataFrame: Un DataFrame filtré selon les critères spécifiés.
         """
 
-        # Base : conditions toujours présentes
-        conditions = [
-            df['REGNE'] == self.regne,
-            df['GROUP1_INPN'].isin(self.groupe1),
-            df['FR'].isin(['P', 'E', 'S', 'C', 'I', 'J', 'M', 'B', 'D', 'G'])
-        ]
+        # Appartenance des lignes à ce seul groupe taxonomique
+        appartenance = ClassificateurTaxons([self]).appartenance(df, synonyme=synonyme)
 
-        # Ordre, si précisé
-        if not self.is_ordre_empty() :
-            conditions.append(df['ORDRE'].isin(self.ordre))
+        df_filtre = df[appartenance[:, 0]]
+        
+        return df_filtre
 
-        # Groupe2, si précisé
-        if not self.is_groupe2_empty() :
-            conditions.append(df['GROUP2_INPN'].isin(self.groupe2))
+class ClassificateurTaxons():
+    """
+    Classificateur compilé à partir d'une liste de groupes taxonomiques.
 
-        # Groupe3, si précisé
-        if not self.is_groupe3_empty() :
-            conditions.append(df['GROUP3_INPN'].isin(self.groupe3))
+    Les critères de tous les groupes sont compilés en tables de correspondance :
+    pour chaque colonne (REGNE, GROUP1_INPN, GROUP2_INPN, GROUP3_INPN, ORDRE, FAMILLE),
+    chaque valeur est associée à un masque de bits des groupes qui l'acceptent.
+    Une seule passe vectorisée sur les codes des colonnes catégorielles indique
+    ensuite, pour chaque ligne, les groupes qui la retiennent.
 
-        # Famille, si précisé
-        if not self.is_famille_empty() :
-            conditions.append(df['FAMILLE'].isin(self.famille))
+    Comme avec `TaxonGroupe.filtre_df`, une ligne acceptée par plusieurs groupes
+    est retenue par chacun d'eux.
+    """
 
-        # Validité taxonomique
+    # Types de présence en France métropolitaine retenus
+    presences = ['P', 'E', 'S', 'C', 'I', 'J', 'M', 'B', 'D', 'G']
+
+    # Nombre maximal de groupes (un bit par groupe dans un entier 64 bits signé)
+    nombre_max_taxons = 63
+
+    def __init__(self, taxons: list[TaxonGroupe]):
+        """
+        Compile les critères des groupes taxonomiques.
+
+        :param:
+        taxons (list[TaxonGroupe]): liste des groupes à reconnaître
+
+        :raise:
+        ValueError: si la liste contient plus de `nombre_max_taxons` groupes
+        """
+
+        if len(taxons) > self.nombre_max_taxons:
+            raise ValueError(f"Le classificateur accepte au plus {self.nombre_max_taxons} taxons, {len(taxons)} demandés.")
+
+        self.taxons = list(taxons)
+        # Masque de tous les groupes
+        self.masque_complet = (1 << len(self.taxons)) - 1
+
+        # Pour chaque colonne : table {valeur: masque} et masque par défaut (groupes sans critère)
+        self.tables = {}
+        criteres_taxons = [taxon.criteres() for taxon in self.taxons]
+        for colonne in criteres_taxons[0] if criteres_taxons else []:
+            table = {}
+            defaut = 0
+            for i, criteres in enumerate(criteres_taxons):
+                if criteres[colonne] is None:
+                    defaut |= 1 << i
+                else:
+                    for valeur in criteres[colonne]:
+                        table[valeur] = table.get(valeur, 0) | (1 << i)
+
+            # Inutile de lire une colonne qu'aucun groupe ne contraint
+            if defaut == self.masque_complet:
+                continue
+
+            # Les groupes sans critère acceptent aussi les valeurs listées par les autres
+            self.tables[colonne] = ({valeur: masque | defaut for valeur, masque in table.items()}, defaut)
+
+    @staticmethod
+    def masque_colonne(serie: pd.Series, table: dict, defaut: int)->np.ndarray:
+        """
+        Traduit une colonne en masques de bits via sa table de correspondance,
+        en travaillant sur les codes de la colonne catégorielle.
+
+        :param:
+        serie (pd.Series): colonne à traduire (catégorielle ou non)
+        table (dict): table {valeur: masque}
+        defaut (int): masque des valeurs absentes de la table (et des valeurs manquantes)
+
+        :return:
+        np.ndarray: masque de bits de chaque ligne
+        """
+
+        if not isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype('category')
+
+        # Table indexée par code ; le code -1 (valeur manquante) tombe sur le dernier élément
+        correspondance = np.array([table.get(categorie, defaut) for categorie in serie.cat.categories] + [defaut],
+                                  dtype=np.int64)
+
+        return correspondance[serie.cat.codes.to_numpy()]
+
+    def appartenance(self, df: pd.DataFrame, synonyme: bool=False)->np.ndarray:
+        """
+        Indique, pour chaque ligne, les groupes taxonomiques qui la retiennent.
+
+        :param:
+        df (pd.DataFrame): lignes de TAXREF à classer
+        synonyme (bool): si True, les synonymes (CD_NOM != CD_REF) sont aussi classés
+
+        :return:
+        np.ndarray: matrice booléenne (lignes x groupes), vraie si le groupe `self.taxons[j]` retient la ligne i
+        """
+
+        masque = np.full(len(df), self.masque_complet, dtype=np.int64)
+
+        # Critères propres à chaque groupe
+        for colonne, (table, defaut) in self.tables.items():
+            masque &= self.masque_colonne(df[colonne], table, defaut)
+
+        # Critères communs à tous les groupes : présence en France et validité taxonomique
+        commun = df['FR'].isin(self.presences)
         if not synonyme:
-            conditions.append(df['CD_NOM'] == df['CD_REF'])
+            commun &= df['CD_NOM'] == df['CD_REF']
+        masque[~commun.to_numpy()] = 0
 
-        # Application des filtres combinés
-        final_condition = pd.concat(conditions, axis=1).all(axis=1)
+        # Un bit par groupe
+        return (masque[:, np.newaxis] >> np.arange(len(self.taxons), dtype=np.int64)) & 1 == 1
 
-        df_filtre = df[final_condition]
-        
-        return df_filtre
+    def repartir(self, df: pd.DataFrame, synonyme: bool=False)->dict[str, pd.DataFrame]:
+        """
+        Répartit les lignes d'un DataFrame entre les groupes taxonomiques.
+
+        :param:
+        df (pd.DataFrame): lignes de TAXREF à répartir
+        synonyme (bool): si True, les synonymes (CD_NOM != CD_REF) sont aussi répartis
+
+        :return:
+        dict: pour chaque titre de groupe, le DataFrame de ses lignes
+        """
+
+        appartenance = self.appartenance(df, synonyme=synonyme)
+
+        return {taxon.title: df[appartenance[:, i]] for i, taxon in enumerate(self.taxons)}
 
 # Constante variables
 
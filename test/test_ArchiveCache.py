@@ -0,0 +1,128 @@
+# coding=utf-8
+"""Tests du cache partagé des archives TAXREF."""
+
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from .. import ArchiveCache
+from ..ArchiveCache import ArchiveCacheManager, find_local_archive, verify_archive
+
+
+class ArchiveCacheManagerTest(unittest.TestCase):
+    """Test de l'ajout, de la vérification et de l'éviction des archives."""
+
+    def setUp(self):
+        """Dossier de cache temporaire."""
+        self.dossier = tempfile.mkdtemp()
+        self.cache = ArchiveCacheManager(os.path.join(self.dossier, "cache"), max_size=10 ** 9)
+
+    def tearDown(self):
+        shutil.rmtree(self.dossier)
+
+    def creer_archive(self, version, taille=1000):
+        """Crée une archive de TAXREF factice."""
+        path = os.path.join(self.dossier, f"telechargement_{version}.zip")
+        with zipfile.ZipFile(path, "w") as zip_file:
+            zip_file.writestr(f"TAXREFv{version}.txt", os.urandom(taille))
+        return path
+
+    def test_ajout_et_lecture(self):
+        """Une archive ajoutée est retrouvée par sa version."""
+        path = self.cache.add_archive(17, self.creer_archive(17))
+        self.assertEqual(self.cache.get_archive(17), path)
+        self.assertIsNone(self.cache.get_archive(18))
+
+    def test_code_archive(self):
+        """Une archive téléchargée depuis un autre document du MNHN n'est pas réutilisée."""
+        path = self.cache.add_archive(17, self.creer_archive(17), cd_doc="1234")
+        self.assertEqual(self.cache.get_archive(17, cd_doc="1234"), path)
+        self.assertEqual(self.cache.get_archive(17), path)
+        self.assertIsNone(self.cache.get_archive(17, cd_doc="5678"))
+
+    def test_archive_invalide(self):
+        """Une archive qui ne contient pas la bonne version est refusée."""
+        with self.assertRaises(ValueError):
+            self.cache.add_archive(18, self.creer_archive(17))
+
+    def test_archive_corrompue(self):
+        """Une archive modifiée dans le cache est supprimée."""
+        path = self.cache.add_archive(17, self.creer_archive(17))
+        with open(path, "r+b") as file:
+            file.seek(40)
+            file.write(b"corruption")
+        self.assertIsNone(self.cache.get_archive(17))
+        self.assertFalse(os.path.exists(path))
+
+    def test_empreinte_recalculee(self):
+        """L'empreinte n'est recalculée que si la taille ou la date de l'archive a changé, ou sur demande."""
+        path = self.cache.add_archive(17, self.creer_archive(17))
+        # Archive ancienne : sa date n'est plus trop proche de sa vérification
+        os.utime(path, (1e9, 1e9))
+
+        with mock.patch.object(ArchiveCache, "sha256_file", wraps=ArchiveCache.sha256_file) as sha256_file:
+            # Date modifiée depuis l'ajout : l'empreinte est recalculée une fois, puis la date est retenue
+            self.assertEqual(self.cache.get_archive(17), path)
+            self.assertEqual(sha256_file.call_count, 1)
+            self.assertEqual(self.cache.get_archive(17), path)
+            self.assertEqual(sha256_file.call_count, 1)
+
+            # Vérification demandée
+            self.assertEqual(self.cache.get_archive(17, verify=True), path)
+            self.assertEqual(sha256_file.call_count, 2)
+
+            # Archive modifiée sans changer de taille, à une autre date
+            with open(path, "r+b") as file:
+                file.seek(40)
+                file.write(b"corruption")
+            os.utime(path, (1e9 + 1, 1e9 + 1))
+            self.assertIsNone(self.cache.get_archive(17))
+            self.assertEqual(sha256_file.call_count, 3)
+            self.assertFalse(os.path.exists(path))
+
+    def test_eviction_lru(self):
+        """Au-delà du budget, l'archive la moins récemment utilisée est supprimée."""
+        self.cache.add_archive(16, self.creer_archive(16, 5000))
+        self.cache.add_archive(17, self.creer_archive(17, 5000))
+        taille = os.path.getsize(self.cache.get_archive_path(16))
+        # La 16 est utilisée après la 17 : c'est la 17 qui doit partir
+        self.cache.get_archive(16)
+        self.cache.max_size = 2 * taille + taille // 2
+        self.cache.add_archive(18, self.creer_archive(18, 5000))
+
+        self.assertIsNotNone(self.cache.get_archive(16))
+        self.assertIsNone(self.cache.get_archive(17))
+        self.assertIsNotNone(self.cache.get_archive(18))
+
+    def test_archive_locale(self):
+        """Dans un dossier d'archives, seule l'archive valide de la version est retenue."""
+        dossier = os.path.join(self.dossier, "archives")
+        os.makedirs(dossier)
+        shutil.move(self.creer_archive(17), os.path.join(dossier, "TAXREF_v17.zip"))
+        shutil.move(self.creer_archive(18), os.path.join(dossier, "TAXREF_v18.zip"))
+
+        self.assertEqual(find_local_archive(dossier, 18), os.path.join(dossier, "TAXREF_v18.zip"))
+        self.assertEqual(find_local_archive(os.path.join(dossier, "TAXREF_v17.zip"), 17),
+                         os.path.join(dossier, "TAXREF_v17.zip"))
+        self.assertIsNone(find_local_archive(dossier, 16))
+        self.assertIsNone(find_local_archive(os.path.join(dossier, "absente.zip"), 18))
+
+    def test_archive_locale_corrompue(self):
+        """Une archive dont le contenu ne correspond plus au CRC est refusée avant le tri."""
+        path = self.creer_archive(18, 5000)
+        verify_archive(path, 18)
+        with open(path, "r+b") as file:
+            file.seek(200)
+            file.write(b"corruption")
+        with self.assertRaises(ValueError):
+            verify_archive(path, 18)
+        self.assertIsNone(find_local_archive(path, 18))
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ArchiveCacheManagerTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
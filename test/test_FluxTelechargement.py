@@ -0,0 +1,127 @@
+# coding=utf-8
+"""Tests de la lecture de l'archive TAXREF pendant son téléchargement."""
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import zipfile
+
+from ..FluxTelechargement import FluxTelechargement, FluxNonSupporte, ouvrir_fichier_flux
+
+
+class EcritureNonPositionnable(io.RawIOBase):
+    """Fichier sans seek : zipfile écrit alors les tailles dans un descripteur de données (bit 3)."""
+
+    def __init__(self, file):
+        self.file = file
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.file.write(data)
+
+
+class FluxTelechargementTest(unittest.TestCase):
+    """Test de la décompression du membre TAXREF au fil de l'écriture de l'archive."""
+
+    def setUp(self):
+        """Contenu TAXREF factice et dossier temporaire."""
+        self.dossier = tempfile.mkdtemp()
+        lignes = ["CD_NOM\tCD_REF\tLB_NOM"] + [f"{i}\t{i // 2}\tGenus species{i}" for i in range(50000)]
+        self.contenu = "\n".join(lignes) + "\n"
+
+    def tearDown(self):
+        shutil.rmtree(self.dossier)
+
+    def creer_archive(self, compression=zipfile.ZIP_DEFLATED, descripteur=False):
+        """Renvoie les octets d'une archive dont le membre TAXREF suit un autre membre."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(EcritureNonPositionnable(archive) if descripteur else archive, "w", compression) as zip_file:
+            zip_file.writestr("LISEZMOI.txt", "TAXREF v18")
+            zip_file.writestr("TAXREFv18.txt", self.contenu)
+        return archive.getvalue()
+
+    def telecharger(self, flux, donnees, erreur=None):
+        """Écrit l'archive par petits morceaux, comme DownloadTaxrefThread."""
+        path = os.path.join(self.dossier, "telechargement.zip")
+        with open(path, "wb") as file:
+            flux.commencer(path)
+            for debut in range(0, len(donnees), 4096):
+                if erreur is not None and debut > len(donnees) // 2:
+                    flux.terminer(erreur)
+                    flux.publier(erreur=erreur)
+                    return
+                file.write(donnees[debut:debut + 4096])
+                file.flush()
+                flux.ajouter(len(donnees[debut:debut + 4096]))
+        flux.terminer()
+        flux.attendre_liberation()
+        flux.publier(path)
+
+    def lire(self, donnees, erreur=None):
+        """Lit le membre TAXREF pendant l'écriture de l'archive dans un autre thread."""
+        flux = FluxTelechargement()
+        thread = threading.Thread(target=self.telecharger, args=(flux, donnees, erreur))
+        thread.start()
+        try:
+            with ouvrir_fichier_flux(flux, 18) as file:
+                return file.read()
+        finally:
+            thread.join()
+
+    def test_deflate(self):
+        """Un membre compressé est lu en entier pendant le téléchargement."""
+        self.assertEqual(self.lire(self.creer_archive()), self.contenu)
+
+    def test_stocke(self):
+        """Un membre stocké sans compression est lu en entier."""
+        self.assertEqual(self.lire(self.creer_archive(zipfile.ZIP_STORED)), self.contenu)
+
+    def test_descripteur(self):
+        """Un membre compressé dont le CRC suit les données est lu et vérifié."""
+        donnees = self.creer_archive(descripteur=True)
+        with self.assertRaises(FluxNonSupporte):
+            # Le membre précédent, de taille inconnue, ne peut pas être sauté
+            self.lire(donnees)
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(EcritureNonPositionnable(archive), "w", zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("TAXREFv18.txt", self.contenu)
+        self.assertEqual(self.lire(archive.getvalue()), self.contenu)
+
+    def test_crc_incorrect(self):
+        """Un membre altéré est détecté à la fin de sa lecture."""
+        donnees = bytearray(self.creer_archive(zipfile.ZIP_STORED))
+        position = donnees.index(b"Genus species25000")
+        donnees[position] = ord("X")
+        with self.assertRaises(zipfile.BadZipFile):
+            self.lire(bytes(donnees))
+
+    def test_erreur_telechargement(self):
+        """Une erreur du téléchargement interrompt la lecture."""
+        with self.assertRaises(IOError):
+            self.lire(self.creer_archive(zipfile.ZIP_STORED), erreur=ConnectionError("coupure"))
+
+    def test_archive_en_cache(self):
+        """Une archive publiée sans téléchargement est lue après coup."""
+        flux = FluxTelechargement()
+        flux.publier("archive_du_cache.zip")
+        with self.assertRaises(FluxNonSupporte):
+            with ouvrir_fichier_flux(flux, 18):
+                pass
+        self.assertEqual(flux.attendre_archive(), "archive_du_cache.zip")
+
+    def test_attente_liberation_limitee(self):
+        """L'attente de la libération du fichier peut être limitée, pour qu'une annulation ne bloque pas."""
+        flux = FluxTelechargement()
+        self.assertFalse(flux.attendre_liberation(timeout=0.01))
+        flux.liberer()
+        self.assertTrue(flux.attendre_liberation(timeout=0.01))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# coding=utf-8
+"""Tests de la comparaison des versions locales et en ligne de TAXREF."""
+
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from .. import GetVersions
+from ..GetVersions import VersionManager
+from ..taxongroupe import FLORE, AMPHIBIENS, REPTILES, OISEAUX, MAMMIFERES
+
+
+class VersionsTaxonsTest(unittest.TestCase):
+    """Test des versions par taxon et du choix des taxons à mettre à jour."""
+
+    def setUp(self):
+        """
+        Statuts.gpkg simulé, pour une version en ligne 18 :
+        - Flore : version 18 dans la table Versions ;
+        - Amphibien : couche écrite avant la table Versions, colonne VERSION à 17 au plus bas ;
+        - Reptile : couche sans colonne VERSION ;
+        - Avifaune : pas de couche Liste ;
+        - Mammifere : version 19 dans la table Versions.
+        """
+        couches = {"Liste Amphibien": pd.DataFrame({"CD_NOM": [1, 2], "VERSION": ["18", "17"]}),
+                   "Liste Reptile": pd.DataFrame({"CD_NOM": [3]})}
+        patches = [mock.patch.object(GetVersions.os.path, "isfile", return_value=True),
+                   mock.patch.object(GetVersions, "list_layers_from_qgis",
+                                     return_value=["Liste Flore", "Liste Amphibien", "Liste Reptile",
+                                                   "Liste Mammifere", "Statuts Flore", "Versions"]),
+                   mock.patch.object(GetVersions, "get_layer_versions",
+                                     return_value={"Liste Flore": 18, "Liste Mammifere": 19}),
+                   mock.patch.object(GetVersions, "load_layer_as_dataframe",
+                                     side_effect=lambda file_path, layer_name: couches[layer_name]),
+                   mock.patch.object(GetVersions, "get_json_cached", return_value={"id": 18})]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.manager = VersionManager("projet", [FLORE, AMPHIBIENS, REPTILES, OISEAUX, MAMMIFERES])
+        self.manager.set_data_version()
+        self.manager.set_current_version()
+
+    def test_taxon_versions(self):
+        """Version de chaque taxon, -1 sans couche Liste ou sans colonne VERSION."""
+        self.assertEqual(self.manager.taxon_versions,
+                         {"Flore": 18, "Amphibien": 17, "Reptile": -1, "Avifaune": -1, "Mammifere": 19})
+        self.assertEqual(self.manager.data_version, -1)
+        self.assertEqual(self.manager.current_version, 18)
+        self.assertFalse(self.manager.issame_versions())
+
+    def test_version_en_ligne_revalidee(self):
+        """La version en ligne est toujours redemandée, même si la réponse n'a pas de validateurs."""
+        GetVersions.get_json_cached.assert_called_once_with(self.manager.url, ttl=0)
+
+    def test_is_stale(self):
+        """Seule une couche à la version en ligne est à jour."""
+        self.assertFalse(self.manager.is_stale(FLORE))
+        # Version plus ancienne
+        self.assertTrue(self.manager.is_stale(AMPHIBIENS))
+        # Colonne VERSION absente
+        self.assertTrue(self.manager.is_stale(REPTILES))
+        # Pas de couche
+        self.assertTrue(self.manager.is_stale(OISEAUX))
+        # Version différente de la version en ligne, même plus récente
+        self.assertTrue(self.manager.is_stale(MAMMIFERES))
+
+    def test_get_stale_taxons(self):
+        """Les taxons à mettre à jour sont renvoyés dans l'ordre du projet."""
+        self.assertEqual(self.manager.get_stale_taxons(), [AMPHIBIENS, REPTILES, OISEAUX, MAMMIFERES])
+
+        self.manager.current_version = 17
+        self.assertEqual(self.manager.get_stale_taxons(), [FLORE, REPTILES, OISEAUX, MAMMIFERES])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+# coding=utf-8
+"""Tests de la session HTTP partagée."""
+
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from requests.adapters import HTTPAdapter
+
+from .. import HttpSession
+from ..HttpSession import TimeoutHTTPAdapter, get_session, close_session, get_json_cached
+
+
+class HttpSessionTest(unittest.TestCase):
+    """Test du partage de la session et des délais par défaut."""
+
+    def tearDown(self):
+        close_session()
+
+    def test_session_partagee(self):
+        """Tous les appels utilisent la même session jusqu'à sa fermeture."""
+        session = get_session()
+        self.assertIs(get_session(), session)
+        close_session()
+        self.assertIsNot(get_session(), session)
+
+    def test_delai_par_defaut(self):
+        """Le délai de l'adaptateur s'applique aux requêtes qui n'en précisent pas."""
+        adapter = TimeoutHTTPAdapter(timeout=(HttpSession.DELAI_CONNEXION, HttpSession.DELAI_LECTURE))
+        with mock.patch.object(HTTPAdapter, "send", return_value=None) as send:
+            adapter.send("requete")
+            self.assertEqual(send.call_args.kwargs["timeout"], (HttpSession.DELAI_CONNEXION, HttpSession.DELAI_LECTURE))
+            adapter.send("requete", timeout=5)
+            self.assertEqual(send.call_args.kwargs["timeout"], 5)
+
+    def test_connexions_par_hote(self):
+        """Le nombre de connexions par hôte est limité par le pool de l'adaptateur."""
+        adapter = get_session().get_adapter("https://taxref.mnhn.fr/api")
+        self.assertEqual(adapter._pool_maxsize, HttpSession.CONNEXIONS_PAR_HOTE)
+        self.assertTrue(adapter._pool_block)
+
+
+class ReponseFactice:
+    """Réponse HTTP minimale."""
+
+    def __init__(self, status_code=200, data=None, headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise IOError(self.status_code)
+
+    def json(self):
+        return self.data
+
+
+class CacheConditionnelTest(unittest.TestCase):
+    """Test des requêtes conditionnelles et du cache local des réponses JSON."""
+
+    url = "https://taxref.mnhn.fr/api/taxrefVersions/current"
+
+    def setUp(self):
+        """Dossier de cache temporaire et réglages par défaut."""
+        self.dossier = tempfile.mkdtemp()
+        for patch in (mock.patch.object(HttpSession, "get_cache_dir", return_value=self.dossier),
+                      mock.patch.object(HttpSession, "get_plugin_setting",
+                                        side_effect=lambda key, default=None, value_type=str: default)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.dossier)
+
+    def test_validateurs(self):
+        """Les validateurs sont renvoyés et une réponse 304 est servie depuis le cache."""
+        reponses = [ReponseFactice(data={"id": 18}, headers={"ETag": '"v18"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+                    ReponseFactice(304),
+                    ReponseFactice(data={"id": 19}, headers={"ETag": '"v19"'})]
+        with mock.patch.object(HttpSession, "http_get", side_effect=reponses) as http_get:
+            self.assertEqual(get_json_cached(self.url), {"id": 18})
+            self.assertEqual(http_get.call_args.kwargs["headers"], {})
+
+            self.assertEqual(get_json_cached(self.url), {"id": 18})
+            self.assertEqual(http_get.call_args.kwargs["headers"],
+                             {"If-None-Match": '"v18"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+            self.assertEqual(get_json_cached(self.url), {"id": 19})
+            self.assertEqual(http_get.call_count, 3)
+
+    def test_duree_sans_validateurs(self):
+        """Sans validateurs, la réponse en cache est réutilisée sans requête jusqu'à expiration."""
+        reponses = [ReponseFactice(data={"id": 18}), ReponseFactice(data={"id": 19})]
+        with mock.patch.object(HttpSession, "http_get", side_effect=reponses) as http_get:
+            self.assertEqual(get_json_cached(self.url), {"id": 18})
+            self.assertEqual(get_json_cached(self.url), {"id": 18})
+            self.assertEqual(http_get.call_count, 1)
+
+            self.assertEqual(get_json_cached(self.url, ttl=0), {"id": 19})
+            self.assertEqual(http_get.call_count, 2)
+
+    def test_sans_duree(self):
+        """Avec une durée nulle, une réponse sans validateurs est redemandée à chaque appel."""
+        reponses = [ReponseFactice(data={"id": 18}), ReponseFactice(data={"id": 19})]
+        with mock.patch.object(HttpSession, "http_get", side_effect=reponses) as http_get:
+            self.assertEqual(get_json_cached(self.url, ttl=0), {"id": 18})
+            self.assertEqual(get_json_cached(self.url, ttl=0), {"id": 19})
+            self.assertEqual(http_get.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
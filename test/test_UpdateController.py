@@ -0,0 +1,101 @@
+# coding=utf-8
+"""Tests de l'enchaînement des mises à jour."""
+
+import unittest
+from unittest import mock
+
+from .. import UpdateController as module_controleur
+from ..UpdateController import UpdateController
+from ..taxongroupe import FLORE, AMPHIBIENS, REPTILES
+
+
+class SauvegardeSourcesTest(unittest.TestCase):
+    """Test de la dernière étape des mises à jour : la sauvegarde de la couche Sources."""
+
+    def controleur(self, only_new_taxons):
+        """Contrôleur factice à la fin des mises à jour."""
+        controleur = mock.Mock()
+        controleur.only_new_taxons = only_new_taxons
+        controleur.debug = 0
+        return controleur
+
+    def test_ajout_de_taxons(self):
+        """Un simple ajout de taxons ne réécrit pas la couche Sources."""
+        controleur = self.controleur(only_new_taxons=True)
+        UpdateController._start_save_sources(controleur)
+        controleur.source_model.save_new_sources.assert_not_called()
+        controleur.last_save_finished.emit.assert_called_once_with()
+
+    def test_mise_a_jour(self):
+        """Une mise à jour de TAXREF ou des statuts enregistre les sources."""
+        controleur = self.controleur(only_new_taxons=False)
+        UpdateController._start_save_sources(controleur)
+        controleur.source_model.save_new_sources.assert_called_once_with()
+        controleur.last_save_finished.emit.assert_called_once_with()
+
+
+class RechercheMiseAJourTest(unittest.TestCase):
+    """Test du choix des taxons à mettre à jour par `search_for_update`."""
+
+    def controleur(self, memes_versions, taxons_en_retard, couches):
+        """
+        Contrôleur factice : gestionnaire de versions simulé et couches présentes dans Statuts.gpkg.
+        `couches` est la liste des titres de taxons qui ont leurs couches Liste et Statuts.
+        """
+        controleur = mock.Mock()
+        controleur.debug = 0
+        controleur.do_update = False
+        controleur.only_new_taxons = False
+        controleur.update_taxons = []
+        controleur.local_taxons = [FLORE, AMPHIBIENS, REPTILES]
+        controleur.version_model.issame_versions.return_value = memes_versions
+        controleur.version_model.get_stale_taxons.return_value = taxons_en_retard
+        controleur.source_model.is_new_sources.return_value = False
+
+        patch = mock.patch.object(module_controleur, "get_taxon_titles", return_value=list(couches))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        return controleur
+
+    def test_nouvelle_version(self):
+        """Nouvelle version : les taxons en retard et ceux sans couches sont mis à jour."""
+        controleur = self.controleur(memes_versions=False, taxons_en_retard=[FLORE],
+                                     couches=["Flore", "Amphibien"])
+        UpdateController.search_for_update(controleur)
+
+        self.assertEqual(controleur.update_taxons, [FLORE, REPTILES])
+        self.assertFalse(controleur.only_new_taxons)
+        self.assertTrue(controleur.new_version)
+        controleur.ask_update_taxref.assert_called_once_with()
+        controleur.source_model.check_update_status.assert_not_called()
+        controleur.search_for_update_finished.emit.assert_called_once_with()
+
+    def test_nouveaux_taxons(self):
+        """Même version : seuls les taxons sans couches sont ajoutés."""
+        controleur = self.controleur(memes_versions=True, taxons_en_retard=[],
+                                     couches=["Flore", "Amphibien"])
+        UpdateController.search_for_update(controleur)
+
+        self.assertEqual(controleur.update_taxons, [REPTILES])
+        self.assertTrue(controleur.only_new_taxons)
+        controleur.ask_update_taxref.assert_called_once_with()
+        controleur.source_model.check_update_status.assert_not_called()
+        controleur.search_for_update_finished.emit.assert_called_once_with()
+
+    def test_rien_a_faire(self):
+        """Même version et toutes les couches présentes : seules les sources sont vérifiées."""
+        controleur = self.controleur(memes_versions=True, taxons_en_retard=[],
+                                     couches=["Flore", "Amphibien", "Reptile"])
+        UpdateController.search_for_update(controleur)
+
+        self.assertEqual(controleur.update_taxons, [])
+        self.assertFalse(controleur.only_new_taxons)
+        controleur.ask_update_taxref.assert_not_called()
+        controleur.source_model.check_update_status.assert_called_once_with()
+        controleur.ask_update_status.assert_not_called()
+        controleur.search_for_update_finished.emit.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+# coding=utf-8
+"""Tests de la recherche des nouvelles sources TAXREF."""
+
+import unittest
+from unittest import mock
+
+from .. import HttpSession
+from ..UpdateSearchStatus import SourcesManager
+
+
+class ReponseSources:
+    """Réponse de l'API sources/findByTerm."""
+
+    status_code = 200
+    headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"_embedded": {"bibliography": [
+            {"id": 1, "fullCitation": "Liste rouge des oiseaux nicheurs de France, 2024"},
+            {"id": 2, "fullCitation": "Atlas des papillons de Bretagne"},
+            {"id": 3, "fullCitation": None},
+            {"id": 4, "fullCitation": "Arrêté du 8 janvier 2021 fixant la liste des amphibiens protégés"}]}}
+
+
+class SourcesManagerTest(unittest.TestCase):
+    """Test de la récupération des sources d'une année."""
+
+    def test_sources_annee(self):
+        """Les sources de l'année sont demandées à l'API et filtrées sur les termes discriminants."""
+        manager = SourcesManager("Données.gpkg", year=2024)
+        with mock.patch.object(HttpSession, "http_get", return_value=ReponseSources()) as http_get:
+            sources = manager.get_sources_from_year(2024)
+
+        http_get.assert_called_once_with("https://taxref.mnhn.fr/api/sources/findByTerm/2024")
+        self.assertEqual(sources["id"].tolist(), [1, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+# coding=utf-8
+"""Tests du tri de TAXREF."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from .. import UpdateTAXREF
+from ..UpdateTAXREF import (supprime_nom_vernaculaire, trier_chunks, TamponResultats, SuiviProgression,
+                            taxref_en_cache, get_engine, COLONNES_SYNONYMES, pa_pq,
+                            ENGINE_AUTO, ENGINE_PANDAS, ENGINE_PYARROW)
+from ..taxongroupe import OISEAUX, MAMMIFERES, FLORE
+
+
+def supprime_nom_vernaculaire_reference(df):
+    """Ancienne implémentation (un appel Python par groupe), servant de référence."""
+    df = df.dropna(subset=["NOM_VERN"])
+    return (
+        df.groupby("NOM_VERN", group_keys=False)
+        .apply(lambda row_group: row_group.loc[row_group["NOM_VALIDE"].str.len().idxmin()])
+        .reset_index(drop=True))
+
+
+class SupprimeNomVernaculaireTest(unittest.TestCase):
+    """Test de la suppression des noms vernaculaires doubles."""
+
+    def setUp(self):
+        """Noms vernaculaires doubles, manquants et égalités de longueur."""
+        self.df = pd.DataFrame({
+            'CD_NOM': ['1', '2', '3', '4', '5', '6', '7', '8'],
+            'CD_REF': ['1', '2', '3', '4', '5', '6', '7', '8'],
+            'NOM_VALIDE': ['Aaa bbb ccc', 'Aaa bb', 'Ddd eee', 'Fff ggg', 'Hh ii', 'Jj kk', 'Ll', 'Mmm nnn'],
+            'NOM_VERN': ['Merle', 'Merle', 'Grive', None, 'Pinson', 'Pinson', 'Grive', 'Alouette'],
+            'VERSION': 18})
+
+    def test_identique_a_la_reference(self):
+        """Mêmes lignes, dans le même ordre, que l'ancienne implémentation."""
+        for taxon in (OISEAUX, MAMMIFERES):
+            attendu = supprime_nom_vernaculaire_reference(self.df.copy())
+            resultat = supprime_nom_vernaculaire(self.df.copy(), taxon)
+            # Les versions récentes de pandas retirent la clé du groupe du résultat de apply
+            pd.testing.assert_frame_equal(resultat[list(attendu.columns)], attendu, check_dtype=False)
+            self.assertEqual(list(resultat.columns), list(self.df.columns))
+
+    def test_egalite_premiere_ligne(self):
+        """En cas d'égalité de longueur, la première ligne du groupe est gardée."""
+        resultat = supprime_nom_vernaculaire(self.df.copy(), OISEAUX)
+        self.assertEqual(resultat.loc[resultat['NOM_VERN'] == 'Pinson', 'CD_NOM'].tolist(), ['5'])
+        self.assertEqual(resultat['NOM_VERN'].tolist(), ['Alouette', 'Grive', 'Merle', 'Pinson'])
+
+    def test_autres_taxons_inchanges(self):
+        """Les autres taxons ne sont pas dédoublonnés."""
+        resultat = supprime_nom_vernaculaire(self.df.copy(), FLORE)
+        pd.testing.assert_frame_equal(resultat, self.df)
+
+
+class TableSynonymesTest(unittest.TestCase):
+    """Test des tables Synonymes construites dans la même passe que les couches Liste."""
+
+    def setUp(self):
+        """Un taxon de référence, deux synonymes (dont un en double) et une plante absente de France."""
+        self.chunk = pd.DataFrame({
+            'REGNE': 'Plantae',
+            'GROUP1_INPN': 'Trachéophytes',
+            'GROUP2_INPN': 'Angiospermes',
+            'GROUP3_INPN': None,
+            'ORDRE': 'Rosales',
+            'FAMILLE': 'Rosaceae',
+            'CD_NOM': ['1', '2', '3', '3', '4'],
+            'CD_REF': ['1', '1', '1', '1', '4'],
+            'LB_NOM': ['Rosa canina', 'Rosa lutetiana', 'Rosa dumalis', 'Rosa dumalis', 'Rosa rugosa'],
+            'NOM_VALIDE': 'Rosa canina L.',
+            'NOM_VERN': 'Églantier',
+            'FR': ['P', 'P', 'P', 'P', 'Q']})
+
+    def test_liste_inchangee(self):
+        """La couche Liste est la même avec ou sans table Synonymes."""
+        attendu = trier_chunks([self.chunk.copy()], 18, [FLORE])
+        listes, synonymes = trier_chunks([self.chunk.copy()], 18, [FLORE], synonym_table=True)
+        pd.testing.assert_frame_equal(listes['Flore'], attendu['Flore'])
+        self.assertEqual(listes['Flore']['CD_NOM'].tolist(), ['1'])
+
+    def test_synonymes(self):
+        """La table garde CD_NOM, CD_REF et LB_NOM de tous les noms présents, une ligne par CD_NOM."""
+        _, synonymes = trier_chunks([self.chunk.copy()], 18, [FLORE], synonym_table=True)
+        self.assertEqual(list(synonymes['Flore'].columns), COLONNES_SYNONYMES)
+        self.assertEqual(synonymes['Flore']['CD_NOM'].tolist(), ['1', '2', '3'])
+        self.assertEqual(synonymes['Flore']['CD_REF'].tolist(), ['1', '1', '1'])
+
+
+@unittest.skipIf(pa_pq is None, "pyarrow n'est pas installé")
+class TamponResultatsTest(unittest.TestCase):
+    """Test du déversement sur le disque des lignes triées au-delà du budget mémoire."""
+
+    def morceau(self, debut, noms):
+        return pd.DataFrame({
+            'CD_NOM': [str(debut + i) for i in range(len(noms))],
+            'NOM_VERN': pd.Series(noms, dtype='category'),
+            'VERSION': 18})
+
+    def test_deversement_identique(self):
+        """Les morceaux déversés puis relus donnent la même couche que sans budget."""
+        morceaux = [self.morceau(0, ['Merle', None]), self.morceau(2, ['Grive', 'Merle']), self.morceau(4, [None, None])]
+
+        sans_budget = TamponResultats()
+        avec_budget = TamponResultats(budget=1)
+        try:
+            for morceau in morceaux:
+                sans_budget.ajouter("Liste Avifaune", morceau)
+                avec_budget.ajouter("Liste Avifaune", morceau)
+            self.assertIsNotNone(avec_budget.dossier)
+
+            attendu = sans_budget.extraire("Liste Avifaune")
+            resultat = avec_budget.extraire("Liste Avifaune")
+            pd.testing.assert_frame_equal(resultat, attendu)
+            self.assertEqual(list(resultat['NOM_VERN'].cat.categories), ['Grive', 'Merle'])
+        finally:
+            sans_budget.fermer()
+            avec_budget.fermer()
+        self.assertIsNone(avec_budget.dossier)
+
+
+@unittest.skipIf(pa_pq is None, "pyarrow n'est pas installé")
+class CacheTaxrefTest(unittest.TestCase):
+    """Test de la détection du cache Parquet de TAXREF."""
+
+    def setUp(self):
+        """Dossier de cache temporaire."""
+        self.dossier = tempfile.mkdtemp()
+        patch = mock.patch.object(UpdateTAXREF, "get_chemin_cache_taxref",
+                                  side_effect=lambda version: os.path.join(self.dossier, f"TAXREFv{version}.parquet"))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.dossier)
+
+    def test_colonnes_manquantes(self):
+        """Un cache sans LB_NOM n'est pas utilisable pour les tables Synonymes : l'archive doit être téléchargée."""
+        self.assertFalse(taxref_en_cache(18))
+
+        pd.DataFrame({'CD_NOM': ['1'], 'CD_REF': ['1']}).to_parquet(UpdateTAXREF.get_chemin_cache_taxref(18))
+        self.assertTrue(taxref_en_cache(18))
+        self.assertFalse(taxref_en_cache(18, COLONNES_SYNONYMES))
+
+        pd.DataFrame({'CD_NOM': ['1'], 'CD_REF': ['1'], 'LB_NOM': ['Genus species']}).to_parquet(
+            UpdateTAXREF.get_chemin_cache_taxref(18))
+        self.assertTrue(taxref_en_cache(18, COLONNES_SYNONYMES))
+
+
+class SuiviProgressionTest(unittest.TestCase):
+    """Test des compteurs de progression du tri de TAXREF."""
+
+    def test_emissions_limitees(self):
+        """Entre deux émissions forcées, le rappel n'est appelé qu'une fois par intervalle."""
+        appels = []
+        suivi = SuiviProgression(lambda pourcentage, message: appels.append(pourcentage), intervalle=3600)
+        suivi.couches_total = 2
+        suivi.commencer("Lecture de TAXREF", position=lambda: (50, 100))
+        for _ in range(1000):
+            suivi.router({'Flore': range(10)})
+        self.assertEqual(appels, [40])
+        self.assertEqual(suivi.lignes_par_taxon['Flore'], 10000)
+
+        suivi.lecture_terminee()
+        suivi.ecrire(10)
+        self.assertEqual(appels, [40, 90])
+        suivi.ecrire(10)
+        self.assertEqual(appels[-1], 100)
+
+    def test_interruption(self):
+        """Une annulation demandée arrête le tri à la mise à jour suivante, même sans rappel."""
+        annule = []
+        suivi = SuiviProgression(interruption=lambda: bool(annule))
+        suivi.commencer("Lecture de TAXREF")
+        chunks = suivi.compter(iter([range(10)] * 3))
+        next(chunks)
+        annule.append(True)
+        with self.assertRaises(InterruptedError):
+            next(chunks)
+
+
+class MoteurLectureTest(unittest.TestCase):
+    """Test du choix du moteur de lecture de TAXREF."""
+
+    def test_auto(self):
+        """Par défaut, TAXREF est lu avec pandas, même si pyarrow est installé."""
+        self.assertEqual(get_engine(), ENGINE_PANDAS)
+        self.assertEqual(get_engine(ENGINE_AUTO), ENGINE_PANDAS)
+
+    def test_pyarrow(self):
+        """pyarrow n'est utilisé que s'il est demandé et installé."""
+        with mock.patch.object(UpdateTAXREF, "pa_csv", None):
+            self.assertEqual(get_engine(ENGINE_PYARROW), ENGINE_PANDAS)
+        if UpdateTAXREF.pa_csv is not None:
+            self.assertEqual(get_engine(ENGINE_PYARROW), ENGINE_PYARROW)
+
+    def test_moteur_inconnu(self):
+        with self.assertRaises(ValueError):
+            get_engine("polars")
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(SupprimeNomVernaculaireTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
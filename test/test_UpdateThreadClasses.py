@@ -0,0 +1,271 @@
+# coding=utf-8
+"""Tests du téléchargement de TAXREF (reprise, segments parallèles, progression) avec un serveur HTTP local."""
+
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from .. import UpdateThreadClasses
+from ..HttpSession import close_session
+from ..UpdateThreadClasses import DownloadTaxrefThread
+
+
+class GestionnaireTaxref(BaseHTTPRequestHandler):
+    """
+    Sert le contenu du serveur, avec les requêtes Range (et If-Range) si le serveur les accepte.
+    Chaque valeur de `serveur.coupures` coupe la connexion de la réponse suivante après ce nombre d'octets.
+    Si `serveur.sans_taille` est vrai, la taille n'est pas annoncée (fin de la réponse à la fermeture).
+    """
+
+    def do_GET(self):
+        serveur = self.server
+        serveur.requetes.append(dict(self.headers))
+        contenu = serveur.contenu
+
+        statut, debut, fin = 200, 0, len(contenu) - 1
+        plage = self.headers.get("Range")
+        if (plage and serveur.accepte_range
+                and self.headers.get("If-Range") in (None, serveur.etag)):
+            debut, _, fin = plage[len("bytes="):].partition("-")
+            debut, fin = int(debut), int(fin) if fin else len(contenu) - 1
+            statut = 206
+        corps = contenu[debut:fin + 1]
+
+        self.send_response(statut)
+        if not serveur.sans_taille:
+            self.send_header("Content-Length", str(len(corps)))
+        self.send_header("ETag", serveur.etag)
+        if serveur.accepte_range:
+            self.send_header("Accept-Ranges", "bytes")
+        if statut == 206:
+            self.send_header("Content-Range", f"bytes {debut}-{fin}/{len(contenu)}")
+        self.end_headers()
+
+        coupure = serveur.coupures.pop(0) if serveur.coupures else None
+        self.wfile.write(corps if coupure is None else corps[:coupure])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TelechargementTest(unittest.TestCase):
+    """Test de la reprise et des segments du téléchargement par `DownloadTaxrefThread.download`."""
+
+    def setUp(self):
+        """Serveur local, dossier du fichier partiel et délais raccourcis."""
+        self.contenu = random.Random(0).randbytes(64 * 1024)
+
+        self.serveur = ThreadingHTTPServer(("127.0.0.1", 0), GestionnaireTaxref)
+        self.serveur.contenu = self.contenu
+        self.serveur.etag = '"v18"'
+        self.serveur.accepte_range = True
+        self.serveur.coupures = []
+        self.serveur.sans_taille = False
+        self.serveur.requetes = []
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.serveur.server_address[1]}/TAXREF_v18.zip"
+
+        self.dossier = tempfile.mkdtemp()
+        self.partiel = os.path.join(self.dossier, "TAXREF_v18.zip.part")
+
+        for patch in (mock.patch.object(UpdateThreadClasses, "DELAI_REPRISE", 0),
+                      mock.patch.object(UpdateThreadClasses, "TAILLE_MORCEAU_TELECHARGEMENT", 1024)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+        close_session()
+        shutil.rmtree(self.dossier)
+
+    def thread(self, segments=1):
+        """Thread de téléchargement dont les signaux sont simulés."""
+        thread = DownloadTaxrefThread(self.url, version=18, segments=segments)
+        thread.progress = mock.Mock()
+        thread.message = mock.Mock()
+        return thread
+
+    def partiel_existant(self, contenu, etag):
+        """Fichier partiel d'un téléchargement précédent, avec ses validateurs."""
+        with open(self.partiel, "wb") as file:
+            file.write(contenu)
+        with open(self.partiel + ".json", "w", encoding="utf-8") as file:
+            json.dump({"url": self.url, "etag": etag, "last_modified": None, "total": len(self.contenu)}, file)
+
+    def verifier_fichier(self, resultat, contenu):
+        """Le fichier partiel, sa taille et son empreinte correspondent au contenu attendu."""
+        taille, total, empreinte = resultat
+        with open(self.partiel, "rb") as file:
+            self.assertEqual(file.read(), contenu)
+        self.assertEqual((taille, total), (len(contenu), len(contenu)))
+        self.assertEqual(empreinte.hexdigest(), hashlib.sha256(contenu).hexdigest())
+
+    def test_reprise_apres_coupure(self):
+        """Après une coupure, la suite est demandée avec Range et If-Range, et ajoutée au fichier."""
+        self.serveur.coupures = [10 * 1024]
+        thread = self.thread()
+
+        self.verifier_fichier(thread.download(self.partiel), self.contenu)
+
+        self.assertEqual(len(self.serveur.requetes), 2)
+        self.assertNotIn("Range", self.serveur.requetes[0])
+        debut = int(self.serveur.requetes[1]["Range"][len("bytes="):-1])
+        self.assertTrue(0 < debut <= 10 * 1024)
+        self.assertEqual(self.serveur.requetes[1]["If-Range"], '"v18"')
+        # Seuls les octets manquants sont téléchargés à nouveau
+        self.assertEqual(thread.received_bytes, len(self.contenu))
+
+    def test_reprise_fichier_partiel(self):
+        """Un fichier partiel du lancement précédent est complété sans retélécharger son début."""
+        self.partiel_existant(self.contenu[:20000], '"v18"')
+        thread = self.thread()
+
+        self.verifier_fichier(thread.download(self.partiel), self.contenu)
+
+        self.assertEqual(self.serveur.requetes[0]["Range"], "bytes=20000-")
+        self.assertEqual(thread.received_bytes, len(self.contenu) - 20000)
+
+    def test_etag_modifie(self):
+        """Une ressource modifiée (autre ETag) est téléchargée depuis le début."""
+        self.partiel_existant(b"ancienne archive" * 1000, '"v17"')
+        thread = self.thread()
+
+        self.verifier_fichier(thread.download(self.partiel), self.contenu)
+
+        self.assertEqual(len(self.serveur.requetes), 1)
+        self.assertEqual(self.serveur.requetes[0]["If-Range"], '"v17"')
+        with open(self.partiel + ".json", "r", encoding="utf-8") as file:
+            self.assertEqual(json.load(file)["etag"], '"v18"')
+
+    def test_reponse_complete_a_une_plage(self):
+        """Un serveur qui ignore Range renvoie tout (200) : les octets déjà reçus sont sautés."""
+        self.serveur.accepte_range = False
+        self.partiel_existant(self.contenu[:20000], '"v18"')
+        thread = self.thread()
+
+        self.verifier_fichier(thread.download(self.partiel), self.contenu)
+
+        self.assertEqual(len(self.serveur.requetes), 1)
+        self.assertEqual(thread.received_bytes, len(self.contenu) - 20000)
+
+    def test_segments(self):
+        """Les segments parallèles sont réassemblés à leur place, et l'empreinte est celle de tout le fichier."""
+        with mock.patch.object(UpdateThreadClasses, "TAILLE_MIN_SEGMENT", 1024):
+            thread = self.thread(segments=4)
+            self.verifier_fichier(thread.download(self.partiel), self.contenu)
+
+        # Le premier segment lit la réponse complète, les trois autres sont demandés par plages
+        plages = sorted(requete["Range"] for requete in self.serveur.requetes if "Range" in requete)
+        self.assertEqual(plages, ["bytes=16384-32767", "bytes=32768-49151", "bytes=49152-65535"])
+        self.assertTrue(all(requete["If-Range"] == '"v18"' for requete in self.serveur.requetes if "Range" in requete))
+        self.assertEqual(thread.received_bytes, len(self.contenu))
+
+    def test_segment_coupe(self):
+        """Un segment coupé reprend à la position atteinte."""
+        # La première réponse (segment 0) est coupée, les segments suivants sont servis en entier
+        self.serveur.coupures = [4096]
+        with mock.patch.object(UpdateThreadClasses, "TAILLE_MIN_SEGMENT", 1024):
+            thread = self.thread(segments=4)
+            self.verifier_fichier(thread.download(self.partiel), self.contenu)
+
+        plages = [requete["Range"] for requete in self.serveur.requetes if "Range" in requete]
+        self.assertEqual(len(plages), 4)
+        reprise = [plage for plage in plages if plage.endswith("-16383")]
+        self.assertEqual(len(reprise), 1)
+        self.assertTrue(0 < int(reprise[0][len("bytes="):].partition("-")[0]) <= 4096)
+
+
+    def archive(self):
+        """Archive de TAXREF factice servie par le serveur."""
+        tampon = io.BytesIO()
+        with zipfile.ZipFile(tampon, "w") as zip_file:
+            zip_file.writestr("TAXREFv18.txt", random.Random(1).randbytes(200 * 1024))
+        self.serveur.contenu = tampon.getvalue()
+
+    def lancer(self):
+        """Exécute le thread de téléchargement (sans cache des archives) et renvoie ses signaux."""
+        thread = self.thread()
+        thread.finished = mock.Mock()
+        with mock.patch.object(UpdateThreadClasses, "get_cache_dir", return_value=self.dossier):
+            thread.run()
+        thread.finished.emit.assert_called_once()
+        return thread
+
+    def test_progression_finale(self):
+        """La progression se termine par un seul 100 %, émis après tous les autres pourcentages."""
+        self.archive()
+        thread = self.lancer()
+
+        pourcentages = [appel.args[0] for appel in thread.progress.emit.call_args_list]
+        self.assertEqual(pourcentages, sorted(set(pourcentages)))
+        self.assertEqual(pourcentages[-1], 100)
+        self.assertIn(f"/ {len(self.serveur.contenu) / 1e6:.1f} Mo", thread.message.emit.call_args.args[0])
+
+    def test_progression_sans_taille(self):
+        """Sans taille annoncée, seul le message avance, et 100 % est émis à la fin."""
+        self.archive()
+        self.serveur.sans_taille = True
+        thread = self.lancer()
+
+        thread.progress.emit.assert_called_once_with(100)
+        self.assertIn(f"{len(self.serveur.contenu) / 1e6:.1f} Mo (", thread.message.emit.call_args.args[0])
+
+
+class ProgressionTest(unittest.TestCase):
+    """Test du regroupement des signaux de progression du téléchargement."""
+
+    def setUp(self):
+        self.thread = DownloadTaxrefThread("http://exemple/TAXREF_v18.zip", version=18)
+        self.thread.progress = mock.Mock()
+        self.thread.message = mock.Mock()
+        self.maintenant = 1000.0
+        patch = mock.patch.object(UpdateThreadClasses.time, "monotonic", side_effect=lambda: self.maintenant)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_petits_morceaux(self):
+        """De nombreux petits morceaux dans un même intervalle ne donnent qu'un signal de chaque sorte."""
+        total = 10 ** 6
+        for recus in range(100, 10000, 100):
+            self.thread.report_progress(recus, total)
+            self.maintenant += UpdateThreadClasses.INTERVALLE_PROGRESSION / 1000
+
+        self.thread.progress.emit.assert_called_once_with(0)
+        self.assertEqual(self.thread.message.emit.call_count, 1)
+
+        # Intervalle écoulé : un nouveau message, mais pas de nouveau pourcentage
+        self.maintenant += UpdateThreadClasses.INTERVALLE_PROGRESSION
+        self.thread.report_progress(9950, total)
+        self.assertEqual(self.thread.progress.emit.call_count, 1)
+        self.assertEqual(self.thread.message.emit.call_count, 2)
+
+    def test_fin_forcee(self):
+        """La dernière mise à jour est émise même dans l'intervalle, à 100 %."""
+        total = 10 ** 6
+        self.thread.report_progress(total - 1, total)
+        self.thread.report_progress(total, total, force=True)
+
+        self.assertEqual([appel.args[0] for appel in self.thread.progress.emit.call_args_list], [99, 100])
+        self.assertEqual(self.thread.message.emit.call_count, 2)
+        self.assertIn("1.0 Mo / 1.0 Mo", self.thread.message.emit.call_args.args[0])
+
+    def test_sans_taille(self):
+        """Sans taille annoncée, aucun pourcentage n'est calculé."""
+        self.thread.report_progress(5000, 0, force=True)
+
+        self.thread.progress.emit.assert_not_called()
+        self.assertIn("0.0 Mo (", self.thread.message.emit.call_args.args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
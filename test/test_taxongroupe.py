@@ -0,0 +1,97 @@
+# coding=utf-8
+"""Tests de la répartition des lignes de TAXREF entre les groupes taxonomiques."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ..taxongroupe import TaxonGroupe, ClassificateurTaxons, FLORE, AMPHIBIENS, REPTILES
+
+
+def filtre_reference(taxon: TaxonGroupe, df: pd.DataFrame, synonyme: bool=False)->pd.Series:
+    """Masque du filtre d'origine de `TaxonGroupe.filtre_df`, critère par critère."""
+
+    conditions = [df['REGNE'] == taxon.regne,
+                  df['GROUP1_INPN'].isin(taxon.groupe1),
+                  df['FR'].isin(['P', 'E', 'S', 'C', 'I', 'J', 'M', 'B', 'D', 'G'])]
+    if not taxon.is_ordre_empty():
+        conditions.append(df['ORDRE'].isin(taxon.ordre))
+    if not taxon.is_groupe2_empty():
+        conditions.append(df['GROUP2_INPN'].isin(taxon.groupe2))
+    if not taxon.is_groupe3_empty():
+        conditions.append(df['GROUP3_INPN'].isin(taxon.groupe3))
+    if not taxon.is_famille_empty():
+        conditions.append(df['FAMILLE'].isin(taxon.famille))
+    if not synonyme:
+        conditions.append(df['CD_NOM'] == df['CD_REF'])
+
+    return pd.concat(conditions, axis=1).all(axis=1)
+
+
+# Groupes dont les critères se recouvrent : tous les Chordés, les Amphibiens,
+# une famille d'Anoures et un ordre sans famille précisée
+CHORDES = TaxonGroupe("Chordés", "Animalia", [""], ["Chordés"], [""], [""], [""])
+RANIDES = TaxonGroupe("Ranidés", "Animalia", ["Anura"], ["Chordés"], ["Amphibiens"], [""], ["Ranidae"])
+ANOURES = TaxonGroupe("Anoures", "Animalia", ["Anura"], ["Chordés"], [""], [""], [""])
+
+TAXONS = [FLORE, AMPHIBIENS, REPTILES, CHORDES, RANIDES, ANOURES]
+
+
+class RepartitionTest(unittest.TestCase):
+    """Comparaison de `ClassificateurTaxons.repartir` avec le filtre d'origine."""
+
+    def setUp(self):
+        nan = np.nan
+        self.df = pd.DataFrame({
+            'CD_NOM':      [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12],
+            'CD_REF':      [1, 2, 3, 3, 5, 6, 7, 8, 9, 10, 11, 12],
+            'REGNE':       ['Animalia', 'Animalia', 'Animalia', 'Animalia', 'Animalia', 'Animalia',
+                            'Plantae', 'Plantae', nan, 'Animalia', 'Animalia', 'Animalia'],
+            'GROUP1_INPN': ['Chordés', 'Chordés', 'Chordés', 'Chordés', 'Chordés', nan,
+                            'Trachéophytes', 'Bryophytes', 'Chordés', 'Chordés', 'Arthropodes', 'Chordés'],
+            'GROUP2_INPN': ['Amphibiens', 'Amphibiens', 'Reptiles', 'Amphibiens', nan, 'Amphibiens',
+                            nan, nan, 'Amphibiens', 'Amphibiens', 'Insectes', 'Oiseaux'],
+            'GROUP3_INPN': [nan] * 12,
+            'ORDRE':       ['Anura', 'Caudata', 'Squamata', 'Anura', 'Anura', 'Anura',
+                            nan, nan, 'Anura', nan, 'Coleoptera', 'Passeriformes'],
+            'FAMILLE':     ['Ranidae', 'Salamandridae', 'Lacertidae', 'Ranidae', 'Ranidae', 'Ranidae',
+                            'Poaceae', nan, 'Ranidae', nan, 'Carabidae', nan],
+            'FR':          ['P', 'P', 'E', 'P', 'P', 'P', 'P', 'I', 'P', 'P', 'P', nan],
+        })
+
+    def verifier(self, df: pd.DataFrame, synonyme: bool):
+        repartition = ClassificateurTaxons(TAXONS).repartir(df, synonyme=synonyme)
+
+        self.assertEqual(list(repartition), [taxon.title for taxon in TAXONS])
+        for taxon in TAXONS:
+            with self.subTest(taxon=taxon.title, synonyme=synonyme):
+                attendu = df[filtre_reference(taxon, df, synonyme=synonyme)]
+                pd.testing.assert_frame_equal(repartition[taxon.title], attendu)
+                pd.testing.assert_frame_equal(taxon.filtre_df(df, synonyme=synonyme), attendu)
+
+    def test_repartition(self):
+        """Chaque groupe retient exactement les lignes du filtre d'origine."""
+        for synonyme in (False, True):
+            self.verifier(self.df, synonyme)
+
+    def test_colonnes_categorielles(self):
+        """Le résultat est le même sur des colonnes catégorielles, valeurs manquantes comprises."""
+        colonnes = ['REGNE', 'GROUP1_INPN', 'GROUP2_INPN', 'GROUP3_INPN', 'ORDRE', 'FAMILLE', 'FR']
+        df = self.df.astype({colonne: 'category' for colonne in colonnes})
+        for synonyme in (False, True):
+            self.verifier(df, synonyme)
+
+    def test_appartenance_multiple(self):
+        """Une ligne acceptée par plusieurs groupes est retenue par chacun."""
+        appartenance = ClassificateurTaxons(TAXONS).appartenance(self.df)
+
+        self.assertEqual(appartenance.shape, (len(self.df), len(TAXONS)))
+        # Grenouille (CD_NOM 1) : Amphibien, Chordés, Ranidés et Anoures
+        self.assertEqual(appartenance[0].tolist(), [False, True, False, True, True, True])
+        # Synonyme (CD_NOM 4) : aucun groupe
+        self.assertFalse(appartenance[3].any())
+
+
+if __name__ == "__main__":
+    unittest.main()
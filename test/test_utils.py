@@ -0,0 +1,111 @@
+# coding=utf-8
+"""Tests de la comparaison incrémentale des couches."""
+
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from .. import utils
+from ..utils import compare_dataframes, save_diff_to_gpkg_via_qgs
+
+
+class CompareDataframesTest(unittest.TestCase):
+    """Test du calcul des ajouts, modifications et suppressions."""
+
+    def setUp(self):
+        """Couche existante (indexée par fid, avec une colonne de statut) et nouveau contenu."""
+        self.old_df = pd.DataFrame({
+            'CD_NOM': ['1', '2', '3', '4', None],
+            'CD_REF': ['1', '2', '3', '4', '9'],
+            'NOM_VALIDE': ['Aaa', 'Bbb', 'Ccc', 'Ddd', None],
+            'VERSION': [17.0, 17.0, 17.0, 17.0, None],
+            'LRN': ['LC', 'VU', None, 'EN', 'CR']},
+            index=[10, 11, 12, 13, 14])
+        self.new_df = pd.DataFrame({
+            'CD_NOM': ['1', '2', '4', '5'],
+            'CD_REF': ['1', '2', '4', '5'],
+            'NOM_VALIDE': ['Aaa', 'Bbb bis', 'Ddd', 'Eee'],
+            'VERSION': [17, 17, 18, 18]})
+
+    def test_differences(self):
+        """Seules les lignes et cellules changées sont retenues."""
+        ajouts, modifications, suppressions = compare_dataframes(self.old_df, self.new_df, 'CD_NOM')
+
+        self.assertEqual(ajouts['CD_NOM'].tolist(), ['5'])
+        self.assertEqual(modifications, {11: {'NOM_VALIDE': 'Bbb bis'}, 13: {'VERSION': 18}})
+        # Ligne disparue et ligne sans clé (statut seul)
+        self.assertEqual(sorted(suppressions), [12, 14])
+
+    def test_colonne_absente(self):
+        """Une colonne absente de la couche est à renseigner sur toutes les lignes communes."""
+        new_df = self.new_df.assign(NOM_VERN=['a', None, 'c', 'e'])
+        _, modifications, _ = compare_dataframes(self.old_df, new_df, 'CD_NOM')
+
+        self.assertEqual(modifications[10], {'NOM_VERN': 'a'})
+        self.assertNotIn('NOM_VERN', modifications[11])
+
+    def test_identiques(self):
+        """Aucune différence avec soi-même."""
+        old_df = self.old_df.dropna(subset=['CD_NOM'])
+        ajouts, modifications, suppressions = compare_dataframes(old_df, old_df.reset_index(drop=True), 'CD_NOM')
+
+        self.assertTrue(ajouts.empty)
+        self.assertEqual(modifications, {})
+        self.assertEqual(suppressions, [])
+
+
+class SaveDiffVersionTest(unittest.TestCase):
+    """Test de l'écriture des différences lors d'une montée de version de TAXREF."""
+
+    def setUp(self):
+        """Couche Liste existante en version 17, simulée par un fournisseur de données factice."""
+        self.old_df = pd.DataFrame({
+            'CD_NOM': ['1', '2', '3'],
+            'NOM_VALIDE': ['Aaa', 'Bbb', 'Ccc'],
+            'VERSION': [17, 17, 17]},
+            index=[10, 11, 12])
+
+        self.layer = mock.Mock()
+        self.layer.isValid.return_value = True
+        self.layer.fields.return_value.indexOf.side_effect = lambda name: list(self.old_df.columns).index(name)
+        self.provider = self.layer.dataProvider.return_value
+        self.provider.fields.return_value = []
+
+        projet = mock.Mock()
+        projet.mapLayersByName.return_value = [self.layer]
+        for patch in (mock.patch.object(utils, "QgsProject", **{"instance.return_value": projet}),
+                      mock.patch.object(utils, "parse_layer_to_dataframe", return_value=self.old_df),
+                      mock.patch.object(utils, "get_fields_from_dataframe", return_value=[])):
+            patch.start()
+            self.addCleanup(patch.stop)
+        patch = mock.patch.object(utils, "save_layer_version")
+        self.save_layer_version = patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_montee_de_version(self):
+        """Une montée de version seule n'écrit aucun attribut : la version est enregistrée une fois pour la couche."""
+        new_df = self.old_df.reset_index(drop=True).assign(VERSION=18)
+        comptes = save_diff_to_gpkg_via_qgs(new_df, "Statuts.gpkg", "Liste Flore")
+
+        self.provider.changeAttributeValues.assert_not_called()
+        self.provider.addFeatures.assert_not_called()
+        self.provider.deleteFeatures.assert_not_called()
+        self.assertEqual(comptes, {"ajouts": 0, "modifications": 0, "suppressions": 0, "inchangees": 3})
+        self.save_layer_version.assert_called_once_with("Statuts.gpkg", "Liste Flore", 18, debug=0)
+
+    def test_modification_avec_version(self):
+        """Une ligne modifiée reçoit aussi la nouvelle version ; les autres ne sont pas réécrites."""
+        new_df = self.old_df.reset_index(drop=True).assign(VERSION=18)
+        new_df.loc[1, 'NOM_VALIDE'] = 'Bbb bis'
+        comptes = save_diff_to_gpkg_via_qgs(new_df, "Statuts.gpkg", "Liste Flore")
+
+        self.provider.changeAttributeValues.assert_called_once_with({11: {1: 'Bbb bis', 2: 18}})
+        self.assertEqual(comptes["modifications"], 1)
+        self.assertEqual(comptes["inchangees"], 2)
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(CompareDataframesTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
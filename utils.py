@@ -15,6 +15,8 @@ from qgis.core import (
     QgsGeometry)
 
 from PyQt5.QtCore import QVariant  # Pour spécifier les types de données des colonnes
+from PyQt5.QtCore import QSettings # Pour lire les réglages avancés du plugin
+from PyQt5.QtCore import QStandardPaths # Pour trouver le dossier de cache de l'utilisateur.rice
 
 from datetime import datetime
 import os
@@ -24,6 +26,9 @@ import unicodedata
 import pandas as pd
 import geopandas as gpd
 
+# Table des GeoPackages qui garde la version de TAXREF de chaque couche (une ligne par couche)
+COUCHE_VERSIONS = "Versions"
+
 def retirer_accents(texte):
     # Normalisation unicode (décomposition des caractères accentués)
     texte_normalise = unicodedata.normalize('NFD', texte)
@@ -46,6 +51,45 @@ def print_debug_info(debug_level: int,
 
     return
 
+def get_plugin_setting(key: str, default=None, value_type: type=str):
+    """
+    Lit un réglage du plugin dans les paramètres de QGIS (clé "AutoUpdateTAXREF/{key}"),
+    modifiable depuis l'éditeur de paramètres avancés.
+
+    :param:
+    key (str): nom du réglage
+    default: valeur renvoyée si le réglage n'est pas défini
+    value_type (type): type de la valeur renvoyée
+
+    :return:
+    valeur du réglage
+    """
+
+    return QSettings().value(f"AutoUpdateTAXREF/{key}", default, type=value_type)
+
+def get_cache_dir(subfolder: str="")->str:
+    """
+    Renvoie le dossier de cache du plugin, partagé par tous les projets, et le crée si besoin.
+    Par défaut, il se trouve dans le dossier de cache de l'utilisateur.rice ;
+    le réglage "cache_dir" permet de le déplacer.
+
+    :param:
+    subfolder (str): sous-dossier du cache (vide pour la racine)
+
+    :return:
+    str: chemin du dossier
+    """
+
+    cache_dir = get_plugin_setting("cache_dir", "")
+    if not cache_dir:
+        cache_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation), "AutoUpdateTAXREF")
+
+    if subfolder:
+        cache_dir = os.path.join(cache_dir, subfolder)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    return cache_dir
+
 def log_features(features: list, title="Features") -> None:
     QgsMessageLog.logMessage(f"\t{title} ({len(features)} entités) :", "AutoUpdateTAXREF")
     for i, feat in enumerate(features):
@@ -145,29 +189,32 @@ def list_layer_from_gpd(filepath: str):
 
     return layers
 
-def parse_layer_to_dataframe(layer)->pd.DataFrame:
+def parse_layer_to_dataframe(layer, index_fid: bool=False)->pd.DataFrame:
     """
     Parse une layer pour en faire un pd.DataFrame
 
     :param:
     layer (QgsVectorLayer): couche QGIS à parser
+    index_fid (bool): si True, l'index du dataframe est l'identifiant (fid) des entités
 
     :return:
     df (pd.DataFrame): dataframe associé à la couche vectroriel
     """
 
     data = []
+    fids = []
     # Passe en revue les lignes de layer
     for feature in layer.getFeatures():
         # Récupère une collection d'attributs (élements de la lignes)
         attrs = feature.attributes()
         data.append(attrs)
+        fids.append(feature.id())
 
     # Récupérer les noms de champs
     fields = [field.name() for field in layer.fields()]
 
     # Crée un dataframe à partir des fileds (colonnes) et des données
-    df = pd.DataFrame(data, columns=fields)
+    df = pd.DataFrame(data, columns=fields, index=fids if index_fid else None)
 
     return df
 
@@ -307,6 +354,23 @@ def add_layer_to_map(file_path, uri, layer_name, new: bool=False, debug: int=0)-
 
     return
 
+def get_fields_from_dataframe(df: pd.DataFrame)->QgsFields:
+    """
+    Crée les champs QGIS correspondant aux colonnes d'un DataFrame,
+    d'après le type de la première valeur non manquante de chaque colonne.
+    """
+
+    fields = QgsFields()
+    for col in df.columns:
+        sample = df[col].dropna().iloc[0] if not df[col].dropna().empty else ""
+        if isinstance(sample, (int, float)):
+            field_type = QVariant.Double if isinstance(sample, float) else QVariant.Int
+        else:
+            field_type = QVariant.String
+        fields.append(QgsField(col, field_type))
+
+    return fields
+
 @time_decorator
 def save_to_gpkg_via_qgs(df: pd.DataFrame,
                          file_path: str,
@@ -325,14 +389,7 @@ def save_to_gpkg_via_qgs(df: pd.DataFrame,
         print_debug_info(debug, 3, "Colonne 'fid' supprimée du DataFrame.")
     
     # Créer les champs depuis le DataFrame
-    fields = QgsFields()
-    for col in df.columns:
-        sample = df[col].dropna().iloc[0] if not df[col].dropna().empty else ""
-        if isinstance(sample, (int, float)):
-            field_type = QVariant.Double if isinstance(sample, float) else QVariant.Int
-        else:
-            field_type = QVariant.String
-        fields.append(QgsField(col, field_type))
+    fields = get_fields_from_dataframe(df)
 
     uri = f"{file_path}|layername={layer_name}"
 
@@ -424,6 +481,266 @@ def save_to_gpkg_via_qgs(df: pd.DataFrame,
     print_debug_info(debug, 3, f"save_to_gpkg_via_qgs : couche {layer_name} créée.")
     return result
 
+def normalise_valeurs(df: pd.DataFrame)->pd.DataFrame:
+    """
+    Convertit les valeurs d'un DataFrame en texte pour comparer une couche QGIS et un DataFrame :
+    les valeurs manquantes (NaN, None, NULL de QGIS) deviennent None et les réels entiers
+    perdent leur partie décimale (18.0 et 18 sont égaux).
+    """
+
+    def normalise(valeur):
+        if valeur is None or (isinstance(valeur, QVariant) and valeur.isNull()):
+            return None
+        if isinstance(valeur, float) and valeur.is_integer():
+            valeur = int(valeur)
+        return str(valeur)
+
+    df = df.astype(object)
+    return df.where(df.notna(), None).apply(lambda colonne: colonne.map(normalise))
+
+def compare_dataframes(old_df: pd.DataFrame,
+                       new_df: pd.DataFrame,
+                       key: str)->tuple:
+    """
+    Compare le contenu actuel d'une couche et son nouveau contenu, ligne à ligne par la colonne clé.
+
+    Seules les colonnes de `new_df` sont comparées : les autres colonnes de la couche
+    (par exemple les statuts fusionnés dans les couches Liste) ne sont pas touchées.
+    Les lignes de la couche dont la clé est manquante ou en double sont supprimées.
+
+    :param:
+    old_df (pd.DataFrame): contenu de la couche, indexé par fid (voir parse_layer_to_dataframe)
+    new_df (pd.DataFrame): nouveau contenu de la couche
+    key (str): colonne identifiant les lignes (par exemple CD_NOM)
+
+    :return:
+    tuple (pd.DataFrame, dict, list):
+        - les lignes de new_df à ajouter
+        - les valeurs à modifier, {fid: {colonne: nouvelle valeur}}
+        - les fid des lignes à supprimer
+    """
+
+    old_keys = normalise_valeurs(old_df[[key]])[key]
+    new_keys = normalise_valeurs(new_df[[key]])[key]
+
+    # Lignes de la couche à supprimer : clé absente du nouveau contenu, manquante ou en double
+    invalides = old_keys.isna() | old_keys.duplicated()
+    suppressions = old_df.index[invalides | ~old_keys.isin(new_keys.dropna())].tolist()
+
+    # Position de chaque nouvelle ligne dans la couche (-1 si elle est nouvelle)
+    positions = pd.Index(old_keys[~invalides]).get_indexer(new_keys)
+    communs = positions != -1
+    ajouts = new_df[~communs]
+
+    # Comparaison vectorisée des lignes communes, colonne par colonne
+    colonnes = [col for col in new_df.columns if col != key]
+    new_communs = new_df.loc[communs, colonnes]
+    old_communs = old_df[~invalides].iloc[positions[communs]].reindex(columns=colonnes)
+    new_valeurs = normalise_valeurs(new_communs).to_numpy()
+    old_valeurs = normalise_valeurs(old_communs).to_numpy()
+    differences = ~((new_valeurs == old_valeurs) | (pd.isna(new_valeurs) & pd.isna(old_valeurs)))
+
+    # Nouvelles valeurs des cellules modifiées, en types Python
+    valeurs = new_communs.astype(object)
+    valeurs = valeurs.where(valeurs.notna(), None)
+    modifications = {}
+    for i in differences.any(axis=1).nonzero()[0]:
+        modifications[int(old_communs.index[i])] = {colonnes[j]: valeurs.iat[i, j] for j in differences[i].nonzero()[0]}
+
+    return ajouts, modifications, suppressions
+
+def retirer_modifications_version(modifications: dict, version_column: str=None)->dict:
+    """
+    Retire des modifications les lignes dont seule la colonne de version a changé :
+    une montée de version de TAXREF ne réécrit pas toutes les entités, la version
+    de la couche étant gardée une seule fois dans la table Versions (voir save_layer_version).
+
+    :param:
+    modifications (dict): valeurs à modifier, {fid: {colonne: nouvelle valeur}} (voir compare_dataframes)
+    version_column (str): colonne de version (None : aucune)
+
+    :return:
+    dict: modifications des lignes dont une autre colonne a changé (la version y est aussi mise à jour)
+    """
+
+    if version_column is None:
+        return modifications
+
+    return {fid: valeurs for fid, valeurs in modifications.items() if set(valeurs) - {version_column}}
+
+def get_layer_versions(file_path: str)->dict:
+    """
+    Lit la table Versions d'un GeoPackage.
+
+    :param:
+    file_path (str): chemin du GeoPackage
+
+    :return:
+    dict: version de TAXREF de chaque couche, {nom de la couche: version} (vide sans table Versions)
+    """
+
+    if not os.path.isfile(file_path):
+        return {}
+
+    layer = load_layer(file_path, COUCHE_VERSIONS)
+    if not layer.isValid():
+        return {}
+
+    df = parse_layer_to_dataframe(layer)
+    if not {"COUCHE", "VERSION"}.issubset(df.columns):
+        return {}
+
+    versions = pd.to_numeric(df["VERSION"].apply(lambda x: str(x) if x is not None else None), errors="coerce")
+    return {couche: int(version) for couche, version in zip(df["COUCHE"], versions)
+            if couche is not None and pd.notna(version)}
+
+def save_layer_version(file_path: str, layer_name: str, version, debug: int=0)->None:
+    """
+    Enregistre la version de TAXREF d'une couche dans la table Versions du GeoPackage
+    (les versions des autres couches sont conservées).
+
+    :param:
+    file_path (str): chemin du GeoPackage
+    layer_name (str): nom de la couche
+    version (int): version de TAXREF de la couche
+    debug (int): niveau de debug
+    """
+
+    versions = get_layer_versions(file_path)
+    versions[layer_name] = int(version)
+
+    df_versions = pd.DataFrame({"COUCHE": list(versions), "VERSION": list(versions.values())})
+    save_diff_to_gpkg_via_qgs(df_versions, file_path, COUCHE_VERSIONS, key="COUCHE", version_column=None, debug=debug)
+
+@time_decorator
+def save_diff_to_gpkg_via_qgs(df: pd.DataFrame,
+                              file_path: str,
+                              layer_name: str,
+                              key: str="CD_NOM",
+                              version_column: str="VERSION",
+                              debug: int=0)->dict:
+    """
+    Met à jour une couche d'un GeoPackage en n'écrivant que les différences avec son contenu actuel :
+    ajout des nouvelles lignes, modification des cellules changées et suppression des lignes disparues.
+    Les colonnes de la couche absentes du DataFrame sont conservées telles quelles.
+    Si la couche n'existe pas encore (ou n'a pas la colonne clé), elle est créée par save_to_gpkg_via_qgs.
+
+    :param:
+    df (pd.DataFrame): nouveau contenu de la couche
+    file_path (str): chemin du GeoPackage
+    layer_name (str): nom de la couche
+    key (str): colonne identifiant les lignes
+    version_column (str): colonne de version. Les lignes dont seule la version a changé ne sont pas réécrites
+        (ni comptées comme modifiées) ; la version de la couche est enregistrée dans la table Versions.
+        None : pas de colonne de version.
+    debug (int): niveau de debug
+
+    :return:
+    dict: nombre de lignes "ajouts", "modifications", "suppressions" et "inchangees"
+    """
+
+    # Supprimer la colonne 'fid' si elle existe pour éviter les conflits
+    if "fid" in df.columns:
+        df = df.drop(columns=["fid"])
+
+    uri = f"{file_path}|layername={layer_name}"
+
+    # Couche chargée dans le projet, sinon couche du GeoPackage
+    layers = QgsProject.instance().mapLayersByName(layer_name)
+    layer = layers[0] if layers else QgsVectorLayer(uri, layer_name, "ogr")
+
+    if not layer.isValid() or layer.fields().indexOf(key) == -1:
+        print_debug_info(debug, 3, f"Couche {layer_name} inexistante ou sans colonne {key} : écriture complète.")
+        save_to_gpkg_via_qgs(df, file_path, layer_name, debug=debug)
+        if version_column is not None and version_column in df.columns and not df.empty:
+            save_layer_version(file_path, layer_name, df[version_column].max(), debug=debug)
+        return {"ajouts": len(df), "modifications": 0, "suppressions": 0, "inchangees": 0}
+
+    old_df = parse_layer_to_dataframe(layer, index_fid=True).drop(columns=["fid"], errors="ignore")
+    ajouts, modifications, suppressions = compare_dataframes(old_df, df, key)
+    # Les lignes dont seule la version a changé ne sont pas réécrites
+    modifications = retirer_modifications_version(modifications, version_column)
+
+    provider = layer.dataProvider()
+
+    # Ajouter les colonnes du DataFrame absentes de la couche
+    existing_names = [f.name() for f in provider.fields()]
+    new_fields = [QgsField(f.name(), f.type()) for f in get_fields_from_dataframe(df) if f.name() not in existing_names]
+    if new_fields:
+        if not provider.addAttributes(new_fields):
+            raise Exception("addAttributes failed")
+        layer.updateFields()
+
+    if suppressions and not provider.deleteFeatures(suppressions):
+        raise Exception("provider.deleteFeatures failed")
+
+    if modifications:
+        fields = layer.fields()
+        changes = {fid: {fields.indexOf(col): valeur for col, valeur in valeurs.items()}
+                   for fid, valeurs in modifications.items()}
+        if not provider.changeAttributeValues(changes):
+            raise Exception("provider.changeAttributeValues failed")
+
+    if not ajouts.empty:
+        features = get_features_to_add(ajouts, layer, debug=debug)
+        if not provider.addFeatures(features):
+            raise Exception("provider.addFeatures failed")
+
+    layer.updateFields()
+    layer.triggerRepaint()
+    layer.updateExtents()
+
+    # On l'ajoute au projet si elle n'y était pas
+    if not layers:
+        add_layer_to_map(file_path, uri, layer_name, new=False, debug=debug)
+
+    # Version de TAXREF de la couche, enregistrée une seule fois plutôt que sur chaque ligne
+    if version_column is not None and version_column in df.columns and not df.empty:
+        save_layer_version(file_path, layer_name, df[version_column].max(), debug=debug)
+
+    # Les lignes dont seule la version a changé, non réécrites, sont comptées comme inchangées
+    nombre_communs = len(df) - len(ajouts)
+    comptes = {"ajouts": len(ajouts),
+               "modifications": len(modifications),
+               "suppressions": len(suppressions),
+               "inchangees": nombre_communs - len(modifications)}
+
+    print_debug_info(debug, 0, f"{layer_name} : {comptes['ajouts']} ajouts, {comptes['modifications']} modifications, "
+                               f"{comptes['suppressions']} suppressions, {comptes['inchangees']} lignes inchangées")
+
+    return comptes
+
+def create_attribute_index(file_path: str, layer_name: str, field_name: str, debug: int=0)->bool:
+    """
+    Crée un index attributaire sur une colonne d'une couche du GeoPackage
+    (sans effet si l'index existe déjà).
+
+    :param:
+    file_path (str): chemin du GeoPackage
+    layer_name (str): nom de la couche
+    field_name (str): colonne à indexer
+    debug (int): niveau de debug
+
+    :return:
+    bool: True si l'index a été créé (ou existait déjà)
+    """
+
+    layers = QgsProject.instance().mapLayersByName(layer_name)
+    layer = layers[0] if layers else QgsVectorLayer(f"{file_path}|layername={layer_name}", layer_name, "ogr")
+
+    if not layer.isValid() or layer.fields().indexOf(field_name) == -1:
+        return False
+
+    provider = layer.dataProvider()
+    if not provider.capabilities() & QgsVectorDataProvider.CreateAttributeIndex:
+        print_debug_info(debug, 1, f"{layer_name} : le fournisseur ne permet pas d'indexer {field_name}")
+        return False
+
+    created = provider.createAttributeIndex(layer.fields().indexOf(field_name))
+    print_debug_info(debug, 1, f"{layer_name} : index sur {field_name} {'créé' if created else 'non créé'}")
+
+    return created
+
 def save_decorator(savior) :
 
     def inner(function) :